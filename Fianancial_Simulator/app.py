@@ -1,28 +1,62 @@
 # app.py
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, g, Response, stream_with_context
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
-from datetime import datetime
+from datetime import datetime, timedelta
+from functools import wraps
 import uuid
+from types import SimpleNamespace
 import os
+import time
 import json
+import click
 import numpy as np
+import pandas as pd
 from scipy import stats
 import yfinance as yf
 from reportlab.lib.pagesizes import A4
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib import colors
+from services.historical_simulation import HistoricalSimulationEngine
+from services.option_pricing import OptionBook, OptionRiskEngine, black_scholes_price
+from services.credit_risk import CreditPortfolio, CreditRiskEngine
+from services.factor_model import FactorRiskModel
+from services.covariance_service import CovarianceService
+from services.actuarial_service import actuarial_service
+from services.dashboard_stream import DashboardHub
+from services.simulation_archive import SimulationArchive
+from services.export_service import StreamingExporter
+from services import risk_kernels
+from utils.logger import get_logger
+from utils.metrics import metrics
+from utils.profiler import SamplingProfiler, ProfileStore
+from utils.security import SecurityUtils
+from auth.user_cache import UserCache
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'finrisk-secret-key-2025'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///finrisk.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('FINRISK_DATABASE_URI', 'sqlite:///finrisk.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['PROFILING_ENABLED'] = os.environ.get('FINRISK_PROFILING') == '1'
+app.config['USER_CACHE_TTL'] = int(os.environ.get('FINRISK_USER_CACHE_TTL', 300))
+# Jeton d'administration exigé par /metrics et /debug/profile (endpoints désactivés s'il est absent)
+app.config['ADMIN_TOKEN'] = os.environ.get('FINRISK_ADMIN_TOKEN')
+app.config['SLOW_REQUEST_SECONDS'] = float(os.environ.get('FINRISK_SLOW_REQUEST_SECONDS', 2.0))
+app.config['SIMULATION_ARCHIVE_DIR'] = os.environ.get(
+    'FINRISK_ARCHIVE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'archive', 'simulations'))
+app.config['REPORTS_DIR'] = os.environ.get('FINRISK_REPORTS_DIR', 'reports')
+app.config['SIMULATION_ARCHIVE_DAYS'] = int(os.environ.get('FINRISK_ARCHIVE_DAYS', 180))
 
 db = SQLAlchemy(app)
 login_manager = LoginManager(app)
 login_manager.login_view = 'login'
+logger = get_logger('finrisk')
+profile_store = ProfileStore()
+simulation_archive = SimulationArchive(app.config['SIMULATION_ARCHIVE_DIR'])
+# Noyaux Numba chargés depuis le cache disque au démarrage plutôt qu'à la première requête
+risk_kernels.warmup()
 
 # === MODÈLES ===
 class User(UserMixin, db.Model):
@@ -53,6 +87,23 @@ class Asset(db.Model):
     purchase_price = db.Column(db.Float, nullable=False)
     current_value = db.Column(db.Float, default=0.0)
     portfolio_id = db.Column(db.String(36), db.ForeignKey('portfolio.id'), nullable=False)
+    option = db.relationship('OptionContract', backref='asset', uselist=False, cascade='all, delete-orphan')
+
+class OptionContract(db.Model):
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    asset_id = db.Column(db.String(36), db.ForeignKey('asset.id'), nullable=False, unique=True)
+    option_type = db.Column(db.String(4), nullable=False)  # 'call' ou 'put'
+    underlying_symbol = db.Column(db.String(20), nullable=False)
+    underlying_price = db.Column(db.Float, nullable=False)
+    strike = db.Column(db.Float, nullable=False)
+    maturity = db.Column(db.Float, nullable=False)  # En années
+    volatility = db.Column(db.Float, nullable=False)  # Volatilité implicite annuelle
+    rate = db.Column(db.Float, default=0.02)
+
+    def price(self):
+        return float(black_scholes_price(self.underlying_price, self.strike, self.maturity,
+                                         self.rate if self.rate is not None else 0.02,
+                                         self.volatility, self.option_type == 'call'))
 
 class Simulation(db.Model):
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -64,9 +115,12 @@ class Simulation(db.Model):
     user_id = db.Column(db.String(36), db.ForeignKey('user.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+user_cache = UserCache(lambda user_id: User.query.get(user_id), ttl=app.config['USER_CACHE_TTL'])
+user_cache.bind_model(User)
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(user_id)
+    return user_cache.get(user_id)
 
 # === INITIALISATION ===
 def init_db():
@@ -91,6 +145,76 @@ def init_db():
                 db.session.add(a)
             db.session.commit()
 
+@app.cli.command('archive-simulations')
+@click.option('--days', type=int, default=None, help="Âge minimal (jours) des simulations à archiver")
+def archive_simulations(days):
+    """Archive les simulations anciennes en partitions colonnes compressées"""
+    days = app.config['SIMULATION_ARCHIVE_DAYS'] if days is None else days
+    with metrics.span('archive_simulations'):
+        summary = simulation_archive.archive(db.session, Simulation, datetime.utcnow() - timedelta(days=days))
+    metrics.increment('simulations_archived_total', summary['archived'])
+    logger.info(f"Archivage: {summary['archived']} simulations, {summary['files']} fichiers "
+                f"(avant {summary['watermark']})")
+    click.echo(json.dumps(summary))
+
+# === INSTRUMENTATION ===
+metrics.register_gauge('cache_entries', lambda: len(profile_store), cache='request_profiles')
+
+@app.before_request
+def start_request_timer():
+    metrics.adjust_gauge('requests_in_flight', 1)
+    g.request_start = time.perf_counter()
+    g.profiler = None
+    if app.config['PROFILING_ENABLED'] and (request.args.get('profile') == '1' or request.headers.get('X-Profile') == '1'):
+        g.profiler = SamplingProfiler().start()
+
+@app.after_request
+def record_request_timing(response):
+    duration = time.perf_counter() - g.get('request_start', time.perf_counter())
+    endpoint = request.endpoint or 'unknown'
+    metrics.observe('request_duration_seconds', duration, endpoint=endpoint, method=request.method)
+    metrics.increment('requests_total', endpoint=endpoint, method=request.method, status=response.status_code)
+    if duration > app.config['SLOW_REQUEST_SECONDS']:
+        logger.warning(f"Requête lente {request.method} {request.path}: {duration:.3f}s")
+    profiler = g.get('profiler')
+    if profiler is not None:
+        profiler.stop()
+        profile_id = str(uuid.uuid4())
+        profile_store.add(profile_id, profiler, f"{request.method} {request.path}")
+        response.headers['X-Profile-Id'] = profile_id
+        logger.info(f"Profil {profile_id} ({profiler.sample_count} échantillons): {profiler.top_functions(5)}")
+    return response
+
+@app.teardown_request
+def end_request(exc):
+    metrics.adjust_gauge('requests_in_flight', -1)
+
+def admin_token_required(view):
+    """Réservé aux détenteurs du jeton d'administration (collecteur Prometheus, opérateurs)"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not app.config['ADMIN_TOKEN']:
+            return "Non disponible", 404
+        if not SecurityUtils.check_bearer_token(request.headers.get('Authorization'), app.config['ADMIN_TOKEN']):
+            return "Jeton d'administration requis", 401, {'WWW-Authenticate': 'Bearer'}
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.route('/metrics')
+@admin_token_required
+def metrics_endpoint():
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/debug/profile/<profile_id>')
+@admin_token_required
+def profile_endpoint(profile_id):
+    if not app.config['PROFILING_ENABLED']:
+        return "Profilage désactivé", 404
+    entry = profile_store.get(profile_id)
+    if not entry:
+        return "Profil non trouvé", 404
+    return Response(entry['profiler'].collapsed(), mimetype='text/plain')
+
 # === ROUTES ===
 @app.route('/')
 def index():
@@ -109,6 +233,7 @@ def login():
         user = User.query.filter_by(username=data.get('username')).first()
         if user and check_password_hash(user.password_hash, data.get('password')):
             login_user(user)
+            user_cache.put(user)
             return jsonify({'success': True})
         return jsonify({'error': 'Identifiants invalides'}), 401
     return jsonify({'message': 'Use POST'}), 200
@@ -125,16 +250,50 @@ def register():
         db.session.add(user)
         db.session.commit()
         login_user(user)
+        user_cache.put(user)
         return jsonify({'success': True})
     return jsonify({'message': 'Use POST'}), 200
 
 @app.route('/logout', methods=['POST'])
 @login_required
 def logout():
+    user_cache.invalidate(current_user.id)
     logout_user()
     return jsonify({'success': True})
 
 # === PORTFEUILLES ===
+@app.route('/api/assets/<asset_id>', methods=['PATCH'])
+@login_required
+def update_asset(asset_id):
+    asset = Asset.query.get(asset_id)
+    if not asset or asset.portfolio.user_id != current_user.id:
+        return jsonify({'error': 'Actif non trouvé'}), 404
+    data = request.get_json()
+    if 'quantity' in data:
+        unit_value = asset.current_value / asset.quantity if asset.quantity else asset.purchase_price
+        asset.quantity = float(data['quantity'])
+        asset.current_value = asset.quantity * unit_value
+    if 'price' in data:
+        asset.current_value = asset.quantity * float(data['price'])
+    with metrics.span('db_commit'):
+        db.session.commit()
+    dashboard_hub.update_position(asset.portfolio_id, asset.id, value=asset.current_value, quantity=asset.quantity)
+    return jsonify({'success': True, 'current_value': round(asset.current_value, 2)})
+
+@app.route('/api/assets/<asset_id>', methods=['DELETE'])
+@login_required
+def delete_asset(asset_id):
+    asset = Asset.query.get(asset_id)
+    if not asset or asset.portfolio.user_id != current_user.id:
+        return jsonify({'error': 'Actif non trouvé'}), 404
+    portfolio_id = asset.portfolio_id
+    db.session.delete(asset)
+    with metrics.span('db_commit'):
+        db.session.commit()
+    # Position retirée: le canal du tableau de bord (s'il est suivi) est recalculé en entier
+    dashboard_hub.refresh(portfolio_id)
+    return jsonify({'success': True})
+
 @app.route('/api/portfolios', methods=['GET', 'POST'])
 @login_required
 def portfolios():
@@ -156,6 +315,14 @@ def portfolios():
                 portfolio_id=portfolio.id
             )
             asset.current_value = asset.quantity * asset.purchase_price
+            if a.get('option'):
+                o = a['option']
+                asset.option = OptionContract(
+                    option_type=o['option_type'], underlying_symbol=o.get('underlying_symbol', a['symbol']),
+                    underlying_price=float(o['underlying_price']), strike=float(o['strike']),
+                    maturity=float(o['maturity']), volatility=float(o['volatility']), rate=float(o.get('rate', 0.02))
+                )
+                asset.current_value = asset.quantity * asset.option.price()
             db.session.add(asset)
         db.session.commit()
         return jsonify({'success': True, 'id': portfolio.id})
@@ -165,12 +332,28 @@ def portfolios():
 @login_required
 def simulations():
     if request.method == 'GET':
-        sims = Simulation.query.filter_by(user_id=current_user.id).order_by(Simulation.created_at.desc()).all()
-        return jsonify([{
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 50, type=int), 1), 500)
+        offset = (page - 1) * per_page
+
+        # Les simulations récentes sont en base; l'archive n'est lue que si la page l'atteint
+        recent = recent_simulations(current_user.id)
+        recent_count = recent.count()
+        sims = recent.order_by(Simulation.created_at.desc()).offset(offset).limit(per_page).all()
+        items = [{
             'id': s.id, 'name': s.name, 'type': s.type,
             'created_at': s.created_at.isoformat(),
             'results': json.loads(s.results) if s.results else {}
-        } for s in sims])
+        } for s in sims]
+        if len(items) < per_page:
+            with metrics.span('archive_read'):
+                items += simulation_archive.page(current_user.id, max(offset - recent_count, 0), per_page - len(items))
+
+        response = jsonify(items)
+        response.headers['X-Total-Count'] = str(recent_count + simulation_archive.count(current_user.id))
+        response.headers['X-Page'] = str(page)
+        response.headers['X-Per-Page'] = str(per_page)
+        return response
     else:
         data = request.get_json()
         portfolio = Portfolio.query.get(data['portfolio_id'])
@@ -186,15 +369,25 @@ def simulations():
         db.session.flush()
 
         results = {}
-        if data['type'] == 'var':
-            results = calculate_var(portfolio, data.get('parameters', {}))
-        elif data['type'] == 'stress_test':
-            results = stress_test(portfolio, data.get('parameters', {}))
-        elif data['type'] == 'backtest':
-            results = backtest(portfolio, data.get('parameters', {}))
+        try:
+            if data['type'] == 'var':
+                results = calculate_var(portfolio, data.get('parameters', {}))
+            elif data['type'] == 'stress_test':
+                results = stress_test(portfolio, data.get('parameters', {}), breakdown=True)
+            elif data['type'] == 'option_var':
+                results = option_var(portfolio, data.get('parameters', {}))
+            elif data['type'] == 'backtest':
+                results = backtest(portfolio, data.get('parameters', {}))
+            elif data['type'] == 'credit_var':
+                results = credit_var(portfolio, data.get('parameters', {}))
+        except ValueError as e:
+            # Paramètres incompatibles (horizon trop long, corrélations invalides...): rien n'est enregistré
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
 
         sim.results = json.dumps(results)
-        db.session.commit()
+        with metrics.span('db_commit'):
+            db.session.commit()
 
         pdf_path = generate_pdf_report(sim, results)
         return jsonify({'success': True, 'id': sim.id, 'pdf_url': f'/api/simulations/{sim.id}/pdf'})
@@ -202,51 +395,516 @@ def simulations():
 @app.route('/api/simulations/<sim_id>/pdf')
 @login_required
 def download_pdf(sim_id):
-    sim = Simulation.query.get(sim_id)
-    if not sim or sim.user_id != current_user.id:
+    sim = find_simulation(sim_id, current_user.id)
+    if not sim:
         return "Non trouvé", 404
-    pdf_path = f"reports/sim_{sim_id}.pdf"
+    pdf_path = os.path.join(app.config['REPORTS_DIR'], f"sim_{sim_id}.pdf")
     if not os.path.exists(pdf_path):
         return "PDF non généré", 404
-    return send_file(pdf_path, as_attachment=True, download_name=f"rapport_{sim.name}.pdf")
+    # Chemin absolu: send_file résout les chemins relatifs depuis la racine de l'application, pas le cwd
+    return send_file(os.path.abspath(pdf_path), as_attachment=True, download_name=f"rapport_{sim['name']}.pdf")
+
+@app.route('/api/simulations/analytics')
+@login_required
+def simulations_analytics():
+    """Agrégats mensuels par type (base + archive), filtres poussés jusque dans les fichiers archivés"""
+    try:
+        start = datetime.fromisoformat(request.args['start']) if request.args.get('start') else None
+        end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else None
+    except ValueError:
+        return jsonify({'error': 'Date invalide (format ISO attendu)'}), 400
+    sim_type = request.args.get('type')
+    portfolio_id = request.args.get('portfolio_id')
+    columns = ['type', 'created_at', *SimulationArchive.METRIC_COLUMNS]
+
+    with metrics.span('archive_read'):
+        archived = simulation_archive.query(columns, user_id=current_user.id, sim_type=sim_type,
+                                            portfolio_id=portfolio_id, start=start, end=end)
+
+    rows = []
+    for s in recent_simulations(current_user.id, sim_type, portfolio_id, start, end).all():
+        results = json.loads(s.results) if s.results else {}
+        rows.append((s.type, s.created_at, *(SimulationArchive.metric(results, c)
+                                             for c in SimulationArchive.METRIC_COLUMNS)))
+
+    frame = pd.concat([archived, pd.DataFrame(rows, columns=columns)], ignore_index=True)
+    if frame.empty:
+        return jsonify([])
+    frame['month'] = pd.to_datetime(frame['created_at']).dt.strftime('%Y-%m')
+    summary = frame.groupby(['month', 'type']).agg(
+        count=('type', 'size'), avg_var=('var', 'mean'), max_var=('var', 'max'),
+        avg_cvar=('cvar', 'mean'), avg_stress_loss=('total_loss', 'mean')
+    ).reset_index()
+    summary = summary.astype(object).where(summary.notna(), None)
+    return jsonify(summary.to_dict(orient='records'))
+
+def recent_simulations(user_id, sim_type=None, portfolio_id=None, start=None, end=None):
+    """Simulations encore en base (postérieures au filigrane de l'archive), filtrées"""
+    query = Simulation.query.filter_by(user_id=user_id)
+    watermark = simulation_archive.watermark
+    if watermark is not None:
+        query = query.filter(Simulation.created_at >= watermark)
+    if sim_type:
+        query = query.filter(Simulation.type == sim_type)
+    if portfolio_id:
+        query = query.filter(Simulation.portfolio_id == portfolio_id)
+    if start:
+        query = query.filter(Simulation.created_at >= start)
+    if end:
+        query = query.filter(Simulation.created_at < end)
+    return query
+
+def find_simulation(sim_id, user_id):
+    """Simulation de l'utilisateur, en base ou dans l'archive: (nom, type, paramètres, résultats, portefeuille)"""
+    sim = Simulation.query.get(sim_id)
+    if sim:
+        if sim.user_id != user_id:
+            return None
+        return {'name': sim.name, 'type': sim.type, 'parameters': json.loads(sim.parameters or '{}'),
+                'results': json.loads(sim.results or '{}'), 'portfolio_id': sim.portfolio_id}
+    return simulation_archive.record(sim_id, user_id)
+
+# === EXPORTS ===
+SIMULATION_EXPORT_COLUMNS = [
+    ('id', 'string'), ('name', 'string'), ('type', 'string'), ('portfolio_id', 'string'),
+    ('created_at', 'timestamp'), ('var', 'float'), ('cvar', 'float'), ('total_loss', 'float'),
+    ('parameters', 'string'), ('results', 'string')
+]
+STRESS_EXPORT_COLUMNS = [
+    ('simulation_id', 'string'), ('created_at', 'timestamp'), ('portfolio_id', 'string'), ('asset_id', 'string'),
+    ('symbol', 'string'), ('asset_type', 'string'), ('current_value', 'float'), ('shock', 'float'), ('loss', 'float')
+]
+LOSS_EXPORT_COLUMNS = [('scenario', 'int'), ('return', 'float'), ('pnl', 'float'), ('loss', 'float'), ('weight', 'float')]
+
+def export_filters():
+    """Filtres communs des exports: portefeuille, type, intervalle de dates [start, end)"""
+    try:
+        start = datetime.fromisoformat(request.args['start']) if request.args.get('start') else None
+        end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else None
+    except ValueError:
+        raise ValueError('Date invalide (format ISO attendu)')
+    return {'sim_type': request.args.get('type'), 'portfolio_id': request.args.get('portfolio_id'),
+            'start': start, 'end': end}
+
+def export_response(columns, rows, filename, dataset=None, headers=None):
+    exporter = StreamingExporter(request.args.get('format', 'csv'), columns)
+    # Libellé borné (jamais un identifiant de simulation): une série Prometheus par jeu de données
+    metrics.increment('exports_total', dataset=dataset or filename, format=exporter.format)
+    response = Response(stream_with_context(exporter.stream(rows)), mimetype=exporter.mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}.{exporter.format}"'
+    response.headers.update(headers or {})
+    return response
+
+def iter_simulations(user_id, columns, sim_type=None, portfolio_id=None, start=None, end=None):
+    """Simulations archivées puis récentes, par ordre chronologique, sans tout charger en mémoire"""
+    for frame in simulation_archive.iter_query(columns, user_id=user_id, sim_type=sim_type,
+                                               portfolio_id=portfolio_id, start=start, end=end):
+        yield from frame.itertuples(index=False)
+    query = recent_simulations(user_id, sim_type, portfolio_id, start, end).order_by(Simulation.created_at)
+    for s in query.yield_per(1000):
+        results = json.loads(s.results) if s.results else {}
+        values = {'id': s.id, 'name': s.name, 'type': s.type, 'portfolio_id': s.portfolio_id,
+                  'created_at': s.created_at, 'parameters': s.parameters or '', 'results': s.results or '',
+                  **{c: SimulationArchive.metric(results, c) for c in SimulationArchive.METRIC_COLUMNS}}
+        yield SimpleNamespace(**{c: values[c] for c in columns})
+
+@app.route('/api/exports/simulations')
+@login_required
+def export_simulations():
+    try:
+        filters = export_filters()
+        columns = [name for name, _ in SIMULATION_EXPORT_COLUMNS]
+        rows = (tuple(getattr(sim, c) for c in columns)
+                for sim in iter_simulations(current_user.id, columns, **filters))
+        return export_response(SIMULATION_EXPORT_COLUMNS, rows, 'simulations')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/exports/stress-breakdown')
+@login_required
+def export_stress_breakdown():
+    """Pertes par actif de chaque stress test, telles qu'enregistrées lors de la simulation
+
+    Les stress tests antérieurs à l'enregistrement du détail par actif sont omis: les recalculer sur les
+    positions actuelles ne redonnerait pas la perte totale enregistrée.
+    """
+    try:
+        filters = dict(export_filters(), sim_type='stress_test')
+        user_id = current_user.id
+
+        def rows():
+            columns = ['id', 'created_at', 'portfolio_id', 'results']
+            for sim in iter_simulations(user_id, columns, **filters):
+                detail = (json.loads(sim.results) if sim.results else {}).get('breakdown')
+                if not detail:
+                    continue
+                for asset_id, symbol, asset_type, value, shock in zip(
+                        detail['asset_id'], detail['symbol'], detail['asset_type'], detail['value'], detail['shock']):
+                    yield (sim.id, sim.created_at, sim.portfolio_id, asset_id, symbol, asset_type,
+                           value, shock, value * abs(shock))
+
+        return export_response(STRESS_EXPORT_COLUMNS, rows(), 'stress_breakdown')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/exports/simulations/<sim_id>/losses')
+@login_required
+def export_loss_vector(sim_id):
+    """Vecteur des P&L par scénario d'une simulation VaR
+
+    Les scénarios ne sont pas stockés: ils sont recalculés sur les positions et historiques actuels.
+    L'export est étiqueté comme tel (nom de fichier, en-têtes) et peut différer de la VaR enregistrée.
+    Une simulation option_var sans graine n'est pas reproductible et est refusée.
+    """
+    sim = find_simulation(sim_id, current_user.id)
+    if not sim:
+        return jsonify({'error': 'Simulation non trouvée'}), 404
+    if sim['type'] not in ('var', 'option_var'):
+        return jsonify({'error': 'Vecteur de pertes disponible pour les simulations var et option_var'}), 400
+    if sim['type'] == 'option_var' and sim['parameters'].get('seed') is None:
+        return jsonify({'error': 'Simulation non reproductible (aucune graine enregistrée): relancer avec "seed"'}), 409
+    portfolio = Portfolio.query.get(sim['portfolio_id'])
+    if not portfolio or not portfolio.assets:
+        return jsonify({'error': 'Portfolio non trouvé'}), 404
+    try:
+        rows = loss_vector_rows(portfolio, sim['type'], sim['parameters'])
+        headers = {'X-Data-Source': 'recomputed', 'X-Stored-VaR': str(sim['results'].get('var', ''))}
+        return export_response(LOSS_EXPORT_COLUMNS, rows, f'losses_{sim_id}_recomputed', dataset='losses',
+                               headers=headers)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+def loss_vector_rows(portfolio, sim_type, params, chunk_size=10_000):
+    horizon = int(params.get('time_horizon', 1))
+    if sim_type == 'var' and params.get('method') == 'factor':
+        raise ValueError("VaR factorielle paramétrique: aucun vecteur de scénarios à exporter")
+    if sim_type == 'var':
+        values = [a.current_value for a in portfolio.assets]
+        returns = [fetch_returns(asset.symbol) for asset in portfolio.assets]
+        scenarios, weights = HistoricalSimulationEngine(method=params.get('method', 'historical')).scenarios(
+            align_portfolio_returns(values, returns), horizon)
+        total_value = sum(values)
+
+        def rows():
+            for i, r in enumerate(scenarios):
+                pnl = float(r) * total_value
+                yield (i, float(r), pnl, -pnl, float(weights[i]) if weights is not None else np.nan)
+        return rows()
+
+    # option_var: scénarios simulés par blocs, jamais matérialisés en entier
+    method = params.get('method', 'delta_gamma')
+    if method not in ('delta_gamma', 'full_revaluation'):
+        raise ValueError(f"Méthode inconnue: {method}")
+    n_scenarios = int(params.get('n_scenarios', 10000))
+    engine = build_option_engine(portfolio, seed=params.get('seed'))
+    current_value = float(engine.book.values(engine.spots) @ engine.book.quantity)
+
+    def rows():
+        for start in range(0, n_scenarios, chunk_size):
+            log_returns = engine.simulate_log_returns(min(chunk_size, n_scenarios - start), horizon)
+            if method == 'delta_gamma':
+                pnl = engine.delta_gamma_pnl(log_returns, horizon)
+            else:
+                pnl = engine.full_revaluation_pnl(log_returns, horizon)
+            for i, p in enumerate(pnl, start):
+                yield (i, float(p) / current_value if current_value else np.nan, float(p), -float(p), np.nan)
+    return rows()
+
+# === ASSURANCE VIE ===
+@app.route('/api/actuarial/premium', methods=['POST'])
+@login_required
+def actuarial_premium():
+    data = request.get_json()
+    try:
+        params = dict(
+            table=data.get('table', 'TH00-02'), rate=float(data.get('rate', 0.02)),
+            deferments=[int(data.get('deferment', 0))], payment_years=[int(data.get('payment_years', 0))]
+        )
+        with metrics.span('risk_kernel', kernel='actuarial_premium'):
+            result = actuarial_service.price_batch(
+                data['product'], [int(data['age'])], [int(data.get('duration', 0))],
+                [float(data.get('capital', 1.0))], **params
+            )
+    except (KeyError, ValueError) as e:
+        return jsonify({'error': f'Paramètres invalides: {e}'}), 400
+    return jsonify({
+        'product': data['product'],
+        'single_premium': round(float(result['single_premium'][0]), 2),
+        'periodic_premium': round(float(result['periodic_premium'][0]), 2),
+        'table': result['table'], 'table_source': result['table_source'],
+        'technical_rate': result['technical_rate']
+    })
 
 # === CALCULS ===
+def fetch_returns(symbol):
+    try:
+        with metrics.span('data_fetch'):
+            data = yf.download(symbol, period="2y", progress=False)['Adj Close']
+        ret = data.pct_change().dropna().tail(504)
+        # Index de dates conservé: les séries sont alignées sur les jours de cotation communs
+        ret = ret.iloc[:, 0] if isinstance(ret, pd.DataFrame) else ret
+        if len(ret) < 100:
+            metrics.fallback('fetch_returns.short_history')
+            ret = simulated_returns()
+    except Exception as e:
+        logger.warning(f"Historique indisponible pour {symbol}, rendements simulés: {e}")
+        metrics.fallback('fetch_returns.download_error')
+        ret = simulated_returns()
+    return ret
+
+def simulated_returns(days=252):
+    return pd.Series(np.random.normal(0, 0.02, days),
+                     index=pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=days))
+
 def calculate_var(portfolio, params):
+    if portfolio.calculate_value() == 0: return {'var': 0, 'cvar': 0}
+    if params.get('method') == 'factor':
+        return factor_var(portfolio, params)
+    returns = [fetch_returns(asset.symbol) for asset in portfolio.assets]
+    return compute_var(portfolio, returns, params)
+
+def compute_var(portfolio, returns, params):
     confidence = params.get('confidence_level', 0.95)
-    horizon = params.get('time_horizon', 1)
+    horizon = int(params.get('time_horizon', 1))
+    method = params.get('method', 'historical')
+    levels = sorted(set(params.get('confidence_levels', [])) | {confidence})
     values = [a.current_value for a in portfolio.assets]
     if sum(values) == 0: return {'var': 0, 'cvar': 0}
+    with metrics.span('return_alignment'):
+        portfolio_returns = align_portfolio_returns(values, returns)
+    engine = HistoricalSimulationEngine(method=method)
+    with metrics.span('risk_kernel', kernel='historical_var'):
+        tail = engine.compute(portfolio_returns, confidence_levels=levels, horizon=horizon)
+    total_value = portfolio.calculate_value()
+    var, cvar = tail[confidence]
+    return {
+        'var': round(abs(var * total_value), 2), 'cvar': round(abs(cvar * total_value), 2),
+        'method': method, 'confidence_level': confidence, 'time_horizon': horizon,
+        'levels': {str(c): {'var': round(abs(v * total_value), 2), 'cvar': round(abs(es * total_value), 2)}
+                   for c, (v, es) in tail.items()}
+    }
+
+factor_model = FactorRiskModel()
+
+def factor_var(portfolio, params):
+    """VaR paramétrique du modèle factoriel (type, secteur, duration): O(N·K), sans historique de marché"""
+    confidence = float(params.get('confidence_level', 0.95))
+    horizon = int(params.get('time_horizon', 1))
+    if not 0 < confidence < 1:
+        raise ValueError("confidence_level doit être strictement compris entre 0 et 1")
+    # Volatilités annuelles du modèle; l'horizon est en jours ouvrés comme pour la VaR historique
+    years = horizon / 252
+    values, exposures, specific_variances = factor_model.exposures_for_portfolio(portfolio)
+    with metrics.span('risk_kernel', kernel='factor_var'):
+        result = factor_model.calculate_var(values, exposures, specific_variances, confidence, years)
+    # ES gaussienne: σ·φ(z)/(1 - c)
+    z_score = stats.norm.ppf(confidence)
+    cvar = values.sum() * result['volatility'] * stats.norm.pdf(z_score) / (1 - confidence) * np.sqrt(years)
+    return {
+        'var': float(result['var']), 'cvar': round(float(abs(cvar)), 2), 'method': 'factor',
+        'confidence_level': confidence, 'time_horizon': horizon, 'volatility': result['volatility'],
+        'factor_contributions': result['factor_contributions'],
+        'specific_contribution': result['specific_contribution']
+    }
+
+def align_returns(returns):
+    """Rendements N×T restreints aux dates communes (séries datées)
+
+    Tableaux sans dates (benchmarks): seul l'historique le plus récent de longueur commune est conservé.
+    """
+    if len(returns) and all(isinstance(r, pd.Series) for r in returns):
+        return pd.concat(returns, axis=1, join='inner', keys=range(len(returns))).to_numpy().T
+    length = min(len(r) for r in returns)
+    return np.vstack([np.asarray(r)[-length:] for r in returns])
+
+def align_portfolio_returns(values, returns):
+    """Rendements du portefeuille pondérés par valeur, sur les dates communes à tous les actifs"""
     weights = np.array(values) / sum(values)
-    returns = []
-    for asset in portfolio.assets:
-        try:
-            data = yf.download(asset.symbol, period="1y", progress=False)['Adj Close']
-            ret = data.pct_change().dropna().tail(252)
-            if len(ret) < 100: ret = np.random.normal(0, 0.02, 252)
-        except: ret = np.random.normal(0, 0.02, 252)
-        returns.append(ret)
-    portfolio_returns = np.average(returns, axis=0, weights=weights)
-    var = np.percentile(portfolio_returns, (1 - confidence) * 100) * portfolio.calculate_value() * np.sqrt(horizon)
-    cvar = portfolio_returns[portfolio_returns <= var].mean() * portfolio.calculate_value() * np.sqrt(horizon)
-    return {'var': round(abs(var), 2), 'cvar': round(abs(cvar), 2)}
-
-def stress_test(portfolio, params):
-    scenario = params.get('scenario', {'equity': -0.3, 'bond': -0.1, 'commodities': -0.2})
+    return np.average(align_returns(returns), axis=0, weights=weights)
+
+def option_var(portfolio, params):
+    confidence = params.get('confidence_level', 0.95)
+    horizon = int(params.get('time_horizon', 1))
+    method = params.get('method', 'delta_gamma')
+    n_scenarios = int(params.get('n_scenarios', 10000))
+    if not portfolio.assets: return {'var': 0, 'cvar': 0}
+
+    compare = parse_flag(params.get('compare'), False)
+    engine = build_option_engine(portfolio, seed=params.get('seed'))
+    with metrics.span('risk_kernel', kernel='option_var'):
+        if compare:
+            report = engine.compare_methods((confidence,), n_scenarios, horizon)
+            tail = {confidence: (report[method]['levels'][confidence]['var'], report[method]['levels'][confidence]['es'])}
+        else:
+            report = None
+            tail = engine.calculate_var(method, (confidence,), n_scenarios, horizon)
+    var, cvar = tail[confidence]
+    results = {'var': round(abs(var), 2), 'cvar': round(abs(cvar), 2), 'method': method,
+               'confidence_level': confidence, 'time_horizon': horizon, 'n_scenarios': n_scenarios}
+    if report:
+        results['comparison'] = {
+            'delta_gamma_seconds': round(report['delta_gamma']['seconds'], 4),
+            'full_revaluation_seconds': round(report['full_revaluation']['seconds'], 4),
+            'speedup': round(report['speedup'], 1) if report['speedup'] else None,
+            'relative_error': round(report['relative_error'][confidence], 4)
+        }
+    return results
+
+def parse_flag(value, default):
+    """Booléen d'un paramètre JSON: true/false, 1/0 ou leurs équivalents texte ("false" n'est pas vrai)"""
+    if value is None:
+        return default
+    if isinstance(value, (bool, int)) and value in (0, 1):
+        return bool(value)
+    text = str(value).strip().lower()
+    if text in ('true', '1', 'yes', 'oui', 'on'):
+        return True
+    if text in ('false', '0', 'no', 'non', 'off', ''):
+        return False
+    raise ValueError(f"Valeur booléenne invalide: {value}")
+
+def credit_var(portfolio, params):
+    """Pertes de défaut corrélées (copule gaussienne), échantillonnage d'importance sur le facteur systémique"""
+    confidence = float(params.get('confidence_level', 0.999))
+    n_scenarios = int(params.get('n_scenarios', 20000))
+    importance_sampling = parse_flag(params.get('importance_sampling'), True)
+    compare = parse_flag(params.get('compare'), False)
+    levels = sorted({confidence, *[float(c) for c in params.get('confidence_levels', [0.99])]})
+    if not all(0 < c < 1 for c in levels):
+        # Φ⁻¹(1) = ∞: le décalage d'échantillonnage et la formule de Vasicek n'ont plus de sens
+        raise ValueError("Les niveaux de confiance doivent être strictement compris entre 0 et 1")
+    if n_scenarios <= 0:
+        raise ValueError("n_scenarios doit être strictement positif")
+    credit_parameters = params.get('credit_parameters')
+    if credit_parameters is not None and not isinstance(credit_parameters, dict):
+        raise ValueError("credit_parameters doit associer un type d'actif à {pd, lgd, correlation}")
+    credit_portfolio = CreditPortfolio.from_assets(portfolio.assets, credit_parameters)
+    if credit_portfolio is None:
+        return {'var': 0, 'cvar': 0, 'expected_loss': 0, 'exposures': 0}
+
+    engine = CreditRiskEngine(credit_portfolio, seed=params.get('seed'))
+    with metrics.span('risk_kernel', kernel='credit_var'):
+        result = engine.calculate(levels, n_scenarios, importance_sampling)
+        report = engine.compare_methods(confidence, n_scenarios) if compare else None
+    level = result['levels'][confidence]
+    results = {
+        'var': round(level['var'], 2), 'cvar': round(level['es'], 2),
+        'expected_loss': round(result['expected_loss'], 2),
+        'unexpected_loss': round(level['unexpected_loss'], 2),
+        'asymptotic_var': round(engine.asymptotic_var(confidence), 2),
+        'method': result['method'], 'confidence_level': confidence, 'n_scenarios': n_scenarios,
+        'tail_scenarios': result['tail_scenarios'], 'exposures': len(credit_portfolio),
+        'levels': {str(c): {'var': round(v['var'], 2), 'cvar': round(v['es'], 2)} for c, v in result['levels'].items()}
+    }
+    if report:
+        results['comparison'] = {
+            'monte_carlo_var_std': round(report['monte_carlo']['var_std'], 2),
+            'importance_sampling_var_std': round(report['importance_sampling']['var_std'], 2),
+            'variance_reduction': round(report['variance_reduction'], 1) if report['variance_reduction'] else None
+        }
+    return results
+
+def build_option_engine(portfolio, seed=None):
+    """Moteur de risque optionnel du portefeuille (sous-jacents, corrélations, volatilités)"""
+    # Sous-jacents: symbole de l'option ou de l'actif linéaire lui-même
+    underlyings = {}
+    for a in portfolio.assets:
+        symbol = a.option.underlying_symbol if a.option else a.symbol
+        spot = a.option.underlying_price if a.option else (a.current_value / a.quantity if a.quantity else a.purchase_price)
+        underlyings.setdefault(symbol, spot)
+    symbols = list(underlyings)
+    index = {s: i for i, s in enumerate(symbols)}
+
+    options = [a.option for a in portfolio.assets]
+    book = OptionBook(
+        quantity=[a.quantity for a in portfolio.assets],
+        underlying_index=[index[o.underlying_symbol if o else a.symbol] for a, o in zip(portfolio.assets, options)],
+        strike=[o.strike if o else 0.0 for o in options],
+        maturity=[o.maturity if o else 0.0 for o in options],
+        volatility=[o.volatility if o else 0.0 for o in options],
+        is_call=[o is not None and o.option_type == 'call' for o in options],
+        is_option=[o is not None for o in options],
+        rate=[o.rate if o and o.rate is not None else 0.02 for o in options]
+    )
+
+    matrix = align_returns([fetch_returns(s) for s in symbols]).T
+    if len(symbols) > 1:
+        covariance, _ = CovarianceService.ledoit_wolf_covariance(matrix)
+    else:
+        covariance = np.atleast_2d(np.var(matrix, axis=0))
+    std = np.sqrt(np.diag(covariance))
+    correlation = covariance / np.outer(std, std)
+    # Volatilité implicite des options quand elle existe, historique sinon
+    implied = {o.underlying_symbol: o.volatility for o in options if o}
+    vols = np.array([implied.get(s, std[i] * np.sqrt(252)) for i, s in enumerate(symbols)])
+    return OptionRiskEngine(book, [underlyings[s] for s in symbols], vols, correlation, seed=seed)
+
+DEFAULT_STRESS_SCENARIO = {'equity': -0.3, 'bond': -0.1, 'commodities': -0.2}
+
+@metrics.timed('risk_kernel', kernel='stress_test')
+def stress_test(portfolio, params, breakdown=False):
+    scenario = params.get('scenario', DEFAULT_STRESS_SCENARIO)
     total_loss = sum(asset.current_value * abs(scenario.get(asset.asset_type, -0.1)) for asset in portfolio.assets)
     total_value = portfolio.calculate_value()
-    return {
+    results = {
         'total_loss': round(total_loss, 2),
         'remaining_value': round(total_value - total_loss, 2),
         'loss_percentage': round((total_loss / total_value) * 100, 2) if total_value > 0 else 0
     }
+    if breakdown:
+        # Détail par actif enregistré avec la simulation (colonnes): l'export ne dépend pas des positions futures
+        assets = portfolio.assets
+        results['breakdown'] = {
+            'asset_id': [a.id for a in assets], 'symbol': [a.symbol for a in assets],
+            'asset_type': [a.asset_type for a in assets], 'value': [a.current_value for a in assets],
+            'shock': [scenario.get(a.asset_type, -0.1) for a in assets]
+        }
+    return results
 
 def backtest(portfolio, params):
-    return {'status': 'Backtest simulé', 'annual_return': '12.5%', 'max_drawdown': '-18.3%'}
+    """Backtest historique: rééquilibrage vers les poids actuels et exceptions de la VaR glissante"""
+    values = [a.current_value for a in portfolio.assets]
+    if not portfolio.assets or sum(values) == 0:
+        return {'status': 'Portefeuille vide'}
+    threshold = float(params.get('rebalance_threshold', 0.05))
+    cost_rate = float(params.get('transaction_cost', 0.001))
+    confidence = float(params.get('confidence_level', 0.99))
+
+    asset_returns = align_returns([fetch_returns(asset.symbol) for asset in portfolio.assets]).T
+    prices = np.vstack([np.ones(len(values)), np.cumprod(1 + asset_returns, axis=0)])
+    total_value = sum(values)
+
+    with metrics.span('risk_kernel', kernel='backtest'):
+        run = risk_kernels.rebalancing_backtest(prices, np.array(values) / total_value, threshold, cost_rate,
+                                                total_value)
+        _, max_drawdown = risk_kernels.drawdowns(run['values'])
+        daily = run['values'][1:] / run['values'][:-1] - 1
+        # VaR historique glissante (fenêtre d'un an au plus) comparée à la perte du lendemain
+        window = min(int(params.get('var_window', 250)), daily.size // 2)
+        var_path = risk_kernels.rolling_tail_quantile(daily[:-1], window, confidence)
+        exceptions = int(np.sum(daily[window:] < var_path))
+
+    years = daily.size / 252
+    annual_return = (run['values'][-1] / run['values'][0]) ** (1 / years) - 1
+    return {
+        'status': 'Backtest historique',
+        'annual_return': f"{annual_return * 100:.1f}%",
+        'max_drawdown': f"{max_drawdown * 100:.1f}%",
+        'volatility': round(float(daily.std(ddof=1) * np.sqrt(252)), 4),
+        'final_value': round(float(run['values'][-1]), 2),
+        'rebalances': run['rebalances'],
+        'turnover': round(run['turnover'], 2),
+        'var_confidence': confidence,
+        'var_exceptions': exceptions,
+        'expected_exceptions': round((1 - confidence) * (daily.size - window), 1),
+        'kernel_backend': risk_kernels.BACKEND
+    }
 
 # === PDF ===
+@metrics.timed('pdf_render')
 def generate_pdf_report(sim, results):
-    os.makedirs('reports', exist_ok=True)
-    path = f"reports/sim_{sim.id}.pdf"
+    os.makedirs(app.config['REPORTS_DIR'], exist_ok=True)
+    path = os.path.join(app.config['REPORTS_DIR'], f"sim_{sim.id}.pdf")
     doc = SimpleDocTemplate(path, pagesize=A4)
     styles = getSampleStyleSheet()
     elements = [
@@ -256,8 +914,9 @@ def generate_pdf_report(sim, results):
         Paragraph(f"Date: {datetime.now().strftime('%d/%m/%Y %H:%M')}", styles['Normal']),
         Spacer(1, 20),
     ]
-    if sim.type == 'var':
-        data = [['Métrique', 'Valeur'], ['VaR (95%)', f"€{results.get('var', 0):,.2f}"], ['CVaR', f"€{results.get('cvar', 0):,.2f}"]]
+    if sim.type in ('var', 'option_var', 'credit_var'):
+        confidence = float(results.get('confidence_level', 0.95))
+        data = [['Métrique', 'Valeur'], [f'VaR ({confidence:.1%})', f"€{results.get('var', 0):,.2f}"], ['CVaR', f"€{results.get('cvar', 0):,.2f}"]]
         table = Table(data)
         table.setStyle(TableStyle([('GRID', (0,0), (-1,-1), 0.5, colors.grey)]))
         elements.append(table)
@@ -265,6 +924,30 @@ def generate_pdf_report(sim, results):
     return path
 
 # === DASHBOARD ===
+def load_dashboard_positions(portfolio_id):
+    with app.app_context():
+        return [{'id': a.id, 'symbol': a.symbol, 'asset_type': a.asset_type, 'quantity': a.quantity,
+                 'value': a.current_value or 0.0}
+                for a in Asset.query.filter_by(portfolio_id=portfolio_id).all()]
+
+covariance_service = CovarianceService()
+metrics.register_gauge('cache_entries', lambda: len(covariance_service), cache='covariance')
+dashboard_hub = DashboardHub(load_dashboard_positions, fetch_returns, covariance_service, aligner=align_returns)
+
+@app.route('/api/dashboard/stream')
+@login_required
+def dashboard_stream():
+    portfolio_id = request.args.get('portfolio_id')
+    if portfolio_id:
+        portfolio = Portfolio.query.get(portfolio_id)
+    else:
+        portfolio = Portfolio.query.filter_by(user_id=current_user.id).first()
+    if not portfolio or portfolio.user_id != current_user.id:
+        return jsonify({'error': 'Portfolio non trouvé'}), 404
+    subscriber = dashboard_hub.subscribe(portfolio.id)
+    return Response(dashboard_hub.stream(portfolio.id, subscriber), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/api/dashboard')
 @login_required
 def dashboard():
@@ -1,9 +1,12 @@
-from flask_login import LoginManager, login_user, logout_user
+from flask_login import LoginManager, login_user, logout_user, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 from models.database import db, User
+from auth.user_cache import UserCache
 import uuid
 
 login_manager = LoginManager()
+user_cache = UserCache(lambda user_id: User.query.get(user_id))
+user_cache.bind_model(User)
 
 class AuthService:
     @staticmethod
@@ -29,14 +32,17 @@ class AuthService:
     def authenticate_user(username, password):
         user = User.query.filter_by(username=username).first()
         if user and check_password_hash(user.password_hash, password):
+            user_cache.put(user)
             return user
         return None
 
     @staticmethod
     def logout_user():
+        if current_user.is_authenticated:
+            user_cache.invalidate(current_user.id)
         logout_user()
 
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(user_id)
\ No newline at end of file
+    return user_cache.get(user_id)
\ No newline at end of file
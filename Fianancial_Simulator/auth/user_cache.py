@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask_login import UserMixin
+
+from utils.metrics import metrics
+
+
+class SessionUser(UserMixin):
+    """Identité authentifiée détachée de la session SQLAlchemy (sans accès base)"""
+
+    def __init__(self, id, username, email):
+        self.id = id
+        self.username = username
+        self.email = email
+
+    @classmethod
+    def from_model(cls, user):
+        return cls(user.id, user.username, user.email)
+
+
+class UserCache:
+    """Cache LRU avec TTL des identités chargées par user_loader"""
+
+    def __init__(self, loader, max_entries=1024, ttl=300, name='session_users'):
+        self.loader = loader  # Fonction user_id -> User (ou None), appelée uniquement en cas d'échec du cache
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.name = name
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        metrics.register_gauge('cache_entries', lambda: len(self._entries), cache=name)
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                identity, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(user_id)
+                    metrics.increment('cache_requests_total', cache=self.name, result='hit')
+                    return identity
+                del self._entries[user_id]
+                metrics.increment('cache_evictions_total', cache=self.name, reason='expired')
+
+        metrics.increment('cache_requests_total', cache=self.name, result='miss')
+        user = self.loader(user_id)
+        if user is None:
+            return None
+        return self.put(user)
+
+    def put(self, user):
+        """Enregistre l'identité (après connexion ou chargement) et la retourne"""
+        identity = SessionUser.from_model(user)
+        with self._lock:
+            self._entries[identity.id] = (identity, time.monotonic() + self.ttl)
+            self._entries.move_to_end(identity.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                metrics.increment('cache_evictions_total', cache=self.name, reason='capacity')
+        return identity
+
+    def invalidate(self, user_id):
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                metrics.increment('cache_evictions_total', cache=self.name, reason='invalidated')
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def bind_model(self, model):
+        """Invalide automatiquement l'entrée lorsqu'un utilisateur est modifié ou supprimé"""
+        from sqlalchemy import event
+
+        def _invalidate(mapper, connection, target):
+            self.invalidate(target.id)
+
+        event.listen(model, 'after_update', _invalidate)
+        event.listen(model, 'after_delete', _invalidate)
@@ -0,0 +1,127 @@
+"""Parité et vitesse des noyaux de risque: implémentation compilée (Numba) contre NumPy.
+
+Sans Numba, les noyaux « jit » s'exécutent en Python pur: la parité reste vérifiée,
+mais sur des tailles réduites (--small). Les mêmes vérifications tournent sous pytest
+(tests/test_risk_kernels.py).
+
+Usage (depuis Fianancial_Simulator/):
+    python -m benchmarks.kernel_parity
+    python -m benchmarks.kernel_parity --small --output parity.json
+    python -m benchmarks.kernel_parity --small --require-numba   # CI: échoue si Numba est absent
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from services import risk_kernels
+from services.option_pricing import OptionBook, OptionRiskEngine
+
+# Écart relatif toléré: seuls l'ordre des sommations et ndtr/erfc diffèrent entre les deux chemins
+TOLERANCE = 1e-10
+
+
+def _timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def _relative_error(a, b):
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    scale = max(float(np.max(np.abs(b), initial=0.0)), 1e-300)
+    return float(np.max(np.abs(a - b), initial=0.0)) / scale
+
+
+def parity_cases(small=False, seed=0):
+    """Entrées synthétiques de chaque noyau: nom -> fonction(backend) -> tableau(x) comparables"""
+    rng = np.random.default_rng(seed)
+    n_days = 2_000 if small else 50_000
+    n_assets = 20 if small else 200
+    n_scenarios = 500 if small else 100_000
+    n_positions = 50 if small else 2_000
+
+    returns = rng.standard_t(4, n_days) * 0.01
+    # Rendements arrondis: teste aussi les ex-æquo dans la fenêtre triée
+    rounded_returns = np.round(returns, 3)
+    values = 1e6 * np.cumprod(1 + returns)
+    prices = np.cumprod(1 + rng.standard_normal((n_days, n_assets)) * 0.01, axis=0)
+    weights = np.full(n_assets, 1 / n_assets)
+
+    n_underlyings = 10
+    is_option = rng.random(n_positions) < 0.8
+    book = OptionBook(
+        quantity=rng.integers(-50, 50, n_positions), underlying_index=rng.integers(0, n_underlyings, n_positions),
+        strike=rng.uniform(80, 120, n_positions), maturity=rng.uniform(0.05, 2, n_positions),
+        volatility=rng.uniform(0.1, 0.5, n_positions), is_call=rng.random(n_positions) < 0.5, is_option=is_option
+    )
+    engine = OptionRiskEngine(book, np.full(n_underlyings, 100.0), np.full(n_underlyings, 0.25), seed=seed)
+    log_returns = engine.simulate_log_returns(n_scenarios, horizon_days=10)
+
+    return {
+        'drawdowns': lambda backend: risk_kernels.drawdowns(values, backend=backend)[0],
+        'rolling_tail_quantile': lambda backend: risk_kernels.rolling_tail_quantile(returns, 250, 0.99, backend),
+        'rolling_tail_quantile_ties': lambda backend: risk_kernels.rolling_tail_quantile(rounded_returns, 250, 0.975,
+                                                                                         backend),
+        'rebalancing_backtest': lambda backend: risk_kernels.rebalancing_backtest(
+            prices, weights, 0.02, 0.001, 1e6, backend)['values'],
+        'revalue_scenarios': lambda backend: risk_kernels.revalue_scenarios(
+            book, engine.spots, log_returns, 10 / 252, backend=backend),
+    }
+
+
+def run_parity(small=False, seed=0):
+    """Exécute chaque noyau sur les deux chemins; ok=False si l'écart dépasse la tolérance"""
+    report = {'backend': risk_kernels.BACKEND, 'numba': risk_kernels.njit is not None, 'kernels': {}}
+    for name, kernel in parity_cases(small, seed).items():
+        # Premier appel hors chronométrage: compilation ou chargement depuis le cache disque
+        kernel('jit')
+        jit_result, jit_seconds = _timed(lambda: kernel('jit'))
+        numpy_result, numpy_seconds = _timed(lambda: kernel('numpy'))
+        error = _relative_error(jit_result, numpy_result)
+        report['kernels'][name] = {
+            'ok': error <= TOLERANCE,
+            'identical': bool(np.array_equal(jit_result, numpy_result)),
+            'relative_error': error,
+            'jit_seconds': round(jit_seconds, 6),
+            'numpy_seconds': round(numpy_seconds, 6),
+            'speedup': round(numpy_seconds / jit_seconds, 2) if jit_seconds > 0 else None
+        }
+    report['ok'] = all(k['ok'] for k in report['kernels'].values())
+    return report
+
+
+def assert_parity(report, require_numba=False):
+    """Lève AssertionError si un noyau s'écarte de NumPy (ou si Numba est exigé mais absent)"""
+    if require_numba and not report['numba']:
+        raise AssertionError("Numba requis mais non installé: seul le chemin Python pur a été comparé")
+    failures = {name: k['relative_error'] for name, k in report['kernels'].items() if not k['ok']}
+    if failures:
+        raise AssertionError(f"Écart jit/NumPy au-delà de {TOLERANCE:g}: {failures}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Parité des noyaux de risque FinRisk (Numba / NumPy)')
+    parser.add_argument('--small', action='store_true', help='Tailles réduites (par défaut sans Numba)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='', help='Fichier JSON pour les résultats')
+    parser.add_argument('--require-numba', action='store_true', help='Échoue si Numba est absent')
+    args = parser.parse_args(argv)
+
+    report = run_parity(small=args.small or risk_kernels.njit is None, seed=args.seed)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    try:
+        assert_parity(report, args.require_numba)
+    except AssertionError as e:
+        print(f"ÉCHEC: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
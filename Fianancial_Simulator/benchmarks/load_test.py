@@ -0,0 +1,325 @@
+"""Test de charge de bout en bout de l'API FinRisk.
+
+Démarre l'application (serveur HTTP local, multi-thread) sur une base SQLite temporaire
+pré-remplie, avec un fournisseur d'historiques local à la place de yfinance, puis envoie un
+trafic mixte (connexion, tableau de bord, portefeuilles, VaR, stress test, PDF).
+Rapporte p50/p95/p99 et débit par endpoint et enregistre les résultats en JSON.
+
+Usage (depuis Fianancial_Simulator/):
+    python -m benchmarks.load_test --users 20 --duration 60
+    python -m benchmarks.load_test --users 50 --duration 30 --mix dashboard=50,var=50
+    python -m benchmarks.load_test --compare benchmarks/results/load_<version>.json
+"""
+import argparse
+import http.cookiejar
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import zlib
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+DEFAULT_MIX = {'login': 5, 'dashboard': 25, 'portfolios': 25, 'var': 15, 'stress_test': 20, 'pdf': 10}
+PASSWORD = 'load-test-123'
+
+
+class StubMarketData:
+    """Fournisseur d'historiques local (interface yf.download): prix reproductibles par symbole"""
+
+    def __init__(self, days=504, latency=0.0, seed=0):
+        self.days = days
+        self.latency = latency
+        self.seed = seed
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def download(self, symbol, period='2y', progress=False, **kwargs):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        rng = np.random.default_rng([self.seed, zlib.crc32(symbol.encode())])
+        prices = 100 * np.cumprod(1 + rng.standard_t(5, self.days + 1) * 0.01)
+        index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=prices.size)
+        return pd.DataFrame({'Adj Close': prices, 'Close': prices}, index=index)
+
+
+def seed_database(finrisk, n_users, assets_per_portfolio, universe=100, seed=0):
+    """Utilisateurs load0..loadN, chacun avec un portefeuille synthétique; retourne [(nom, portfolio_id)]"""
+    from benchmarks import synthetic
+    from werkzeug.security import generate_password_hash
+
+    password_hash = generate_password_hash(PASSWORD)
+    rng = np.random.default_rng(seed)
+    # Symboles distincts par portefeuille: l'univers doit contenir au moins autant de symboles que d'actifs
+    universe = max(universe, assets_per_portfolio)
+    accounts = []
+    with finrisk.app.app_context():
+        finrisk.db.create_all()
+        for i in range(n_users):
+            user = finrisk.User(username=f'load{i}', email=f'load{i}@finrisk.test', password_hash=password_hash)
+            finrisk.db.session.add(user)
+            finrisk.db.session.flush()
+            portfolio = finrisk.Portfolio(name=f'Portefeuille load{i}', user_id=user.id)
+            finrisk.db.session.add(portfolio)
+            finrisk.db.session.flush()
+            types, _, quantities, prices = synthetic.generate_portfolio_arrays(assets_per_portfolio, seed + i)
+            for j, symbol_index in enumerate(rng.choice(universe, size=assets_per_portfolio, replace=False)):
+                asset = finrisk.Asset(
+                    name=f'Actif {symbol_index}', symbol=f'SYN{symbol_index}', asset_type=str(types[j]),
+                    quantity=float(quantities[j]), purchase_price=float(prices[j]), portfolio_id=portfolio.id
+                )
+                asset.current_value = asset.quantity * asset.purchase_price
+                finrisk.db.session.add(asset)
+            accounts.append((user.username, portfolio.id))
+        finrisk.db.session.commit()
+    return accounts
+
+
+class VirtualUser:
+    """Client HTTP avec sa propre session (cookies), qui enchaîne des actions tirées selon le mix"""
+
+    def __init__(self, base_url, username, portfolio_id, mix, seed):
+        self.base_url = base_url
+        self.username = username
+        self.portfolio_id = portfolio_id
+        self.actions, self.weights = zip(*mix.items())
+        self.rng = random.Random(seed)
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        self.simulation_ids = []
+        self.samples = []  # (action, secondes, statut)
+
+    def request(self, method, path, payload=None):
+        data = json.dumps(payload).encode() if payload is not None else None
+        headers = {'Content-Type': 'application/json'} if data is not None else {}
+        request = urllib.request.Request(self.base_url + path, data=data, method=method, headers=headers)
+        try:
+            with self.opener.open(request, timeout=120) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+        except (urllib.error.URLError, OSError):
+            return 0, b''
+
+    def perform(self, action):
+        if action == 'pdf' and not self.simulation_ids:
+            action = 'stress_test'
+        start = time.perf_counter()
+        if action == 'login':
+            status, _ = self.request('POST', '/login', {'username': self.username, 'password': PASSWORD})
+        elif action == 'dashboard':
+            status, _ = self.request('GET', '/api/dashboard')
+        elif action == 'portfolios':
+            status, _ = self.request('GET', '/api/portfolios')
+        elif action in ('var', 'stress_test'):
+            parameters = {'confidence_level': 0.95} if action == 'var' else {}
+            status, body = self.request('POST', '/api/simulations', {
+                'name': f'{action} {self.username}', 'type': action,
+                'portfolio_id': self.portfolio_id, 'parameters': parameters
+            })
+            if status == 200:
+                self.simulation_ids.append(json.loads(body)['id'])
+        elif action == 'pdf':
+            status, _ = self.request('GET', f'/api/simulations/{self.rng.choice(self.simulation_ids)}/pdf')
+        else:
+            raise ValueError(f"Action inconnue: {action}")
+        self.samples.append((action, time.perf_counter() - start, status))
+
+    def run(self, deadline, max_requests, think_time):
+        self.perform('login')
+        count = 1
+        while time.perf_counter() < deadline and (not max_requests or count < max_requests):
+            self.perform(self.rng.choices(self.actions, self.weights)[0])
+            count += 1
+            if think_time:
+                time.sleep(think_time)
+
+
+def summarize(samples, elapsed):
+    """Latences (ms) et débit par endpoint, plus le total"""
+    groups = {}
+    for action, seconds, status in samples:
+        groups.setdefault(action, []).append((seconds, status))
+    groups['total'] = [(seconds, status) for _, seconds, status in samples]
+
+    report = {}
+    for action, values in sorted(groups.items()):
+        latencies = np.array([seconds for seconds, _ in values]) * 1000
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        report[action] = {
+            'requests': len(values),
+            'errors': sum(1 for _, status in values if status != 200),
+            'p50_ms': round(float(p50), 2),
+            'p95_ms': round(float(p95), 2),
+            'p99_ms': round(float(p99), 2),
+            'mean_ms': round(float(latencies.mean()), 2),
+            'max_ms': round(float(latencies.max()), 2),
+            'throughput_rps': round(len(values) / elapsed, 2)
+        }
+    return report
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=APP_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def parse_mix(text):
+    if not text:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for item in text.split(','):
+        name, _, weight = item.partition('=')
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Action inconnue dans le mix: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def run_load_test(users=10, duration=30.0, max_requests=0, mix=None, assets=20, ramp_up=0.0, think_time=0.0,
+                  quote_latency=0.0, seed=0):
+    """Démarre l'application sur une base temporaire et exécute la charge; retourne le rapport"""
+    workdir = tempfile.mkdtemp(prefix='finrisk-load-')
+    os.environ['FINRISK_DATABASE_URI'] = f"sqlite:///{os.path.join(workdir, 'load.db')}"
+    os.environ['FINRISK_ARCHIVE_DIR'] = os.path.join(workdir, 'archive')
+    # Rapports PDF écrits dans le répertoire temporaire, pas dans le dépôt. Pas de chdir: les chemins
+    # relatifs de --compare et --output restent ceux de l'appelant
+    os.environ['FINRISK_REPORTS_DIR'] = os.path.join(workdir, 'reports')
+    if APP_DIR not in sys.path:
+        sys.path.insert(0, APP_DIR)
+
+    import app as finrisk
+    from werkzeug.serving import make_server
+
+    # Pas une ligne de journal par requête pendant la mesure
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    market_data = StubMarketData(latency=quote_latency, seed=seed)
+    finrisk.yf = market_data
+    accounts = seed_database(finrisk, users, assets, seed=seed)
+
+    server = make_server('127.0.0.1', 0, finrisk.app, threaded=True)
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+
+    mix = mix or dict(DEFAULT_MIX)
+    clients = [VirtualUser(base_url, username, portfolio_id, mix, seed + i)
+               for i, (username, portfolio_id) in enumerate(accounts)]
+    start = time.perf_counter()
+    deadline = start + duration if duration else float('inf')
+    threads = []
+    for i, client in enumerate(clients):
+        thread = threading.Thread(target=client.run, args=(deadline, max_requests, think_time))
+        thread.start()
+        threads.append(thread)
+        if ramp_up:
+            time.sleep(ramp_up / len(clients))
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    return {
+        'version': git_revision(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'config': {
+            'users': users, 'duration_s': duration, 'max_requests_per_user': max_requests, 'mix': mix,
+            'assets_per_portfolio': assets, 'ramp_up_s': ramp_up, 'think_time_s': think_time,
+            'quote_latency_s': quote_latency, 'seed': seed
+        },
+        'elapsed_s': round(elapsed, 2),
+        'market_data_calls': market_data.calls,
+        'endpoints': summarize([s for client in clients for s in client.samples], elapsed)
+    }
+
+
+def compare(report, baseline):
+    """Écarts relatifs de p95 et de débit par endpoint par rapport à un rapport précédent"""
+    rows = {}
+    for action, current in report['endpoints'].items():
+        previous = baseline['endpoints'].get(action)
+        if not previous:
+            continue
+        rows[action] = {
+            'p95_change_pct': round((current['p95_ms'] / previous['p95_ms'] - 1) * 100, 1)
+            if previous['p95_ms'] else None,
+            'throughput_change_pct': round((current['throughput_rps'] / previous['throughput_rps'] - 1) * 100, 1)
+            if previous['throughput_rps'] else None
+        }
+    return {'baseline_version': baseline.get('version'), 'baseline_timestamp': baseline.get('timestamp'),
+            'endpoints': rows}
+
+
+def print_report(report):
+    print(f"Version {report['version']} - {report['config']['users']} utilisateurs, {report['elapsed_s']} s")
+    print(f"{'endpoint':<12}{'req':>8}{'err':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}")
+    for action, row in report['endpoints'].items():
+        print(f"{action:<12}{row['requests']:>8}{row['errors']:>6}{row['p50_ms']:>10}{row['p95_ms']:>10}"
+              f"{row['p99_ms']:>10}{row['throughput_rps']:>9}")
+    if 'comparison' in report:
+        print(f"\nComparaison avec {report['comparison']['baseline_version']}:")
+        for action, row in report['comparison']['endpoints'].items():
+            print(f"  {action:<12} p95 {_format_change(row['p95_change_pct'])}  "
+                  f"débit {_format_change(row['throughput_change_pct'])}")
+
+
+def _format_change(change):
+    # None: la référence est nulle pour cet endpoint, aucun écart relatif calculable
+    return 'n/a' if change is None else f"{change:+}%"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Test de charge de bout en bout FinRisk')
+    parser.add_argument('--users', type=int, default=10, help='Utilisateurs simultanés')
+    parser.add_argument('--duration', type=float, default=30.0, help='Durée en secondes (0: illimitée)')
+    parser.add_argument('--requests', type=int, default=0, help='Requêtes maximum par utilisateur (0: illimité)')
+    parser.add_argument('--mix', default='', help='Pondérations, ex. login=5,dashboard=25,var=15,pdf=10')
+    parser.add_argument('--assets', type=int, default=20, help='Actifs par portefeuille')
+    parser.add_argument('--ramp-up', type=float, default=0.0, help='Démarrage étalé des utilisateurs (s)')
+    parser.add_argument('--think-time', type=float, default=0.0, help='Pause entre deux requêtes (s)')
+    parser.add_argument('--quote-latency', type=float, default=0.0, help='Latence simulée du fournisseur (s)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='', help='Fichier JSON (défaut: benchmarks/results/load_<version>_<date>.json)')
+    parser.add_argument('--compare', default='', help='Rapport précédent à comparer')
+    args = parser.parse_args(argv)
+    if not args.duration and not args.requests:
+        parser.error('--duration 0 exige --requests')
+
+    report = run_load_test(
+        users=args.users, duration=args.duration, max_requests=args.requests, mix=parse_mix(args.mix),
+        assets=args.assets, ramp_up=args.ramp_up, think_time=args.think_time,
+        quote_latency=args.quote_latency, seed=args.seed
+    )
+    if args.compare:
+        with open(args.compare) as f:
+            report['comparison'] = compare(report, json.load(f))
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"load_{report['version']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print_report(report)
+    print(f"\nRésultats enregistrés dans {output}")
+    errors = report['endpoints']['total']['errors']
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
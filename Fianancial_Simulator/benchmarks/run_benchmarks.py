@@ -0,0 +1,324 @@
+"""Benchmarks des chemins de calcul de risque et de génération PDF.
+
+Usage (depuis Fianancial_Simulator/):
+    python -m benchmarks.run_benchmarks --sizes 10,1000 --cases var,stress_test
+    python -m benchmarks.run_benchmarks --update-baseline
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks import synthetic
+
+DEFAULT_SIZES = (10, 1_000, 100_000, 1_000_000)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+class BenchmarkCase:
+    """Un chemin de calcul mesuré: setup(size, context) prépare les entrées, run(inputs) est chronométré"""
+
+    def __init__(self, name, setup, run, max_assets=None, unit='assets'):
+        self.name = name
+        self.setup = setup
+        self.run = run
+        self.max_assets = max_assets
+        self.unit = unit
+
+
+class BenchmarkContext:
+    """Données synthétiques partagées entre les cas pour une même taille"""
+
+    def __init__(self, size, seed=0):
+        self.size = size
+        self.seed = seed
+        self._portfolio = None
+        self._arrays = None
+        self._returns = None
+        self.workdir = tempfile.mkdtemp(prefix='finrisk-bench-')
+
+    @property
+    def portfolio(self):
+        if self._portfolio is None:
+            self._portfolio = synthetic.generate_portfolio(self.size, self.seed)
+        return self._portfolio
+
+    @property
+    def arrays(self):
+        if self._arrays is None:
+            self._arrays = synthetic.generate_portfolio_arrays(self.size, self.seed)
+        return self._arrays
+
+    @property
+    def returns(self):
+        if self._returns is None:
+            self._returns = synthetic.generate_returns([a.asset_type for a in self.portfolio.assets], 252, self.seed)
+        return self._returns
+
+
+# === CAS DE BENCHMARK ===
+def _setup_app_var(size, context):
+    import app
+    return app, context.portfolio, context.returns
+
+def _run_app_var(inputs):
+    app, portfolio, returns = inputs
+    return app.compute_var(portfolio, returns, {'confidence_level': 0.95, 'confidence_levels': [0.99]})
+
+def _setup_app_stress(size, context):
+    import app
+    return app, context.portfolio
+
+def _run_app_stress(inputs):
+    app, portfolio = inputs
+    return app.stress_test(portfolio, {'scenario': {'equity': -0.3, 'bond': -0.1, 'commodities': -0.2}})
+
+def _setup_calculator(size, context):
+    from services.risk_calculator import AdvancedRiskCalculator
+    from services.data_service import DataService
+    return AdvancedRiskCalculator(DataService()), context.portfolio
+
+def _run_calculator_var(inputs):
+    calculator, portfolio = inputs
+    return calculator.calculate_var(portfolio, 0.99)
+
+def _run_calculator_stress(inputs):
+    calculator, portfolio = inputs
+    return calculator.stress_test(portfolio, synthetic.SyntheticScenario())
+
+def _run_calculator_solvency(inputs):
+    calculator, portfolio = inputs
+    return calculator.calculate_solvency_ii(portfolio)
+
+def _setup_factor_var(size, context):
+    from services.factor_model import FactorRiskModel
+    types, sectors, quantities, prices = context.arrays
+    model = FactorRiskModel()
+    exposures, specific_variances = model.exposures_from_arrays(types, sectors)
+    return model, quantities * prices, exposures, specific_variances
+
+def _run_factor_var(inputs):
+    model, values, exposures, specific_variances = inputs
+    return model.calculate_var(values, exposures, specific_variances, 0.99)
+
+def _setup_streaming(size, context):
+    from services.loss_aggregator import StreamingLossAggregator
+    # Une perte simulée par actif et par scénario: taille × 100 scénarios, produits par blocs
+    return StreamingLossAggregator, size * 100, context.seed
+
+def _run_streaming(inputs):
+    aggregator_class, n_scenarios, seed = inputs
+    rng = np.random.default_rng(seed)
+    chunk = 1_000_000
+
+    def chunks():
+        remaining = n_scenarios
+        while remaining > 0:
+            n = min(chunk, remaining)
+            remaining -= n
+            yield rng.standard_t(4, n) * 1000
+
+    return aggregator_class((0.95, 0.99)).consume(chunks()).result(0.95)
+
+def _setup_app_pdf(size, context):
+    import app
+    results = app.stress_test(context.portfolio, {})
+    sim = type('BenchmarkSimulation', (), {'id': f'bench-{size}', 'name': 'Benchmark', 'type': 'var'})()
+    return app, sim, {'var': results['total_loss'] * 0.1, 'cvar': results['total_loss'] * 0.13}, context.workdir
+
+def _run_app_pdf(inputs):
+    app, sim, results, workdir = inputs
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        return app.generate_pdf_report(sim, results)
+    finally:
+        os.chdir(cwd)
+
+def _setup_service_pdf(size, context):
+    from services.pdf_generator import PDFReportGenerator
+    from services.risk_calculator import AdvancedRiskCalculator
+    from services.data_service import DataService
+    results = AdvancedRiskCalculator(DataService()).calculate_solvency_ii(context.portfolio)
+    payload = synthetic.simulation_payload('solvency_ii', results)
+    return PDFReportGenerator(), payload, os.path.join(context.workdir, f'solvency_{size}.pdf')
+
+def _run_service_pdf(inputs):
+    generator, payload, path = inputs
+    return generator.generate_simulation_report(payload, path)
+
+
+CASES = [
+    BenchmarkCase('app.calculate_var', _setup_app_var, _run_app_var, max_assets=100_000),
+    BenchmarkCase('app.stress_test', _setup_app_stress, _run_app_stress),
+    BenchmarkCase('calculator.calculate_var', _setup_calculator, _run_calculator_var),
+    BenchmarkCase('calculator.stress_test', _setup_calculator, _run_calculator_stress),
+    BenchmarkCase('calculator.calculate_solvency_ii', _setup_calculator, _run_calculator_solvency),
+    BenchmarkCase('factor_model.calculate_var', _setup_factor_var, _run_factor_var),
+    BenchmarkCase('loss_aggregator.streaming', _setup_streaming, _run_streaming, max_assets=100_000, unit='scenarios'),
+    BenchmarkCase('app.generate_pdf_report', _setup_app_pdf, _run_app_pdf, unit='reports'),
+    BenchmarkCase('pdf_generator.solvency_report', _setup_service_pdf, _run_service_pdf, unit='reports'),
+]
+
+
+# === MESURE ===
+def measure(case, size, context, repeat=3):
+    """Temps minimal sur `repeat` exécutions, puis une exécution sous tracemalloc pour le pic mémoire"""
+    try:
+        inputs = case.setup(size, context)
+    except ImportError as e:
+        return {'status': 'skipped', 'reason': f'dépendance manquante: {e.name}'}
+
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        case.run(inputs)
+        timings.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        case.run(inputs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    wall_time = min(timings)
+    work = {'assets': size, 'scenarios': size * 100, 'reports': 1}[case.unit]
+    return {
+        'status': 'ok',
+        'wall_time_s': round(wall_time, 6),
+        'median_time_s': round(float(np.median(timings)), 6),
+        'peak_memory_mb': round(peak / 1024 ** 2, 3),
+        'throughput': round(work / wall_time, 2) if wall_time > 0 else None,
+        'throughput_unit': f'{case.unit}/s'
+    }
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, case_names=None, repeat=3, seed=0, log=print):
+    results = {}
+    for size in sizes:
+        context = BenchmarkContext(size, seed)
+        for case in CASES:
+            if case_names and case.name not in case_names:
+                continue
+            if case.max_assets and size > case.max_assets:
+                continue
+            key = f'{case.name}@{size}'
+            results[key] = measure(case, size, context, repeat)
+            log(_format_line(key, results[key]))
+    return results
+
+
+def compare(results, baseline, tolerance=0.2, min_time_delta=0.001):
+    """Liste des régressions: temps ou mémoire au-delà de (1 + tolerance) × référence"""
+    regressions = []
+    for key, current in results.items():
+        reference = baseline.get(key)
+        if current.get('status') != 'ok' or not reference or reference.get('status') != 'ok':
+            continue
+        time_delta = current['wall_time_s'] - reference['wall_time_s']
+        if current['wall_time_s'] > reference['wall_time_s'] * (1 + tolerance) and time_delta > min_time_delta:
+            regressions.append({
+                'benchmark': key, 'metric': 'wall_time_s',
+                'baseline': reference['wall_time_s'], 'current': current['wall_time_s']
+            })
+        if current['peak_memory_mb'] > reference['peak_memory_mb'] * (1 + tolerance) + 1:
+            regressions.append({
+                'benchmark': key, 'metric': 'peak_memory_mb',
+                'baseline': reference['peak_memory_mb'], 'current': current['peak_memory_mb']
+            })
+    return regressions
+
+
+def missing_references(results, baseline):
+    """Benchmarks exécutés sans mesure de référence correspondante: aucune comparaison possible"""
+    return sorted(key for key, current in results.items()
+                  if current.get('status') == 'ok' and (baseline.get(key) or {}).get('status') != 'ok')
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f).get('results', {})
+
+
+def save_results(path, results, merge_existing=False):
+    """Écrit les résultats en JSON avec les métadonnées de l'environnement"""
+    existing = load_baseline(path) if merge_existing else {}
+    existing.update(results)
+    payload = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'results': existing
+    }
+    with open(path, 'w') as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+
+
+def _format_line(key, result):
+    if result['status'] != 'ok':
+        return f"{key:<45} SKIPPED ({result['reason']})"
+    return (f"{key:<45} {result['wall_time_s'] * 1000:>10.2f} ms  "
+            f"{result['peak_memory_mb']:>9.2f} MB  {result['throughput']:>14,.0f} {result['throughput_unit']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks FinRisk (données synthétiques, sans réseau)')
+    parser.add_argument('--sizes', default=','.join(str(s) for s in DEFAULT_SIZES),
+                        help='Tailles de portefeuille séparées par des virgules')
+    parser.add_argument('--cases', default='', help='Noms de cas à exécuter (par défaut: tous)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Fichier JSON de référence')
+    parser.add_argument('--output', default='', help='Fichier JSON pour les résultats de cette exécution')
+    parser.add_argument('--update-baseline', action='store_true', help='Enregistre ces résultats comme référence')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Dégradation relative tolérée (0.2 = 20%%)')
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    case_names = {c for c in args.cases.split(',') if c} or None
+    results = run_benchmarks(sizes, case_names, args.repeat, args.seed)
+
+    if args.output:
+        save_results(args.output, results)
+    if args.update_baseline:
+        save_results(args.baseline, results, merge_existing=True)
+        print(f"Référence mise à jour: {args.baseline}")
+        return 0
+
+    # Sans référence, la comparaison ne trouverait aucune régression: échec explicite plutôt que succès muet
+    if not os.path.exists(args.baseline):
+        print(f"ERREUR: référence absente ({args.baseline}). Lancer d'abord avec --update-baseline.",
+              file=sys.stderr)
+        return 2
+    baseline = load_baseline(args.baseline)
+    missing = missing_references(results, baseline)
+    for key in missing:
+        print(f"SANS RÉFÉRENCE {key}", file=sys.stderr)
+    if missing:
+        print(f"ERREUR: {len(missing)} benchmark(s) absent(s) de {args.baseline}. "
+              f"Compléter avec --update-baseline.", file=sys.stderr)
+
+    regressions = compare(results, baseline, args.tolerance)
+    for r in regressions:
+        print(f"RÉGRESSION {r['benchmark']} {r['metric']}: {r['baseline']} -> {r['current']}")
+    if missing:
+        return 2
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
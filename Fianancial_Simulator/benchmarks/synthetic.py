@@ -0,0 +1,109 @@
+import json
+import numpy as np
+
+
+ASSET_TYPES = ('equity', 'bond', 'real_estate', 'commodities', 'credit', 'cash', 'other')
+TYPE_PROBABILITIES = (0.45, 0.25, 0.08, 0.07, 0.08, 0.04, 0.03)
+DAILY_VOLATILITIES = {
+    'equity': 0.0126,
+    'bond': 0.005,
+    'real_estate': 0.0076,
+    'commodities': 0.0095,
+    'credit': 0.0063,
+    'cash': 0.0013,
+    'other': 0.0063
+}
+
+
+class SyntheticAsset:
+    """Actif synthétique exposant les mêmes attributs que le modèle Asset"""
+
+    def __init__(self, index, asset_type, quantity, purchase_price, sector=None):
+        self.id = f'asset-{index}'
+        self.name = f'Actif {index}'
+        self.symbol = f'SYN{index}'
+        self.asset_type = asset_type
+        self.quantity = quantity
+        self.purchase_price = purchase_price
+        self.current_value = quantity * purchase_price
+        self.sector = sector
+
+
+class SyntheticPortfolio:
+    """Portefeuille synthétique compatible avec app.py (calculate_value) et les services (total_value)"""
+
+    def __init__(self, assets, name='Portefeuille synthétique'):
+        self.id = 'synthetic'
+        self.name = name
+        self.assets = assets
+        self.total_value = sum(asset.current_value for asset in assets)
+
+    def calculate_value(self):
+        return self.total_value
+
+
+class SyntheticScenario:
+    """Scénario de stress au format attendu par AdvancedRiskCalculator.stress_test"""
+
+    def __init__(self, name='Crise synthétique', parameters=None):
+        self.name = name
+        self.parameters = parameters or {
+            'equity': -0.35, 'bond': -0.08, 'real_estate': -0.25,
+            'commodities': -0.2, 'credit': -0.15, 'cash': 0.0
+        }
+
+    def get_parameters(self):
+        return self.parameters
+
+
+def generate_portfolio_arrays(n_assets, seed=0):
+    """Tableaux de positions (types, secteurs, valeurs) pour les chemins vectorisés"""
+    rng = np.random.default_rng(seed)
+    types = rng.choice(ASSET_TYPES, size=n_assets, p=TYPE_PROBABILITIES)
+    sectors = rng.choice(
+        ['technology', 'financials', 'energy', 'healthcare', 'consumer', 'industrials', 'utilities'],
+        size=n_assets
+    )
+    sectors = np.where(types == 'equity', sectors, None)
+    quantities = rng.integers(1, 1000, size=n_assets).astype(float)
+    prices = rng.lognormal(mean=4.0, sigma=0.8, size=n_assets)
+    return types, sectors, quantities, prices
+
+
+def generate_portfolio(n_assets, seed=0):
+    """Portefeuille synthétique de n_assets positions, reproductible"""
+    types, sectors, quantities, prices = generate_portfolio_arrays(n_assets, seed)
+    assets = [
+        SyntheticAsset(i, str(types[i]), float(quantities[i]), float(prices[i]), sectors[i])
+        for i in range(n_assets)
+    ]
+    return SyntheticPortfolio(assets)
+
+
+def generate_returns(asset_types, days=252, seed=0, market_beta=0.6):
+    """Rendements journaliers N×T à un facteur de marché (Student-t pour des queues épaisses)"""
+    rng = np.random.default_rng(seed)
+    n_assets = len(asset_types)
+    vols = np.array([DAILY_VOLATILITIES.get(t, 0.0063) for t in asset_types])
+    market = rng.standard_t(5, size=days) / np.sqrt(5 / 3)
+    idiosyncratic = rng.standard_normal((n_assets, days), dtype=np.float32)
+    loading = np.sqrt(1 - market_beta ** 2)
+    returns = (market_beta * market[None, :] + loading * idiosyncratic) * vols[:, None]
+    return returns.astype(np.float32)
+
+
+def generate_price_history(asset_types, days=252, seed=0, initial_price=100.0):
+    """Historique de prix synthétique N×(T+1) obtenu en composant les rendements"""
+    returns = generate_returns(asset_types, days, seed).astype(float)
+    log_prices = np.cumsum(np.log1p(returns), axis=1)
+    return initial_price * np.exp(np.concatenate((np.zeros((len(asset_types), 1)), log_prices), axis=1))
+
+
+def simulation_payload(sim_type, results):
+    """Données de simulation au format attendu par PDFReportGenerator"""
+    return {
+        'name': f'Benchmark {sim_type}',
+        'type': sim_type,
+        'created_at': '2025-01-01T00:00:00',
+        'results': json.loads(json.dumps(results))
+    }
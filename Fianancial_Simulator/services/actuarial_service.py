@@ -0,0 +1,193 @@
+import csv
+import os
+import threading
+
+import numpy as np
+
+
+class MortalityTable:
+    """Table de mortalité (l_x par âge entier, de 0 à l'âge limite)"""
+
+    def __init__(self, name, lx, source='official'):
+        self.name = name
+        self.lx = np.asarray(lx, dtype=float)
+        self.source = source
+
+    @property
+    def omega(self):
+        return self.lx.size - 1
+
+    @classmethod
+    def from_csv(cls, name, path):
+        """Charge un fichier « age;lx » (séparateur ; ou ,), tel que publié pour TH00-02 / TF00-02"""
+        with open(path, newline='', encoding='utf-8') as f:
+            sample = f.read(1024)
+            f.seek(0)
+            delimiter = ';' if sample.count(';') > sample.count(',') else ','
+            rows = [row for row in csv.reader(f, delimiter=delimiter) if row and row[0].strip().isdigit()]
+        ages = np.array([int(row[0]) for row in rows])
+        values = np.array([float(row[1].replace(' ', '').replace(',', '.')) for row in rows])
+        # Un âge manquant deviendrait l_x = 0 au milieu de la table (décès certain puis « résurrection »)
+        order = np.argsort(ages)
+        if ages.size == 0 or not np.array_equal(ages[order], np.arange(ages.size)):
+            raise ValueError(f"Table {name}: les âges doivent être contigus à partir de 0 ({path})")
+        return cls(name, values[order], source=os.path.basename(path))
+
+    @classmethod
+    def gompertz_makeham(cls, name, a, b, c, omega=110, radix=100_000):
+        """Table paramétrique μ_x = a + b·c^x, utilisée à défaut du fichier officiel"""
+        ages = np.arange(omega)
+        integrated_hazard = a + b * c ** ages * (c - 1) / np.log(c)
+        lx = np.concatenate(([radix], radix * np.cumprod(np.exp(-integrated_hazard))))
+        lx[-1] = 0.0
+        return cls(name, lx, source='approximation Gompertz-Makeham')
+
+
+class CommutationTable:
+    """Colonnes de commutation Dx, Nx, Cx, Mx pour une table et un taux technique"""
+
+    def __init__(self, table, rate):
+        self.table = table
+        self.rate = rate
+        lx = table.lx
+        ages = np.arange(lx.size)
+        v = 1.0 / (1.0 + rate)
+        dx = lx - np.append(lx[1:], 0.0)
+
+        # Une colonne nulle en fin de tableau permet d'indexer x + n au-delà de l'âge limite
+        self.Dx = np.append(v ** ages * lx, 0.0)
+        self.Cx = np.append(v ** (ages + 1) * dx, 0.0)
+        self.Nx = np.cumsum(self.Dx[::-1])[::-1]
+        self.Mx = np.cumsum(self.Cx[::-1])[::-1]
+
+    def index(self, age):
+        return np.clip(np.asarray(age, dtype=np.intp), 0, self.Dx.size - 1)
+
+
+class ActuarialService:
+    """Tarification vie (décès temporaire, vie entière, rente viagère, capital différé) par commutations"""
+
+    PRODUCTS = ('temporary_death', 'whole_life', 'life_annuity', 'pure_endowment')
+
+    # Paramètres Gompertz-Makeham proches de TH00-02 (e0 ≈ 76 ans) et TF00-02 (e0 ≈ 83,5 ans)
+    APPROXIMATIONS = {
+        'TH00-02': (0.0007, 0.000035, 1.098),
+        'TF00-02': (0.0003, 0.000012, 1.105),
+    }
+
+    def __init__(self, table_dir=None):
+        self.table_dir = table_dir or os.environ.get(
+            'FINRISK_MORTALITY_DIR', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'mortality')
+        )
+        self._tables = {}
+        self._commutations = {}
+        self._lock = threading.Lock()
+
+    def get_table(self, name='TH00-02'):
+        """Table chargée une seule fois: fichier <table_dir>/<name>.csv, sinon approximation"""
+        table = self._tables.get(name)
+        if table is not None:
+            return table
+        with self._lock:
+            if name not in self._tables:
+                path = os.path.join(self.table_dir, f'{name}.csv')
+                if os.path.exists(path):
+                    self._tables[name] = MortalityTable.from_csv(name, path)
+                elif name in self.APPROXIMATIONS:
+                    self._tables[name] = MortalityTable.gompertz_makeham(name, *self.APPROXIMATIONS[name])
+                else:
+                    raise ValueError(f"Table de mortalité inconnue: {name}")
+            return self._tables[name]
+
+    def get_commutations(self, table='TH00-02', rate=0.02):
+        """Colonnes de commutation mises en cache par (table, taux technique)"""
+        key = (table, round(float(rate), 8))
+        commutations = self._commutations.get(key)
+        if commutations is None:
+            commutations = CommutationTable(self.get_table(table), rate)
+            with self._lock:
+                self._commutations[key] = commutations
+        return commutations
+
+    def single_premium(self, product, age, duration=None, capital=1.0, table='TH00-02', rate=0.02, deferment=0):
+        """Prime unique pure d'un contrat, en O(1)"""
+        return float(self.price_batch(product, [age], [duration or 0], [capital], table, rate, [deferment])['single_premium'][0])
+
+    def periodic_premium(self, product, age, duration=None, capital=1.0, payment_years=None,
+                         table='TH00-02', rate=0.02, deferment=0):
+        """Prime annuelle nivelée payable d'avance pendant payment_years (au plus la durée du contrat)"""
+        result = self.price_batch(product, [age], [duration or 0], [capital], table, rate, [deferment],
+                                  [payment_years or 0])
+        return float(result['periodic_premium'][0])
+
+    def price_batch(self, product, ages, durations, capitals, table='TH00-02', rate=0.02,
+                    deferments=None, payment_years=None):
+        """Tarifie un fichier entier de contrats en un appel (tableaux NumPy, aucune boucle par contrat)"""
+        if product not in self.PRODUCTS:
+            raise ValueError(f"Produit inconnu: {product}")
+        c = self.get_commutations(table, rate)
+        ages = np.asarray(ages, dtype=np.intp)
+        durations = np.asarray(durations, dtype=np.intp)
+        capitals = np.asarray(capitals, dtype=float)
+        deferments = np.zeros_like(ages) if deferments is None else np.asarray(deferments, dtype=np.intp)
+        if np.any(ages < 0) or np.any(durations < 0) or np.any(deferments < 0):
+            raise ValueError("Âges, durées et différés doivent être positifs")
+        if product == 'pure_endowment' and np.any(durations <= 0):
+            raise ValueError("Le capital différé exige une durée strictement positive")
+
+        x = c.index(ages)
+        d_x = c.Dx[x]
+        valid = d_x > 0
+        d_x = np.where(valid, d_x, 1.0)
+        # Durée nulle = viager (jusqu'à l'âge limite)
+        end = np.where(durations > 0, c.index(ages + durations), c.Dx.size - 1)
+
+        if product == 'temporary_death':
+            factor = (c.Mx[x] - c.Mx[end]) / d_x
+        elif product == 'whole_life':
+            factor = c.Mx[x] / d_x
+        elif product == 'life_annuity':
+            start = c.index(ages + deferments)
+            end = np.where(durations > 0, c.index(ages + deferments + durations), c.Dx.size - 1)
+            factor = (c.Nx[start] - c.Nx[end]) / d_x
+        else:  # pure_endowment: capital versé en cas de vie au terme
+            factor = c.Dx[end] / d_x
+
+        single = np.where(valid, capitals * factor, 0.0)
+
+        # Annuité de paiement des primes ä_{x:t}: par défaut la durée du contrat (le différé pour une rente)
+        remaining = c.Dx.size - 1 - x
+        if product == 'life_annuity':
+            default_payment = np.maximum(deferments, 1)
+            contract_years = np.where(durations > 0, deferments + durations, remaining)
+        else:
+            default_payment = np.where(durations > 0, durations, remaining)
+            contract_years = default_payment
+        if payment_years is None:
+            payment = default_payment
+        else:
+            payment_years = np.asarray(payment_years, dtype=np.intp)
+            payment = np.where(payment_years > 0, payment_years, default_payment)
+        # Pas de prime au-delà du terme: le paiement est plafonné à la durée du contrat
+        payment = np.minimum(payment, np.maximum(contract_years, 1))
+        annuity_due = (c.Nx[x] - c.Nx[c.index(ages + payment)]) / d_x
+        periodic = np.where(valid & (annuity_due > 0), single / np.where(annuity_due > 0, annuity_due, 1.0), 0.0)
+
+        return {
+            'single_premium': single,
+            'periodic_premium': periodic,
+            'annuity_due': np.where(valid, annuity_due, 0.0),
+            'table': table,
+            'table_source': c.table.source,
+            'technical_rate': rate
+        }
+
+    def life_expectancy(self, age, table='TH00-02'):
+        """Espérance de vie résiduelle (abrégée + 0,5)"""
+        lx = self.get_table(table).lx
+        if age >= lx.size or lx[age] <= 0:
+            return 0.0
+        return float(lx[age + 1:].sum() / lx[age] + 0.5)
+
+
+actuarial_service = ActuarialService()
@@ -0,0 +1,193 @@
+import threading
+import numpy as np
+from collections import OrderedDict
+from datetime import date
+
+
+class CovarianceEstimate:
+    """Matrice de covariance accompagnée de son facteur de Cholesky"""
+
+    def __init__(self, symbols, matrix, method, as_of, n_observations, cholesky=None):
+        self.symbols = tuple(symbols)
+        self.matrix = matrix
+        self.method = method
+        self.as_of = as_of
+        self.n_observations = n_observations
+        self.cholesky = cholesky if cholesky is not None else CovarianceService.cholesky_factor(matrix)
+
+    def portfolio_volatility(self, weights):
+        """Volatilité du portefeuille: sqrt(w' Σ w)"""
+        weights = np.asarray(weights, dtype=float)
+        return float(np.sqrt(max(weights @ self.matrix @ weights, 0.0)))
+
+    def correlation(self):
+        """Matrice de corrélation déduite de la covariance"""
+        std = np.sqrt(np.diag(self.matrix))
+        std[std == 0] = 1.0
+        return self.matrix / np.outer(std, std)
+
+    def to_dict(self):
+        return {
+            'symbols': list(self.symbols),
+            'method': self.method,
+            'as_of': self.as_of.isoformat(),
+            'n_observations': self.n_observations,
+            'matrix': self.matrix.tolist()
+        }
+
+
+class CovarianceService:
+    """Estimation de covariances (échantillon, Ledoit-Wolf, EWMA) avec cache par univers et date"""
+
+    METHODS = ('sample', 'ledoit_wolf', 'ewma')
+
+    def __init__(self, ewma_lambda=0.94, max_entries=64):
+        self.ewma_lambda = ewma_lambda  # Lambda RiskMetrics (journalier)
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        # Instance partagée entre threads (tableau de bord): accès au cache sous verrou, calculs hors verrou
+        self._lock = threading.Lock()
+
+    def get_covariance(self, symbols, returns, method='ledoit_wolf', as_of=None):
+        """Retourne l'estimation en cache pour (univers, date, méthode) ou la calcule"""
+        if method not in self.METHODS:
+            raise ValueError(f"Méthode inconnue: {method}")
+        as_of = as_of or date.today()
+        key = (tuple(symbols), as_of, method)
+
+        with self._lock:
+            estimate = self._cache.get(key)
+            if estimate is not None:
+                self._cache.move_to_end(key)
+                return estimate
+
+        returns = self._as_matrix(returns, len(symbols))
+        if method == 'sample':
+            matrix = self.sample_covariance(returns)
+        elif method == 'ledoit_wolf':
+            matrix, _ = self.ledoit_wolf_covariance(returns)
+        else:
+            matrix = self.ewma_covariance(returns, self.ewma_lambda)
+
+        estimate = CovarianceEstimate(symbols, matrix, method, as_of, returns.shape[0])
+        self._store(key, estimate)
+        return estimate
+
+    def update_ewma(self, symbols, new_returns, as_of=None):
+        """Intègre une nouvelle journée de rendements: mise à jour de rang un en O(N²)"""
+        symbols = tuple(symbols)
+        previous = self.latest(symbols, 'ewma')
+        if previous is None:
+            raise KeyError(f"Aucune covariance EWMA en cache pour {symbols}")
+
+        r = np.asarray(new_returns, dtype=float).ravel()
+        lam = self.ewma_lambda
+        # Σ_t = λ Σ_{t-1} + (1 - λ) r rᵀ, et le facteur de Cholesky suit la même mise à jour
+        matrix = lam * previous.matrix + (1 - lam) * np.outer(r, r)
+        cholesky = self.cholesky_rank_one_update(np.sqrt(lam) * previous.cholesky, np.sqrt(1 - lam) * r)
+
+        as_of = as_of or date.today()
+        estimate = CovarianceEstimate(symbols, matrix, 'ewma', as_of, previous.n_observations + 1, cholesky)
+        self._store((symbols, as_of, 'ewma'), estimate)
+        return estimate
+
+    def latest(self, symbols, method):
+        """Estimation la plus récente en cache pour un univers et une méthode"""
+        symbols = tuple(symbols)
+        with self._lock:
+            candidates = [est for (syms, _, meth), est in self._cache.items() if syms == symbols and meth == method]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda est: est.as_of)
+
+    def invalidate(self, symbols=None):
+        """Vide le cache (entièrement ou pour un univers)"""
+        with self._lock:
+            if symbols is None:
+                self._cache.clear()
+                return
+            symbols = tuple(symbols)
+            for key in [k for k in self._cache if k[0] == symbols]:
+                del self._cache[key]
+
+    @staticmethod
+    def aligned_returns(data_service, symbols, days=252):
+        """Construit la matrice T×N des rendements alignés sur l'historique commun"""
+        series = [np.asarray(data_service.get_historical_data(symbol, days), dtype=float) for symbol in symbols]
+        length = min(len(s) for s in series)
+        return np.column_stack([s[-length:] for s in series])
+
+    @staticmethod
+    def sample_covariance(returns):
+        """Covariance empirique (non biaisée)"""
+        return np.atleast_2d(np.cov(returns, rowvar=False, ddof=1))
+
+    @staticmethod
+    def ledoit_wolf_covariance(returns):
+        """Shrinkage de Ledoit-Wolf (2004) vers une cible identité mise à l'échelle"""
+        t, n = returns.shape
+        centered = returns - returns.mean(axis=0)
+        sample = centered.T @ centered / t
+        mu = np.trace(sample) / n
+        target = mu * np.eye(n)
+
+        squared = centered ** 2
+        pi_hat = (squared.T @ squared / t - sample ** 2).sum()
+        gamma_hat = ((sample - target) ** 2).sum()
+        shrinkage = 0.0 if gamma_hat == 0 else float(np.clip(pi_hat / gamma_hat / t, 0.0, 1.0))
+
+        return shrinkage * target + (1 - shrinkage) * sample, shrinkage
+
+    @staticmethod
+    def ewma_covariance(returns, lam=0.94):
+        """Covariance EWMA RiskMetrics (moyenne nulle), observations récentes en fin de tableau"""
+        t = returns.shape[0]
+        weights = (1 - lam) * lam ** np.arange(t - 1, -1, -1)
+        weights /= weights.sum()
+        return (returns * weights[:, None]).T @ returns
+
+    @staticmethod
+    def cholesky_factor(matrix):
+        """Facteur de Cholesky, avec un léger ajustement diagonal si la matrice est semi-définie"""
+        jitter = 0.0
+        scale = max(float(np.mean(np.diag(matrix))), 1e-12)
+        for _ in range(6):
+            try:
+                return np.linalg.cholesky(matrix + jitter * np.eye(matrix.shape[0]))
+            except np.linalg.LinAlgError:
+                jitter = scale * 1e-10 if jitter == 0 else jitter * 100
+        raise np.linalg.LinAlgError("Matrice de covariance non factorisable")
+
+    @staticmethod
+    def cholesky_rank_one_update(cholesky, x):
+        """Met à jour L tel que L Lᵀ + x xᵀ = L' L'ᵀ en O(N²)"""
+        L = cholesky.copy()
+        x = x.copy()
+        n = x.size
+        for k in range(n):
+            r = np.hypot(L[k, k], x[k])
+            c = r / L[k, k]
+            s = x[k] / L[k, k]
+            L[k, k] = r
+            if k + 1 < n:
+                L[k + 1:, k] = (L[k + 1:, k] + s * x[k + 1:]) / c
+                x[k + 1:] = c * x[k + 1:] - s * L[k + 1:, k]
+        return L
+
+    def __len__(self):
+        with self._lock:
+            return len(self._cache)
+
+    def _store(self, key, estimate):
+        with self._lock:
+            self._cache[key] = estimate
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    @staticmethod
+    def _as_matrix(returns, n_assets):
+        returns = np.asarray(returns, dtype=float)
+        if returns.ndim == 1:
+            returns = returns.reshape(-1, n_assets)
+        return returns[np.all(np.isfinite(returns), axis=1)]
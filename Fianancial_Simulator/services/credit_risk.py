@@ -0,0 +1,217 @@
+import time
+
+import numpy as np
+from scipy.special import ndtr, ndtri
+
+from services.historical_simulation import HistoricalSimulationEngine
+
+
+def _check_confidence(*levels):
+    if not all(0 < c < 1 for c in levels):
+        raise ValueError("Les niveaux de confiance doivent être strictement compris entre 0 et 1")
+
+
+class CreditPortfolio:
+    """Expositions de crédit en colonnes (EAD, PD, LGD) et chargements sur les facteurs systémiques"""
+
+    # Paramètres par défaut des types d'actifs porteurs de risque de défaut (PD à un an)
+    DEFAULT_PARAMETERS = {
+        'credit': {'pd': 0.02, 'lgd': 0.45, 'correlation': 0.20},
+        'bond': {'pd': 0.003, 'lgd': 0.40, 'correlation': 0.12},
+        'cash': {'pd': 0.0005, 'lgd': 0.50, 'correlation': 0.10},
+    }
+    # Corrélation entre les facteurs systémiques de deux types d'actifs
+    FACTOR_CORRELATION = 0.6
+
+    def __init__(self, ead, pd, lgd, loadings, factor_correlation=None):
+        self.ead = np.asarray(ead, dtype=float)
+        self.pd = np.clip(np.asarray(pd, dtype=float), 1e-12, 1 - 1e-12)
+        self.lgd = np.asarray(lgd, dtype=float)
+        loadings = np.asarray(loadings, dtype=float)
+        loadings = loadings.reshape(-1, 1) if loadings.ndim == 1 else loadings
+        if factor_correlation is not None:
+            # Facteurs corrélés ramenés à des facteurs indépendants: Z = L u
+            loadings = loadings @ np.linalg.cholesky(np.asarray(factor_correlation, dtype=float))
+
+        # X_i = B_i·u + sqrt(1 - |B_i|²) ε_i, défaut si X_i < Φ⁻¹(PD_i)
+        systematic_variance = (loadings ** 2).sum(axis=1)
+        if np.any(systematic_variance >= 1):
+            raise ValueError("Les chargements factoriels doivent vérifier |B_i|² < 1")
+        self.loadings = loadings
+        self.idiosyncratic = np.sqrt(1 - systematic_variance)
+        self.threshold = ndtri(self.pd)
+        self.severity = self.ead * self.lgd
+
+    def __len__(self):
+        return self.ead.size
+
+    @property
+    def n_factors(self):
+        return self.loadings.shape[1]
+
+    @property
+    def expected_loss(self):
+        return float(self.severity @ self.pd)
+
+    @classmethod
+    def one_factor(cls, ead, pd, lgd, correlation):
+        """Modèle de Vasicek: un seul facteur, corrélation d'actifs ρ_i"""
+        correlation = np.broadcast_to(np.asarray(correlation, dtype=float), np.shape(ead))
+        return cls(ead, pd, lgd, np.sqrt(correlation))
+
+    @classmethod
+    def by_sector(cls, ead, pd, lgd, sector_index, correlation, factor_correlation):
+        """CreditMetrics multi-facteurs: chaque débiteur chargé sur le facteur de son secteur"""
+        sector_index = np.asarray(sector_index, dtype=np.intp)
+        correlation = np.broadcast_to(np.asarray(correlation, dtype=float), sector_index.shape)
+        loadings = np.zeros((sector_index.size, np.shape(factor_correlation)[0]))
+        loadings[np.arange(sector_index.size), sector_index] = np.sqrt(correlation)
+        return cls(ead, pd, lgd, loadings, factor_correlation)
+
+    @classmethod
+    def from_arrays(cls, asset_types, values, parameters=None):
+        """Expositions des types porteurs de risque de défaut; un facteur systémique par type"""
+        table = {k: dict(v) for k, v in cls.DEFAULT_PARAMETERS.items()}
+        for asset_type, overrides in (parameters or {}).items():
+            if not isinstance(overrides, dict):
+                raise ValueError(f"Paramètres de crédit invalides pour {asset_type}")
+            spec = table.setdefault(asset_type, {'pd': 0.01, 'lgd': 0.45, 'correlation': 0.15})
+            spec.update({key: float(value) for key, value in overrides.items()})
+            if not (0 < spec['pd'] < 1 and 0 <= spec['lgd'] <= 1 and 0 <= spec['correlation'] < 1):
+                raise ValueError(f"Paramètres de crédit invalides pour {asset_type}: 0 < PD < 1, "
+                                 f"0 ≤ LGD ≤ 1 et 0 ≤ corrélation < 1")
+
+        asset_types = np.asarray(asset_types, dtype=object)
+        values = np.asarray(values, dtype=float)
+        kinds = [t for t in table if np.any(asset_types == t)]
+        if not kinds:
+            return None
+        mask = np.isin(asset_types, kinds) & (values > 0)
+        if not np.any(mask):
+            return None
+        types = asset_types[mask]
+        sector_index = np.zeros(types.size, dtype=np.intp)
+        for i, kind in enumerate(kinds):
+            sector_index[types == kind] = i
+        column = lambda key: np.array([table[k][key] for k in kinds])[sector_index]
+
+        factor_correlation = np.full((len(kinds), len(kinds)), cls.FACTOR_CORRELATION)
+        np.fill_diagonal(factor_correlation, 1.0)
+        return cls.by_sector(values[mask], column('pd'), column('lgd'), sector_index, column('correlation'),
+                             factor_correlation)
+
+    @classmethod
+    def from_assets(cls, assets, parameters=None):
+        values = [asset.current_value or (asset.quantity * asset.purchase_price) for asset in assets]
+        return cls.from_arrays([asset.asset_type for asset in assets], values, parameters)
+
+    def conditional_pd(self, factors):
+        """PD conditionnelles aux facteurs systémiques: (S×K) -> (S×N)"""
+        return ndtr((self.threshold - factors @ self.loadings.T) / self.idiosyncratic)
+
+
+class CreditRiskEngine:
+    """Pertes de défaut corrélées par copule gaussienne, Monte Carlo par blocs de scénarios"""
+
+    def __init__(self, portfolio, seed=None, chunk_elements=4_000_000):
+        self.portfolio = portfolio
+        self.rng = np.random.default_rng(seed)
+        self.chunk_elements = chunk_elements  # taille maximale d'un bloc scénarios × débiteurs
+
+    def importance_shift(self, confidence):
+        """Moyenne décalée du facteur systémique, dans la direction où se concentrent les pertes
+
+        Dans la limite d'un portefeuille granulaire (ASRF), la perte au quantile α est atteinte
+        pour un facteur à Φ⁻¹(α) écarts-types: on centre l'échantillonnage sur ce point.
+        """
+        portfolio = self.portfolio
+        direction = (portfolio.severity * portfolio.pd) @ portfolio.loadings
+        norm = np.linalg.norm(direction)
+        if norm == 0:
+            return np.zeros(portfolio.n_factors)
+        return -ndtri(confidence) * direction / norm
+
+    def simulate_losses(self, n_scenarios, shift=None):
+        """Pertes par scénario et rapports de vraisemblance (None sans échantillonnage d'importance)"""
+        portfolio = self.portfolio
+        chunk = max(1, self.chunk_elements // len(portfolio))
+        losses = np.empty(n_scenarios)
+        log_weights = np.zeros(n_scenarios) if shift is not None else None
+
+        for start in range(0, n_scenarios, chunk):
+            size = min(chunk, n_scenarios - start)
+            factors = self.rng.standard_normal((size, portfolio.n_factors))
+            if shift is not None:
+                factors += shift
+                # φ(u) / φ(u - μ) = exp(-μ·u + ½|μ|²)
+                log_weights[start:start + size] = -factors @ shift + 0.5 * shift @ shift
+            # Conditionnellement aux facteurs, les défauts sont indépendants
+            defaults = self.rng.random((size, len(portfolio))) < portfolio.conditional_pd(factors)
+            losses[start:start + size] = defaults @ portfolio.severity
+
+        return losses, (np.exp(log_weights) if shift is not None else None)
+
+    def calculate(self, confidence_levels=(0.99, 0.999), n_scenarios=50_000, importance_sampling=True):
+        """VaR et ES de la perte de crédit (montants positifs) par niveau de confiance"""
+        confidence_levels = tuple(confidence_levels)
+        _check_confidence(*confidence_levels)
+        shift = self.importance_shift(max(confidence_levels)) if importance_sampling else None
+        losses, weights = self.simulate_losses(n_scenarios, shift)
+
+        if weights is None:
+            tail = HistoricalSimulationEngine.tail_metrics(-losses, confidence_levels)
+        else:
+            # Poids non renormalisés: P(L ≥ x) ≈ moyenne de 1{L ≥ x}·w. Renormaliser par Σw ferait
+            # dépendre la queue des rares scénarios non décalés, de poids énormes (E[w²] = e^{|μ|²})
+            tail = HistoricalSimulationEngine.weighted_tail_metrics(-losses, weights / n_scenarios,
+                                                                    confidence_levels)
+
+        var_max = tail[max(confidence_levels)][0]
+        expected_loss = self.portfolio.expected_loss
+        return {
+            'method': 'importance_sampling' if importance_sampling else 'monte_carlo',
+            'n_scenarios': n_scenarios,
+            'tail_scenarios': int(np.count_nonzero(losses >= var_max)),
+            'expected_loss': expected_loss,
+            'levels': {
+                c: {'var': var, 'es': es, 'unexpected_loss': max(var - expected_loss, 0.0)}
+                for c, (var, es) in tail.items()
+            }
+        }
+
+    def tail_probability(self, threshold, n_scenarios=50_000, importance_sampling=True, confidence=0.999):
+        """P(L > seuil) et son erreur standard: mesure directe de la réduction de variance"""
+        shift = self.importance_shift(confidence) if importance_sampling else None
+        losses, weights = self.simulate_losses(n_scenarios, shift)
+        samples = (losses > threshold) * (weights if weights is not None else 1.0)
+        return float(samples.mean()), float(samples.std(ddof=1) / np.sqrt(n_scenarios))
+
+    def asymptotic_var(self, confidence=0.999):
+        """VaR du portefeuille infiniment granulaire (formule de Vasicek / IRB Bâle), en O(N)"""
+        _check_confidence(confidence)
+        portfolio = self.portfolio
+        # Facteurs supposés parfaitement corrélés: borne prudente pour le modèle multi-facteurs
+        systematic = np.sqrt(1 - portfolio.idiosyncratic ** 2)
+        stressed_pd = ndtr((portfolio.threshold + systematic * ndtri(confidence)) / portfolio.idiosyncratic)
+        return float(portfolio.severity @ stressed_pd)
+
+    def compare_methods(self, confidence=0.999, n_scenarios=20_000, batches=8):
+        """Dispersion de la VaR estimée sur des lots indépendants, Monte Carlo simple contre décalé"""
+        report = {}
+        for method, importance_sampling in (('monte_carlo', False), ('importance_sampling', True)):
+            start = time.perf_counter()
+            estimates = np.array([
+                self.calculate((confidence,), n_scenarios, importance_sampling)['levels'][confidence]['var']
+                for _ in range(batches)
+            ])
+            report[method] = {
+                'var_mean': float(estimates.mean()),
+                'var_std': float(estimates.std(ddof=1)),
+                'seconds': (time.perf_counter() - start) / batches
+            }
+        mc_std = report['monte_carlo']['var_std']
+        is_std = report['importance_sampling']['var_std']
+        # Variance divisée par ce facteur: autant de fois moins de scénarios pour la même précision
+        report['variance_reduction'] = (mc_std / is_std) ** 2 if is_std > 0 else None
+        report['asymptotic_var'] = self.asymptotic_var(confidence)
+        return report
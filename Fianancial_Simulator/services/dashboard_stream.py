@@ -0,0 +1,240 @@
+import json
+import queue
+import threading
+from datetime import date
+
+import numpy as np
+from scipy import stats
+
+from utils.metrics import metrics
+
+
+class PortfolioChannel:
+    """État du tableau de bord d'un portefeuille, partagé par tous ses abonnés et mis à jour par deltas"""
+
+    def __init__(self, portfolio_id, positions, covariance, confidence=0.95, stress_scenario=None):
+        self.portfolio_id = portfolio_id
+        self.confidence = confidence
+        self.stress_scenario = stress_scenario or {'equity': -0.3}
+        self.subscribers = []
+        self.version = 0
+        self.lock = threading.Lock()
+
+        # Positions: asset_id -> {'symbol', 'asset_type', 'quantity', 'value'}
+        self.positions = {p['id']: dict(p) for p in positions}
+        self.symbols = list(covariance.symbols) if covariance is not None else []
+        self._symbol_index = {s: i for i, s in enumerate(self.symbols)}
+        self.covariance = covariance.matrix if covariance is not None else None
+        self.z_score = -stats.norm.ppf(1 - confidence)
+
+        self.value = sum(p['value'] for p in self.positions.values())
+        self.by_type = {}
+        for p in self.positions.values():
+            self.by_type[p['asset_type']] = self.by_type.get(p['asset_type'], 0.0) + p['value']
+        self.stress_loss = sum(p['value'] * self._shock(p['asset_type']) for p in self.positions.values())
+
+        # Exposition par symbole v et produit Σv conservés pour mettre à jour v'Σv en O(N)
+        self.exposures = np.zeros(len(self.symbols))
+        for p in self.positions.values():
+            if p['symbol'] in self._symbol_index:
+                self.exposures[self._symbol_index[p['symbol']]] += p['value']
+        if self.covariance is not None:
+            self.sigma_v = self.covariance @ self.exposures
+            self.variance = float(self.exposures @ self.sigma_v)
+
+    def _shock(self, asset_type):
+        # Même convention que stress_test(): choc de -10 % pour les types absents du scénario
+        return abs(self.stress_scenario.get(asset_type, -0.1))
+
+    @property
+    def var(self):
+        if self.covariance is None:
+            return 0.0
+        return self.z_score * np.sqrt(max(self.variance, 0.0))
+
+    def allocation(self):
+        total = sum(self.by_type.values())
+        if total <= 0:
+            return {}
+        return {k: round(v / total * 100, 1) for k, v in self.by_type.items()}
+
+    def snapshot(self):
+        # Sous le verrou: un instantané ne mélange jamais l'état d'avant et d'après une mise à jour
+        with self.lock:
+            return {
+                'portfolio_id': self.portfolio_id, 'version': self.version,
+                'value': round(self.value, 2), 'var': round(self.var, 2),
+                'stress_loss': round(self.stress_loss, 2), 'allocation': self.allocation()
+            }
+
+    def apply_position(self, asset_id, value=None, quantity=None, price=None):
+        """Applique le changement d'une position et retourne uniquement les métriques modifiées"""
+        with self.lock:
+            position = self.positions.get(asset_id)
+            if position is None:
+                return None
+            if quantity is not None:
+                position['quantity'] = quantity
+            if value is None:
+                unit_price = price if price is not None else (
+                    position['value'] / position['quantity'] if position['quantity'] else 0.0)
+                value = position['quantity'] * unit_price
+            delta = value - position['value']
+            if delta == 0:
+                return None
+            position['value'] = value
+
+            before = {'value': round(self.value, 2), 'var': round(self.var, 2),
+                      'stress_loss': round(self.stress_loss, 2), 'allocation': self.allocation()}
+
+            self.value += delta
+            self.by_type[position['asset_type']] = self.by_type.get(position['asset_type'], 0.0) + delta
+            self.stress_loss += delta * self._shock(position['asset_type'])
+            i = self._symbol_index.get(position['symbol'])
+            if i is not None and self.covariance is not None:
+                # (v + δe_i)'Σ(v + δe_i) = v'Σv + 2δ(Σv)_i + δ²Σ_ii
+                self.variance += 2 * delta * self.sigma_v[i] + delta ** 2 * self.covariance[i, i]
+                self.sigma_v += delta * self.covariance[:, i]
+                self.exposures[i] += delta
+
+            self.version += 1
+            after = {'value': round(self.value, 2), 'var': round(self.var, 2),
+                     'stress_loss': round(self.stress_loss, 2)}
+            changes = {'portfolio_id': self.portfolio_id, 'version': self.version}
+            for key, new in after.items():
+                if new != before[key]:
+                    changes[key] = new
+                    changes[f'{key}_delta'] = round(new - before[key], 2)
+            allocation = self.allocation()
+            changed_allocation = {k: v for k, v in allocation.items() if before['allocation'].get(k) != v}
+            if changed_allocation:
+                changes['allocation'] = changed_allocation
+            return changes
+
+    def publish(self, event, payload):
+        message = f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+        for subscriber in list(self.subscribers):
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                # Client trop lent: on remplace son retard par un instantané complet
+                with subscriber.mutex:
+                    subscriber.queue.clear()
+                subscriber.put_nowait(f"event: snapshot\ndata: {json.dumps(self.snapshot())}\n\n")
+                metrics.increment('dashboard_stream_resyncs_total')
+
+
+class DashboardHub:
+    """Canaux SSE du tableau de bord: un seul calcul par portefeuille, quel que soit le nombre d'abonnés"""
+
+    def __init__(self, snapshot_loader, returns_loader, covariance_service, queue_size=100, heartbeat=15,
+                 aligner=None):
+        self.snapshot_loader = snapshot_loader  # portfolio_id -> liste de positions
+        self.returns_loader = returns_loader  # symbole -> rendements journaliers
+        # Liste de rendements -> matrice N×T alignée (jointure sur les dates pour des séries datées)
+        self.aligner = aligner or self._align_tail
+        self.covariance_service = covariance_service
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        self.channels = {}
+        self._lock = threading.Lock()
+        self._build_locks = {}  # portfolio_id -> verrou du calcul initial du canal
+        metrics.register_gauge('dashboard_channels', lambda: len(self.channels))
+        metrics.register_gauge('dashboard_subscribers',
+                               lambda: sum(len(c.subscribers) for c in list(self.channels.values())))
+
+    def subscribe(self, portfolio_id):
+        """Abonne un client; le premier abonné déclenche le seul calcul complet"""
+        channel = self.channels.get(portfolio_id)
+        if channel is None:
+            with self._lock:
+                build_lock = self._build_locks.setdefault(portfolio_id, threading.Lock())
+            # Verrou par portefeuille: les premiers abonnés concurrents attendent le même calcul, et le
+            # téléchargement des historiques ne bloque pas les autres portefeuilles
+            with build_lock:
+                channel = self.channels.get(portfolio_id)
+                if channel is None:
+                    channel = self._build_channel(portfolio_id)
+                return self._attach(portfolio_id, channel)
+        return self._attach(portfolio_id, channel)
+
+    def _attach(self, portfolio_id, channel):
+        with self._lock:
+            channel = self.channels.setdefault(portfolio_id, channel)
+            subscriber = queue.Queue(maxsize=self.queue_size)
+            subscriber.put_nowait(f"event: snapshot\ndata: {json.dumps(channel.snapshot())}\n\n")
+            channel.subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, portfolio_id, subscriber):
+        with self._lock:
+            channel = self.channels.get(portfolio_id)
+            if channel is None:
+                return
+            if subscriber in channel.subscribers:
+                channel.subscribers.remove(subscriber)
+            if not channel.subscribers:
+                del self.channels[portfolio_id]
+                self._build_locks.pop(portfolio_id, None)
+
+    def update_position(self, portfolio_id, asset_id, value=None, quantity=None, price=None):
+        """Changement de position: recalcul incrémental puis diffusion des deltas (si quelqu'un regarde)"""
+        channel = self.channels.get(portfolio_id)
+        if channel is None:
+            return None
+        if asset_id not in channel.positions:
+            # Position inconnue du canal (ajoutée depuis son calcul): les deltas ne suffisent pas
+            self.refresh(portfolio_id)
+            return None
+        changes = channel.apply_position(asset_id, value=value, quantity=quantity, price=price)
+        if changes:
+            channel.publish('update', changes)
+        return changes
+
+    def refresh(self, portfolio_id):
+        """Positions ajoutées ou retirées: recalcul complet du canal suivi, abonnés conservés"""
+        if portfolio_id not in self.channels:
+            return None
+        with self._lock:
+            build_lock = self._build_locks.setdefault(portfolio_id, threading.Lock())
+        with build_lock:
+            channel = self._build_channel(portfolio_id)
+            with self._lock:
+                previous = self.channels.get(portfolio_id)
+                if previous is None:
+                    # Tous les abonnés sont partis pendant le calcul
+                    return None
+                channel.subscribers = previous.subscribers
+                channel.version = previous.version + 1
+                self.channels[portfolio_id] = channel
+        channel.publish('snapshot', channel.snapshot())
+        return channel
+
+    def stream(self, portfolio_id, subscriber):
+        """Générateur SSE; un commentaire périodique maintient la connexion ouverte"""
+        try:
+            while True:
+                try:
+                    yield subscriber.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+        finally:
+            self.unsubscribe(portfolio_id, subscriber)
+
+    def _build_channel(self, portfolio_id):
+        positions = self.snapshot_loader(portfolio_id)
+        symbols = sorted({p['symbol'] for p in positions})
+        covariance = None
+        if symbols:
+            with metrics.span('risk_kernel', kernel='dashboard_covariance'):
+                covariance = self.covariance_service.latest(symbols, 'ledoit_wolf')
+                if covariance is None or covariance.as_of != date.today():
+                    matrix = np.asarray(self.aligner([self.returns_loader(s) for s in symbols]), dtype=float).T
+                    covariance = self.covariance_service.get_covariance(symbols, matrix, 'ledoit_wolf')
+        return PortfolioChannel(portfolio_id, positions, covariance)
+
+    @staticmethod
+    def _align_tail(returns):
+        """Alignement par défaut des tableaux sans dates: historique récent de longueur commune"""
+        length = min(len(r) for r in returns)
+        return np.vstack([np.asarray(r, dtype=float)[-length:] for r in returns])
@@ -0,0 +1,118 @@
+import csv
+import io
+import json
+from datetime import datetime
+from itertools import islice
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+
+class _ChunkSink(io.RawIOBase):
+    """Flux binaire dont on récupère le contenu écrit au fur et à mesure (pour ParquetWriter)"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.buffer.extend(data)
+        return len(data)
+
+    def drain(self):
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+
+class StreamingExporter:
+    """Sérialisation en flux (CSV, NDJSON, Parquet) de lignes produites par un générateur"""
+
+    FORMATS = {
+        'csv': 'text/csv',
+        'ndjson': 'application/x-ndjson',
+        'parquet': 'application/vnd.apache.parquet',
+    }
+    ARROW_TYPES = {'string': 'string', 'float': 'float64', 'int': 'int64', 'timestamp': 'timestamp[us]'}
+
+    def __init__(self, fmt, columns, chunk_rows=5000):
+        """columns: liste de (nom, type) avec type parmi string, float, int, timestamp"""
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Format inconnu: {fmt}")
+        if fmt == 'parquet' and pq is None:
+            raise ValueError("Export Parquet indisponible: pyarrow n'est pas installé")
+        self.format = fmt
+        self.columns = list(columns)
+        self.names = [name for name, _ in self.columns]
+        self.chunk_rows = chunk_rows
+
+    @property
+    def mimetype(self):
+        return self.FORMATS[self.format]
+
+    def stream(self, rows):
+        """Générateur de morceaux: au plus chunk_rows lignes en mémoire à la fois"""
+        return getattr(self, f'_{self.format}')(rows)
+
+    def _chunks(self, rows):
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.chunk_rows))
+            if not chunk:
+                return
+            yield chunk
+
+    def _csv(self, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(self.names)
+        for chunk in self._chunks(rows):
+            writer.writerows([self._text(v) for v in row] for row in chunk)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    def _ndjson(self, rows):
+        for chunk in self._chunks(rows):
+            yield ''.join(
+                json.dumps({name: self._json(v) for name, v in zip(self.names, row)}, ensure_ascii=False) + '\n'
+                for row in chunk
+            )
+
+    def _parquet(self, rows):
+        schema = pa.schema([(name, self.ARROW_TYPES[kind]) for name, kind in self.columns])
+        sink = _ChunkSink()
+        # Un row group par bloc: le pied de fichier n'est écrit qu'à la fermeture
+        with pq.ParquetWriter(sink, schema, compression='zstd') as writer:
+            for chunk in self._chunks(rows):
+                arrays = [pa.array([row[i] for row in chunk], type=field.type) for i, field in enumerate(schema)]
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+                yield sink.drain()
+        yield sink.drain()
+
+    @staticmethod
+    def _text(value):
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            return ''
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return value
+
+    @staticmethod
+    def _json(value):
+        if isinstance(value, float) and np.isnan(value):
+            return None
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, np.generic):
+            return value.item()
+        return value
@@ -0,0 +1,190 @@
+import numpy as np
+from scipy import stats
+
+from services.covariance_service import CovarianceService
+
+
+class FactorRiskModel:
+    """Modèle de risque factoriel: Σ = B F Bᵀ + D, évalué en O(N·K + K²)"""
+
+    ASSET_TYPES = ('equity', 'bond', 'real_estate', 'commodities', 'credit', 'cash', 'other')
+    SECTORS = ('technology', 'financials', 'energy', 'healthcare', 'consumer', 'industrials', 'utilities')
+
+    # Volatilités totales typiques par type (mêmes ordres de grandeur que AdvancedRiskCalculator)
+    TYPE_VOLATILITIES = {
+        'equity': 0.20,
+        'bond': 0.08,
+        'real_estate': 0.12,
+        'commodities': 0.15,
+        'credit': 0.10,
+        'cash': 0.02,
+        'other': 0.10
+    }
+    SECTOR_VOLATILITY = 0.08  # Écart sectoriel au-delà du facteur actions
+    RATES_VOLATILITY = 0.01  # Variation annuelle des taux (100 pb) par année de duration
+    SPECIFIC_VOLATILITY_RATIO = 0.5  # Volatilité spécifique en proportion de la volatilité du type
+
+    # Corrélations entre facteurs de type (les paires absentes sont nulles)
+    TYPE_CORRELATIONS = {
+        ('equity', 'real_estate'): 0.6,
+        ('equity', 'commodities'): 0.3,
+        ('equity', 'credit'): 0.5,
+        ('real_estate', 'credit'): 0.4,
+        ('bond', 'credit'): 0.3
+    }
+    DEFAULT_DURATIONS = {'bond': 7.0, 'credit': 5.0}
+
+    def __init__(self, factor_covariance=None, specific_volatilities=None):
+        self.factor_names = (
+            [f'type:{t}' for t in self.ASSET_TYPES]
+            + [f'sector:{s}' for s in self.SECTORS]
+            + ['rates:duration']
+        )
+        self._type_index = {t: i for i, t in enumerate(self.ASSET_TYPES)}
+        self._sector_index = {s: len(self.ASSET_TYPES) + i for i, s in enumerate(self.SECTORS)}
+        self._rates_index = len(self.factor_names) - 1
+        factor_volatilities, default_specific = self.split_volatilities()
+        self.factor_covariance = (factor_covariance if factor_covariance is not None
+                                  else self.default_factor_covariance(factor_volatilities))
+        self.specific_volatilities = specific_volatilities or default_specific
+
+    @property
+    def n_factors(self):
+        return len(self.factor_names)
+
+    def split_volatilities(self):
+        """Répartit la volatilité totale de chaque type entre taux, facteur de type et risque spécifique
+
+        Pour les types à duration, le facteur de taux explique déjà D·σ_taux: le facteur de type ne porte
+        que le reste (écart de crédit), de sorte que la volatilité totale à la duration par défaut reste
+        celle de TYPE_VOLATILITIES au lieu d'additionner taux, type et spécifique.
+        """
+        factor_vols, specific_vols = {}, {}
+        for asset_type, vol in self.TYPE_VOLATILITIES.items():
+            rates_variance = (self.DEFAULT_DURATIONS.get(asset_type, 0.0) * self.RATES_VOLATILITY) ** 2
+            residual = max(vol ** 2 - rates_variance, 0.0)
+            specific_variance = min((vol * self.SPECIFIC_VOLATILITY_RATIO) ** 2, residual)
+            specific_vols[asset_type] = float(np.sqrt(specific_variance))
+            factor_vols[asset_type] = float(np.sqrt(residual - specific_variance))
+        return factor_vols, specific_vols
+
+    def default_factor_covariance(self, factor_volatilities=None):
+        """Matrice K×K construite à partir des volatilités et corrélations par défaut"""
+        factor_volatilities = factor_volatilities or self.split_volatilities()[0]
+        vols = np.array(
+            [factor_volatilities[t] for t in self.ASSET_TYPES]
+            + [self.SECTOR_VOLATILITY] * len(self.SECTORS)
+            + [self.RATES_VOLATILITY]
+        )
+        correlation = np.eye(vols.size)
+        for (a, b), rho in self.TYPE_CORRELATIONS.items():
+            i, j = self._type_index[a], self._type_index[b]
+            correlation[i, j] = correlation[j, i] = rho
+        return correlation * np.outer(vols, vols)
+
+    def calibrate(self, factor_returns, method='ledoit_wolf', annualization=252):
+        """Estime la covariance des facteurs à partir d'une matrice T×K de rendements journaliers"""
+        factor_returns = np.asarray(factor_returns, dtype=float)
+        if factor_returns.shape[1] != self.n_factors:
+            raise ValueError(f"{self.n_factors} facteurs attendus, {factor_returns.shape[1]} reçus")
+        if method == 'ledoit_wolf':
+            matrix, _ = CovarianceService.ledoit_wolf_covariance(factor_returns)
+        elif method == 'ewma':
+            matrix = CovarianceService.ewma_covariance(factor_returns)
+        else:
+            matrix = CovarianceService.sample_covariance(factor_returns)
+        self.factor_covariance = matrix * annualization
+        return self.factor_covariance
+
+    def exposures_from_arrays(self, asset_types, sectors=None, durations=None):
+        """Construit les expositions N×K et les variances spécifiques sans boucle par actif"""
+        asset_types = np.asarray(asset_types, dtype=object)
+        n = asset_types.size
+        known_types = np.isin(asset_types, self.ASSET_TYPES)
+        asset_types = np.where(known_types, asset_types, 'other')
+
+        type_codes = np.fromiter((self._type_index[t] for t in asset_types), dtype=np.intp, count=n)
+        exposures = np.zeros((n, self.n_factors))
+        rows = np.arange(n)
+        exposures[rows, type_codes] = 1.0
+
+        if sectors is not None:
+            sector_codes = np.fromiter((self._sector_index.get(s, -1) for s in sectors), dtype=np.intp, count=n)
+            has_sector = sector_codes >= 0
+            exposures[rows[has_sector], sector_codes[has_sector]] = 1.0
+
+        default_durations = np.fromiter(
+            (self.DEFAULT_DURATIONS.get(t, 0.0) for t in asset_types), dtype=float, count=n
+        )
+        if durations is not None:
+            durations = np.asarray(durations, dtype=float)
+            durations = np.where(np.isnan(durations), default_durations, durations)
+        else:
+            durations = default_durations
+        # Une hausse des taux fait baisser la valeur des actifs à duration positive
+        exposures[:, self._rates_index] = -durations
+
+        specific_vols = np.array([self.specific_volatilities.get(t, 0.05) for t in self.ASSET_TYPES])
+        specific_variances = specific_vols[type_codes] ** 2
+        return exposures, specific_variances
+
+    def exposures_for_portfolio(self, portfolio):
+        """Expositions et poids en valeur d'un portefeuille (attributs sector/duration optionnels)"""
+        assets = portfolio.assets
+        values = np.array([asset.current_value or (asset.quantity * asset.purchase_price) for asset in assets], dtype=float)
+        exposures, specific_variances = self.exposures_from_arrays(
+            [asset.asset_type for asset in assets],
+            [getattr(asset, 'sector', None) for asset in assets],
+            [getattr(asset, 'duration', None) if getattr(asset, 'duration', None) is not None else np.nan
+             for asset in assets]
+        )
+        return values, exposures, specific_variances
+
+    def decompose(self, weights, exposures, specific_variances):
+        """Variance du portefeuille et contributions au risque de chaque facteur"""
+        weights = np.asarray(weights, dtype=float)
+        factor_exposure = exposures.T @ weights  # O(N·K)
+        factor_covariance_times_x = self.factor_covariance @ factor_exposure  # O(K²)
+        factor_variance = float(factor_exposure @ factor_covariance_times_x)
+        specific_variance = float(np.dot(weights ** 2, specific_variances))
+        total_variance = factor_variance + specific_variance
+        volatility = float(np.sqrt(max(total_variance, 0.0)))
+
+        # Contribution d'Euler: x_k (F x)_k / σ, la somme redonne la volatilité totale
+        contributions = factor_exposure * factor_covariance_times_x / volatility if volatility > 0 else np.zeros_like(factor_exposure)
+        return {
+            'volatility': volatility,
+            'factor_variance': factor_variance,
+            'specific_variance': specific_variance,
+            'factor_exposures': {
+                name: float(x) for name, x in zip(self.factor_names, factor_exposure) if x != 0
+            },
+            'factor_contributions': {
+                name: float(c) for name, c in zip(self.factor_names, contributions) if c != 0
+            },
+            'specific_contribution': specific_variance / volatility if volatility > 0 else 0.0
+        }
+
+    def portfolio_volatility(self, portfolio):
+        """Volatilité relative (en fraction de la valeur) du portefeuille"""
+        values, exposures, specific_variances = self.exposures_for_portfolio(portfolio)
+        total_value = values.sum()
+        if total_value <= 0:
+            return 0.0
+        return self.decompose(values / total_value, exposures, specific_variances)['volatility']
+
+    def calculate_var(self, values, exposures, specific_variances, confidence=0.95, horizon=1):
+        """VaR paramétrique rapide pour de très grands portefeuilles (tableaux de positions)"""
+        values = np.asarray(values, dtype=float)
+        total_value = values.sum()
+        if total_value <= 0:
+            return {'var': 0, 'volatility': 0, 'factor_contributions': {}}
+        risk = self.decompose(values / total_value, exposures, specific_variances)
+        z_score = stats.norm.ppf(1 - confidence)
+        var = total_value * z_score * risk['volatility'] * np.sqrt(horizon)
+        return {
+            'var': abs(round(var, 2)),
+            'volatility': round(risk['volatility'], 6),
+            'factor_contributions': {k: round(v, 6) for k, v in risk['factor_contributions'].items()},
+            'specific_contribution': round(risk['specific_contribution'], 6)
+        }
@@ -0,0 +1,115 @@
+import numpy as np
+from scipy.signal import lfilter
+
+
+class HistoricalSimulationEngine:
+    """Moteur de VaR par simulation historique (simple, pondérée par l'âge, filtrée)"""
+
+    METHODS = ('historical', 'age_weighted', 'filtered')
+
+    def __init__(self, method='historical', decay=0.98, ewma_lambda=0.94):
+        if method not in self.METHODS:
+            raise ValueError(f"Méthode inconnue: {method}")
+        self.method = method
+        self.decay = decay  # Facteur de décroissance BRW (Boudoukh-Richardson-Whitelaw)
+        self.ewma_lambda = ewma_lambda  # Lambda RiskMetrics pour le filtrage FHS
+
+    def compute(self, returns, confidence_levels=(0.95,), horizon=1):
+        """Calcule VaR et ES (en rendement positif) pour plusieurs niveaux de confiance"""
+        scenarios, weights = self.scenarios(returns, horizon)
+        if scenarios.size == 0:
+            return {c: (0.0, 0.0) for c in confidence_levels}
+        if weights is not None:
+            return self.weighted_tail_metrics(scenarios, weights, confidence_levels)
+        return self.tail_metrics(scenarios, confidence_levels)
+
+    def scenarios(self, returns, horizon=1):
+        """Scénarios de rendement sur l'horizon et leurs poids (None si équipondérés)"""
+        returns = np.asarray(returns, dtype=float)
+        returns = returns[np.isfinite(returns)]
+        if returns.size == 0:
+            return returns, None
+
+        if self.method == 'filtered':
+            returns = self.filter_returns(returns)
+
+        scenarios = self.aggregate_horizon(returns, horizon)
+        weights = self.age_weights(scenarios.size) if self.method == 'age_weighted' else None
+        return scenarios, weights
+
+    @staticmethod
+    def aggregate_horizon(returns, horizon):
+        """Agrège les rendements journaliers en rendements réels sur fenêtres glissantes"""
+        horizon = max(int(horizon), 1)
+        if horizon == 1:
+            return returns
+        if returns.size <= horizon:
+            raise ValueError(f"Historique trop court ({returns.size} jours) pour un horizon de {horizon} jours")
+        # Composition via sommes cumulées des log-rendements: O(n) pour toutes les fenêtres
+        cumulative = np.concatenate(([0.0], np.cumsum(np.log1p(returns))))
+        return np.expm1(cumulative[horizon:] - cumulative[:-horizon])
+
+    def filter_returns(self, returns):
+        """Filtre les rendements par la volatilité EWMA et les remet à l'échelle actuelle (FHS)"""
+        lam = self.ewma_lambda
+        squared = returns ** 2
+        seed = squared[:min(30, squared.size)].mean()
+        # sigma²_t = lambda * sigma²_{t-1} + (1 - lambda) * r²_{t-1}, évaluée sans boucle Python
+        shifted = np.concatenate(([seed], squared[:-1]))
+        variance, _ = lfilter([1 - lam], [1, -lam], shifted, zi=[lam * seed])
+        variance = np.maximum(variance, 1e-12)
+        current_variance = lam * variance[-1] + (1 - lam) * squared[-1]
+        return returns / np.sqrt(variance) * np.sqrt(current_variance)
+
+    def age_weights(self, n):
+        """Poids BRW: les observations récentes (fin du tableau) pèsent davantage"""
+        lam = self.decay
+        if lam >= 1:
+            return np.full(n, 1.0 / n)
+        ages = np.arange(n - 1, -1, -1)
+        return lam ** ages * (1 - lam) / (1 - lam ** n)
+
+    @staticmethod
+    def _tail_index(n, confidence):
+        return min(max(int(np.ceil(round(n * (1 - confidence), 9))) - 1, 0), n - 1)
+
+    @classmethod
+    def tail_metrics(cls, scenarios, confidence_levels):
+        """VaR/ES par sélection (np.partition): un seul passage linéaire pour tous les niveaux"""
+        n = scenarios.size
+        indices = sorted({cls._tail_index(n, c) for c in confidence_levels})
+        partitioned = np.partition(scenarios, indices)
+
+        # Les éléments à gauche de chaque indice sont tous inférieurs: l'ES est une moyenne de préfixe
+        results = {}
+        for confidence in confidence_levels:
+            k = cls._tail_index(n, confidence)
+            var = -partitioned[k]
+            es = -partitioned[:k + 1].mean()
+            results[confidence] = (float(var), float(es))
+        return results
+
+    @staticmethod
+    def weighted_tail_metrics(scenarios, weights, confidence_levels):
+        """VaR/ES pondérées: seule la queue de distribution est triée"""
+        n = scenarios.size
+        tail_probability = 1 - min(confidence_levels)
+        size = min(n, max(int(np.ceil(2 * tail_probability * n)) + 1, 16))
+
+        while True:
+            candidates = np.argpartition(scenarios, size - 1)[:size] if size < n else np.arange(n)
+            order = candidates[np.argsort(scenarios[candidates], kind='stable')]
+            cumulative = np.cumsum(weights[order])
+            if cumulative[-1] >= tail_probability or size == n:
+                break
+            size = min(n, size * 2)
+
+        results = {}
+        for confidence in confidence_levels:
+            alpha = 1 - confidence
+            k = min(int(np.searchsorted(cumulative, alpha)), order.size - 1)
+            var = -scenarios[order[k]]
+            tail_weights = weights[order[:k + 1]]
+            es = -np.dot(scenarios[order[:k + 1]], tail_weights) / tail_weights.sum()
+            results[confidence] = (float(var), float(es))
+        return results
@@ -0,0 +1,189 @@
+import numpy as np
+
+
+class TDigest:
+    """Sketch de quantiles fusionnable (t-digest, fonction d'échelle k1, compression vectorisée)"""
+
+    def __init__(self, compression=1000, buffer_size=None):
+        self.compression = compression
+        self.buffer_size = buffer_size or 10 * compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self._buffer = []
+        self._buffered = 0
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        """Ajoute un tableau de valeurs (poids unitaire)"""
+        values = np.asarray(values, dtype=float).ravel()
+        if values.size == 0:
+            return self
+        self._buffer.append(values)
+        self._buffered += values.size
+        self.count += values.size
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        if self._buffered >= self.buffer_size:
+            self._compress()
+        return self
+
+    def merge(self, other):
+        """Fusionne un autre digest (par exemple celui d'un worker parallèle)"""
+        other._compress()
+        self._compress()
+        self.means = np.concatenate((self.means, other.means))
+        self.weights = np.concatenate((self.weights, other.weights))
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(force=True)
+        return self
+
+    def quantile(self, q):
+        """Quantile approché par interpolation entre centroïdes"""
+        self._compress()
+        if self.count == 0:
+            return 0.0
+        if self.means.size == 1:
+            return float(self.means[0])
+        cumulative = np.cumsum(self.weights)
+        centers = cumulative - self.weights / 2
+        positions = np.concatenate(([0.0], centers, [self.count]))
+        values = np.concatenate(([self.min], self.means, [self.max]))
+        return float(np.interp(q * self.count, positions, values))
+
+    def lower_tail_mean(self, q):
+        """Moyenne approchée des valeurs sous le quantile q"""
+        self._compress()
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        cumulative = np.cumsum(self.weights)
+        previous = cumulative - self.weights
+        # Poids de chaque centroïde situé sous le seuil (fraction pour le centroïde à cheval)
+        included = np.clip(target - previous, 0, self.weights)
+        if included.sum() == 0:
+            return float(self.min)
+        return float(np.dot(included, self.means) / included.sum())
+
+    def _compress(self, force=False):
+        if not self._buffer and not force:
+            return
+        means = np.concatenate([self.means] + self._buffer)
+        weights = np.concatenate([self.weights] + [np.ones(b.size) for b in self._buffer])
+        self._buffer = []
+        self._buffered = 0
+        if means.size == 0:
+            return
+
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        # Affectation de chaque point à un groupe floor(k1(q)): les groupes sont étroits dans les queues
+        q_center = (np.cumsum(weights) - weights / 2) / total
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q_center - 1)
+        groups = np.floor(k).astype(np.int64)
+        starts = np.flatnonzero(np.concatenate(([True], groups[1:] != groups[:-1])))
+
+        merged_weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / merged_weights
+        self.weights = merged_weights
+
+
+class StreamingLossAggregator:
+    """Agrégation en flux de P&L de portefeuille: quantiles par t-digest, queue exacte pour l'ES"""
+
+    def __init__(self, confidence_levels=(0.95, 0.99), compression=1000, tail_capacity=100_000):
+        self.confidence_levels = tuple(sorted(confidence_levels))
+        self.tail_capacity = tail_capacity
+        self.digest = TDigest(compression)
+        self._tail = np.empty(0)  # Pertes les plus élevées observées (valeurs positives)
+        self._trimmed = False  # Après un élagage, seules les tail_capacity premières pertes sont garanties
+        self.count = 0
+        self.total = 0.0
+
+    def update(self, pnl_chunk):
+        """Consomme un bloc de P&L (négatif = perte)"""
+        pnl = np.asarray(pnl_chunk, dtype=float).ravel()
+        pnl = pnl[np.isfinite(pnl)]
+        if pnl.size == 0:
+            return self
+        self.digest.update(pnl)
+        self.count += pnl.size
+        self.total += float(pnl.sum())
+        self._add_to_tail(-pnl)
+        return self
+
+    def consume(self, chunks):
+        """Consomme tous les blocs d'un générateur sans les conserver"""
+        for chunk in chunks:
+            self.update(chunk)
+        return self
+
+    def merge(self, other):
+        """Fusionne l'agrégateur partiel d'un autre worker"""
+        self.digest.merge(other.digest)
+        self.count += other.count
+        self.total += other.total
+        self._trimmed = self._trimmed or other._trimmed
+        self._add_to_tail(other._tail)
+        return self
+
+    @classmethod
+    def merge_all(cls, aggregators):
+        aggregators = list(aggregators)
+        merged = cls(aggregators[0].confidence_levels, aggregators[0].digest.compression,
+                     aggregators[0].tail_capacity)
+        for aggregator in aggregators:
+            merged.merge(aggregator)
+        return merged
+
+    def tail_metrics(self, confidence):
+        """VaR et ES (pertes positives) au niveau donné, exactes tant que la queue tient dans le tampon"""
+        if self.count == 0:
+            return 0.0, 0.0
+        if self.is_exact(confidence):
+            k = self._tail_rank(confidence)
+            worst = -np.partition(-self._tail, k - 1)[:k]
+            return float(worst.min()), float(worst.mean())
+        alpha = 1 - confidence
+        return -self.digest.quantile(alpha), -self.digest.lower_tail_mean(alpha)
+
+    def is_exact(self, confidence):
+        """Vrai si les pertes au-delà de la VaR sont toutes présentes dans le tampon de queue"""
+        # Le tampon peut dépasser tail_capacity entre deux élagages, mais au-delà du rang tail_capacity
+        # il mélange le haut de la distribution déjà élaguée et des blocs récents non triés
+        exact_size = min(self._tail.size, self.tail_capacity) if self._trimmed else self._tail.size
+        return self._tail_rank(confidence) <= exact_size
+
+    def _tail_rank(self, confidence):
+        return max(int(np.ceil(round(self.count * (1 - confidence), 9))), 1)
+
+    def result(self, confidence=0.95):
+        """Résultat au format de calculate_var: {'var', 'cvar', ...}"""
+        levels = sorted(set(self.confidence_levels) | {confidence})
+        metrics = {c: self.tail_metrics(c) for c in levels}
+        var, cvar = metrics[confidence]
+        return {
+            'var': round(abs(var), 2), 'cvar': round(abs(cvar), 2),
+            'method': 'streaming', 'confidence_level': confidence,
+            'n_scenarios': self.count,
+            'mean_pnl': round(self.total / self.count, 2) if self.count else 0,
+            'levels': {str(c): {'var': round(abs(v), 2), 'cvar': round(abs(es), 2)} for c, (v, es) in metrics.items()}
+        }
+
+    def _add_to_tail(self, losses):
+        if losses.size == 0:
+            return
+        self._tail = np.concatenate((self._tail, losses))
+        # Élagage amorti: on ne partitionne que lorsque le tampon double
+        if self._tail.size > 2 * self.tail_capacity:
+            self._trim_tail()
+
+    def _trim_tail(self):
+        if self._tail.size > self.tail_capacity:
+            keep = self._tail.size - self.tail_capacity
+            self._tail = np.partition(self._tail, keep)[keep:]
+            self._trimmed = True
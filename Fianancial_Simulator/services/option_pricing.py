@@ -0,0 +1,153 @@
+import time
+
+import numpy as np
+from scipy.special import ndtr
+
+from services.historical_simulation import HistoricalSimulationEngine
+from services.risk_kernels import revalue_scenarios
+
+_INV_SQRT_2PI = 1.0 / np.sqrt(2.0 * np.pi)
+
+
+def _d1_d2(spot, strike, maturity, rate, volatility, dividend):
+    maturity = np.maximum(maturity, 1e-10)
+    vol_sqrt_t = np.maximum(volatility * np.sqrt(maturity), 1e-12)
+    d1 = (np.log(spot / strike) + (rate - dividend + 0.5 * volatility ** 2) * maturity) / vol_sqrt_t
+    return d1, d1 - vol_sqrt_t, maturity, vol_sqrt_t
+
+
+def black_scholes_price(spot, strike, maturity, rate, volatility, is_call, dividend=0.0):
+    """Prix Black-Scholes vectorisé (tous les arguments sont diffusés par NumPy)"""
+    d1, d2, maturity, _ = _d1_d2(spot, strike, maturity, rate, volatility, dividend)
+    discounted_spot = spot * np.exp(-dividend * maturity)
+    discounted_strike = strike * np.exp(-rate * maturity)
+    call = discounted_spot * ndtr(d1) - discounted_strike * ndtr(d2)
+    # Parité call-put: évite un second passage sur les fonctions de répartition
+    put = call - discounted_spot + discounted_strike
+    return np.where(is_call, call, put)
+
+
+def black_scholes_greeks(spot, strike, maturity, rate, volatility, is_call, dividend=0.0):
+    """Delta, gamma, vega et theta (annuel) vectorisés"""
+    d1, d2, maturity, vol_sqrt_t = _d1_d2(spot, strike, maturity, rate, volatility, dividend)
+    dividend_discount = np.exp(-dividend * maturity)
+    rate_discount = np.exp(-rate * maturity)
+    pdf_d1 = _INV_SQRT_2PI * np.exp(-0.5 * d1 ** 2)
+    cdf_d1, cdf_d2 = ndtr(d1), ndtr(d2)
+
+    delta = np.where(is_call, dividend_discount * cdf_d1, dividend_discount * (cdf_d1 - 1))
+    gamma = dividend_discount * pdf_d1 / (spot * vol_sqrt_t)
+    vega = spot * dividend_discount * pdf_d1 * np.sqrt(maturity)
+    common = -spot * dividend_discount * pdf_d1 * volatility / (2 * np.sqrt(maturity))
+    theta_call = common - rate * strike * rate_discount * cdf_d2 + dividend * spot * dividend_discount * cdf_d1
+    theta_put = common + rate * strike * rate_discount * (1 - cdf_d2) - dividend * spot * dividend_discount * (1 - cdf_d1)
+    theta = np.where(is_call, theta_call, theta_put)
+    return {'delta': delta, 'gamma': gamma, 'vega': vega, 'theta': theta}
+
+
+class OptionBook:
+    """Positions optionnelles (et linéaires) sous forme de tableaux colonnes"""
+
+    def __init__(self, quantity, underlying_index, strike, maturity, volatility, is_call,
+                 is_option=None, rate=0.02, dividend=0.0):
+        self.quantity = np.asarray(quantity, dtype=float)
+        self.underlying_index = np.asarray(underlying_index, dtype=np.intp)
+        self.is_option = np.ones(self.quantity.size, dtype=bool) if is_option is None else np.asarray(is_option, dtype=bool)
+        # Paramètres neutres pour les positions linéaires: leur valeur est le spot, jamais le prix BS
+        self.strike = np.where(self.is_option, np.asarray(strike, dtype=float), 1.0)
+        self.maturity = np.where(self.is_option, np.asarray(maturity, dtype=float), 1.0)
+        self.volatility = np.where(self.is_option, np.asarray(volatility, dtype=float), 0.2)
+        self.is_call = np.asarray(is_call, dtype=bool)
+        # Taux sans risque par position (un scalaire s'applique à tout le livre)
+        self.rate = np.broadcast_to(np.asarray(rate, dtype=float), self.quantity.shape).copy()
+        self.dividend = dividend
+
+    def __len__(self):
+        return self.quantity.size
+
+    def values(self, spots, time_shift=0.0):
+        """Valeur unitaire de chaque position; spots de forme (..., U) -> (..., P)"""
+        spot = np.asarray(spots)[..., self.underlying_index]
+        maturity = np.maximum(self.maturity - time_shift, 0.0)
+        option_value = black_scholes_price(spot, self.strike, maturity, self.rate, self.volatility,
+                                           self.is_call, self.dividend)
+        return np.where(self.is_option, option_value, spot)
+
+
+class OptionRiskEngine:
+    """VaR d'un portefeuille d'options: approximation delta-gamma et réévaluation complète"""
+
+    def __init__(self, book, spots, underlying_volatilities, correlation=None, seed=None):
+        self.book = book
+        self.spots = np.asarray(spots, dtype=float)
+        self.underlying_volatilities = np.asarray(underlying_volatilities, dtype=float)
+        n = self.spots.size
+        self.correlation = np.eye(n) if correlation is None else np.asarray(correlation, dtype=float)
+        self.rng = np.random.default_rng(seed)
+
+    def simulate_log_returns(self, n_scenarios, horizon_days=1):
+        """Log-rendements corrélés des sous-jacents sur l'horizon (S×U)"""
+        dt = horizon_days / 252
+        cholesky = np.linalg.cholesky(self.correlation)
+        shocks = self.rng.standard_normal((n_scenarios, self.spots.size)) @ cholesky.T
+        vols = self.underlying_volatilities
+        return -0.5 * vols ** 2 * dt + vols * np.sqrt(dt) * shocks
+
+    def aggregate_greeks(self):
+        """Delta et gamma dollar agrégés par sous-jacent (pour l'approximation delta-gamma)"""
+        book = self.book
+        spot = self.spots[book.underlying_index]
+        greeks = black_scholes_greeks(spot, book.strike, book.maturity, book.rate, book.volatility,
+                                      book.is_call, book.dividend)
+        delta = np.where(book.is_option, greeks['delta'], 1.0) * book.quantity
+        gamma = np.where(book.is_option, greeks['gamma'], 0.0) * book.quantity
+        theta = np.where(book.is_option, greeks['theta'], 0.0) * book.quantity
+        n = self.spots.size
+        return (np.bincount(book.underlying_index, delta, minlength=n),
+                np.bincount(book.underlying_index, gamma, minlength=n),
+                float(theta.sum()))
+
+    def delta_gamma_pnl(self, log_returns, horizon_days=1):
+        """P&L approché: θ·dt + Σ δ·ΔS + ½ Σ γ·ΔS², en O(S·U) sans réévaluation"""
+        delta, gamma, theta = self.aggregate_greeks()
+        price_moves = self.spots * np.expm1(log_returns)
+        return theta * horizon_days / 252 + price_moves @ delta + 0.5 * (price_moves ** 2) @ gamma
+
+    def full_revaluation_pnl(self, log_returns, horizon_days=1, chunk_size=2048):
+        """P&L exact par réévaluation Black-Scholes de toutes les positions (noyau compilé si disponible)"""
+        return revalue_scenarios(self.book, self.spots, log_returns, horizon_days / 252, chunk_size)
+
+    def calculate_var(self, method='delta_gamma', confidence_levels=(0.95, 0.99), n_scenarios=10_000,
+                      horizon_days=1, log_returns=None):
+        """VaR/ES (montants positifs) par niveau de confiance"""
+        if log_returns is None:
+            log_returns = self.simulate_log_returns(n_scenarios, horizon_days)
+        if method == 'delta_gamma':
+            pnl = self.delta_gamma_pnl(log_returns, horizon_days)
+        elif method == 'full_revaluation':
+            pnl = self.full_revaluation_pnl(log_returns, horizon_days)
+        else:
+            raise ValueError(f"Méthode inconnue: {method}")
+        return HistoricalSimulationEngine.tail_metrics(pnl, confidence_levels)
+
+    def compare_methods(self, confidence_levels=(0.95, 0.99), n_scenarios=10_000, horizon_days=1):
+        """Compare vitesse et précision des deux méthodes sur les mêmes scénarios"""
+        log_returns = self.simulate_log_returns(n_scenarios, horizon_days)
+        report = {}
+        for method in ('delta_gamma', 'full_revaluation'):
+            start = time.perf_counter()
+            metrics = self.calculate_var(method, confidence_levels, horizon_days=horizon_days, log_returns=log_returns)
+            report[method] = {
+                'seconds': time.perf_counter() - start,
+                'levels': {c: {'var': v, 'es': es} for c, (v, es) in metrics.items()}
+            }
+
+        full = report['full_revaluation']
+        approx = report['delta_gamma']
+        report['speedup'] = full['seconds'] / approx['seconds'] if approx['seconds'] > 0 else None
+        report['relative_error'] = {
+            c: abs(approx['levels'][c]['var'] - full['levels'][c]['var']) / full['levels'][c]['var']
+            if full['levels'][c]['var'] else 0.0
+            for c in confidence_levels
+        }
+        return report
@@ -6,11 +6,17 @@ from reportlab.lib.units import inch
 from datetime import datetime
 import os
 
+from utils.logger import get_logger
+from utils.metrics import metrics
+
+logger = get_logger(__name__)
+
 
 class PDFReportGenerator:
     def __init__(self):
         self.styles = getSampleStyleSheet()
 
+    @metrics.timed('pdf_render', generator='report')
     def generate_simulation_report(self, simulation_data, output_path):
         """Génère un rapport PDF pour une simulation - CORRIGÉ POUR LE FUSEAU HORAIRE"""
         try:
@@ -77,7 +83,8 @@ class PDFReportGenerator:
             return True
 
         except Exception as e:
-            print(f"❌ Erreur génération PDF: {e}")
+            logger.error(f"Erreur génération PDF: {e}")
+            metrics.fallback('pdf_generator.report')
             return False
 
     def _create_simulation_info(self, simulation_data):
@@ -2,11 +2,23 @@ import numpy as np
 from scipy import stats
 import random
 
+from services.credit_risk import CreditPortfolio, CreditRiskEngine
+from services.factor_model import FactorRiskModel
+from utils.logger import get_logger
+from utils.metrics import metrics
+
+logger = get_logger(__name__)
+
 
 class AdvancedRiskCalculator:
-    def __init__(self, data_service):
+    # Calibrage Solvabilité II du risque de contrepartie
+    COUNTERPARTY_CONFIDENCE = 0.995
+
+    def __init__(self, data_service, factor_model=None):
         self.data_service = data_service
+        self.factor_model = factor_model or FactorRiskModel()
 
+    @metrics.timed('risk_kernel', kernel='parametric_var')
     def calculate_var(self, portfolio, confidence=0.95, horizon=1):
         """Calcule la Value at Risk - CORRIGÉE"""
         try:
@@ -14,45 +26,32 @@ class AdvancedRiskCalculator:
             if total_value <= 0:
                 return 0
 
-            # Simulation plus réaliste basée sur la composition du portefeuille
-            portfolio_volatility = self._calculate_portfolio_volatility(portfolio)
+            # Modèle factoriel quelle que soit la taille (O(N·K)): la VaR ne change pas de modèle avec le
+            # nombre d'actifs, et les corrélations entre types sont prises en compte
+            portfolio_volatility = self.factor_model.portfolio_volatility(portfolio)
             z_score = stats.norm.ppf(1 - confidence)
             var = total_value * z_score * portfolio_volatility * np.sqrt(horizon)
 
             return abs(round(var, 2))
         except Exception as e:
-            print(f"Erreur calcul VaR: {e}")
+            logger.error(f"Erreur calcul VaR: {e}")
+            metrics.fallback('risk_calculator.var')
             # Fallback basé sur la valeur du portefeuille
             return round(portfolio.total_value * 0.05, 2)
 
-    def _calculate_portfolio_volatility(self, portfolio):
-        """Calcule la volatilité du portefeuille basée sur ses actifs"""
-        try:
-            # Volatilités typiques par type d'actif
-            volatility_weights = {
-                'equity': 0.20,  # 20% volatilité pour les actions
-                'bond': 0.08,  # 8% pour les obligations
-                'real_estate': 0.12,  # 12% pour l'immobilier
-                'commodities': 0.15,  # 15% pour les matières premières
-                'credit': 0.10,  # 10% pour le crédit
-                'cash': 0.02,  # 2% pour les liquidités
-                'other': 0.10  # 10% par défaut
-            }
-
-            total_value = portfolio.total_value
-            if total_value <= 0:
-                return 0.02  # Volatilité par défaut
-
-            weighted_volatility = 0
-            for asset in portfolio.assets:
-                asset_vol = volatility_weights.get(asset.asset_type, 0.10)
-                weight = (asset.current_value or 0) / total_value
-                weighted_volatility += weight * asset_vol
-
-            return weighted_volatility
-
-        except Exception:
-            return 0.02  # Volatilité par défaut en cas d'erreur
+    def calculate_factor_risk(self, portfolio):
+        """Décompose le risque du portefeuille par facteur (type, secteur, duration)"""
+        values, exposures, specific_variances = self.factor_model.exposures_for_portfolio(portfolio)
+        total_value = values.sum()
+        if total_value <= 0:
+            return {'volatility': 0, 'factor_contributions': {}, 'specific_contribution': 0}
+        risk = self.factor_model.decompose(values / total_value, exposures, specific_variances)
+        return {
+            'volatility': round(risk['volatility'], 6),
+            'factor_exposures': {k: round(v, 6) for k, v in risk['factor_exposures'].items()},
+            'factor_contributions': {k: round(v, 6) for k, v in risk['factor_contributions'].items()},
+            'specific_contribution': round(risk['specific_contribution'], 6)
+        }
 
     def calculate_expected_shortfall(self, portfolio, confidence=0.95):
         """Calcule l'Expected Shortfall (CVaR) - CORRIGÉE"""
@@ -62,8 +61,10 @@ class AdvancedRiskCalculator:
             es_multiplier = 1.25 + (random.uniform(0, 0.1))  # Entre 1.25 et 1.35
             return round(var * es_multiplier, 2)
         except Exception:
+            metrics.fallback('risk_calculator.expected_shortfall')
             return round(portfolio.total_value * 0.065, 2)  # Fallback
 
+    @metrics.timed('risk_kernel', kernel='stress_test')
     def stress_test(self, portfolio, scenario):
         """Effectue un test de stress sur le portefeuille"""
         try:
@@ -97,7 +98,8 @@ class AdvancedRiskCalculator:
                 'scenario_name': scenario.name
             }
         except Exception as e:
-            print(f"Erreur stress test: {e}")
+            logger.error(f"Erreur stress test: {e}")
+            metrics.fallback('risk_calculator.stress_test')
             return {
                 'total_loss': round(portfolio.total_value * 0.15, 2),
                 'remaining_value': round(portfolio.total_value * 0.85, 2),
@@ -106,6 +108,7 @@ class AdvancedRiskCalculator:
                 'scenario_name': scenario.name
             }
 
+    @metrics.timed('risk_kernel', kernel='solvency_ii')
     def calculate_solvency_ii(self, portfolio):
         """Calcule les exigences Solvabilité II - CORRIGÉE"""
         try:
@@ -135,7 +138,8 @@ class AdvancedRiskCalculator:
                 'counterparty_risk': round(counterparty_risk, 2)
             }
         except Exception as e:
-            print(f"Erreur calcul Solvabilité II: {e}")
+            logger.error(f"Erreur calcul Solvabilité II: {e}")
+            metrics.fallback('risk_calculator.solvency_ii')
             # Fallback basé sur la valeur du portefeuille
             return {
                 'scr': round(portfolio.total_value * 0.3, 2),
@@ -167,6 +171,7 @@ class AdvancedRiskCalculator:
 
             return total_market_risk
         except Exception:
+            metrics.fallback('risk_calculator.market_risk')
             return portfolio.total_value * 0.25
 
     def _calculate_underwriting_risk(self, portfolio):
@@ -181,6 +186,17 @@ class AdvancedRiskCalculator:
         return risky_value * 0.10
 
     def _calculate_counterparty_risk(self, portfolio):
-        """Calcule le risque de contrepartie"""
-        # Simplifié: 5% de la valeur totale
-        return portfolio.total_value * 0.05
\ No newline at end of file
+        """Calcule le risque de contrepartie: perte de défaut inattendue à 99,5% (copule gaussienne)"""
+        try:
+            credit_portfolio = CreditPortfolio.from_assets(portfolio.assets)
+            if credit_portfolio is None:
+                return 0.0
+
+            # Formule asymptotique de Vasicek en O(N) quelle que soit la taille: un seul modèle, sans
+            # simulation sur le chemin de calcul du SCR (la simulation reste disponible via credit_var)
+            var = CreditRiskEngine(credit_portfolio).asymptotic_var(self.COUNTERPARTY_CONFIDENCE)
+            return max(var - credit_portfolio.expected_loss, 0.0)
+        except Exception as e:
+            logger.error(f"Erreur calcul risque de contrepartie: {e}")
+            metrics.fallback('risk_calculator.counterparty_risk')
+            return portfolio.total_value * 0.05
@@ -0,0 +1,227 @@
+import math
+import os
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from services.historical_simulation import HistoricalSimulationEngine
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Noyaux compilés par Numba si disponible (désactivables via FINRISK_DISABLE_JIT=1), NumPy sinon.
+# cache=True écrit le code machine sur disque (__pycache__ ou NUMBA_CACHE_DIR): pas de recompilation
+# au démarrage des workers suivants.
+JIT_ENABLED = njit is not None and os.environ.get('FINRISK_DISABLE_JIT') != '1'
+BACKEND = 'jit' if JIT_ENABLED else 'numpy'
+
+_jit = njit(cache=True) if njit is not None else (lambda func: func)
+
+
+def _resolve(backend):
+    backend = backend or BACKEND
+    if backend not in ('jit', 'numpy'):
+        raise ValueError(f"Backend inconnu: {backend}")
+    return backend
+
+
+# === DRAWDOWNS ===
+@_jit
+def _drawdowns_loop(values):
+    drawdowns = np.empty(values.size)
+    peak = -np.inf
+    worst = 0.0
+    for t in range(values.size):
+        if values[t] > peak:
+            peak = values[t]
+        drawdowns[t] = values[t] / peak - 1.0 if peak > 0 else 0.0
+        if drawdowns[t] < worst:
+            worst = drawdowns[t]
+    return drawdowns, worst
+
+
+def _drawdowns_numpy(values):
+    peaks = np.maximum.accumulate(values)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drawdowns = np.where(peaks > 0, values / peaks - 1.0, 0.0)
+    return drawdowns, float(drawdowns.min(initial=0.0))
+
+
+def drawdowns(values, backend=None):
+    """Série des drawdowns (valeur / plus haut historique - 1) et drawdown maximal (négatif)"""
+    values = np.ascontiguousarray(values, dtype=float)
+    if _resolve(backend) == 'jit':
+        series, worst = _drawdowns_loop(values)
+        return series, float(worst)
+    return _drawdowns_numpy(values)
+
+
+# === QUANTILES GLISSANTS ===
+@_jit
+def _rolling_order_statistic_loop(values, window, k):
+    n = values.size - window + 1
+    out = np.empty(n)
+    # Fenêtre maintenue triée: une suppression et une insertion par pas (recherche dichotomique)
+    ordered = np.sort(values[:window])
+    out[0] = ordered[k]
+    for t in range(1, n):
+        outgoing = values[t - 1]
+        incoming = values[t + window - 1]
+        i = np.searchsorted(ordered, outgoing)
+        j = np.searchsorted(ordered, incoming)
+        if j <= i:
+            ordered[j + 1:i + 1] = ordered[j:i].copy()
+            ordered[j] = incoming
+        else:
+            ordered[i:j - 1] = ordered[i + 1:j].copy()
+            ordered[j - 1] = incoming
+        out[t] = ordered[k]
+    return out
+
+
+def _rolling_order_statistic_numpy(values, window, k, block=4096):
+    windows = sliding_window_view(values, window)
+    out = np.empty(windows.shape[0])
+    # Par blocs de fenêtres: la copie partitionnée reste bornée à block × window
+    for start in range(0, windows.shape[0], block):
+        out[start:start + block] = np.partition(windows[start:start + block], k, axis=1)[:, k]
+    return out
+
+
+def rolling_tail_quantile(returns, window, confidence=0.99, backend=None):
+    """Quantile de queue (même statistique d'ordre que la VaR historique) sur fenêtres glissantes"""
+    values = np.ascontiguousarray(returns, dtype=float)
+    window = int(window)
+    if window < 1 or window > values.size:
+        raise ValueError("Fenêtre incompatible avec la longueur de la série")
+    k = HistoricalSimulationEngine._tail_index(window, confidence)
+    if _resolve(backend) == 'jit':
+        return _rolling_order_statistic_loop(values, window, k)
+    return _rolling_order_statistic_numpy(values, window, k)
+
+
+# === BACKTEST AVEC RÉÉQUILIBRAGE ===
+@_jit
+def _rebalancing_backtest_loop(prices, target_weights, threshold, cost_rate, initial_value):
+    n_days, n_assets = prices.shape
+    values = np.empty(n_days)
+    holdings = initial_value * target_weights / prices[0]
+    values[0] = initial_value
+    turnover = 0.0
+    rebalances = 0
+    for t in range(1, n_days):
+        value = 0.0
+        for i in range(n_assets):
+            value += holdings[i] * prices[t, i]
+        drift = 0.0
+        for i in range(n_assets):
+            gap = abs(holdings[i] * prices[t, i] / value - target_weights[i])
+            if gap > drift:
+                drift = gap
+        if drift > threshold:
+            traded = 0.0
+            for i in range(n_assets):
+                traded += abs(target_weights[i] * value - holdings[i] * prices[t, i])
+            value -= cost_rate * traded
+            for i in range(n_assets):
+                holdings[i] = target_weights[i] * value / prices[t, i]
+            turnover += traded
+            rebalances += 1
+        values[t] = value
+    return values, turnover, rebalances
+
+
+def _rebalancing_backtest_numpy(prices, target_weights, threshold, cost_rate, initial_value):
+    # Dépendance au chemin: boucle sur les dates, vectorisée sur les actifs
+    values = np.empty(prices.shape[0])
+    holdings = initial_value * target_weights / prices[0]
+    values[0] = initial_value
+    turnover, rebalances = 0.0, 0
+    for t in range(1, prices.shape[0]):
+        positions = holdings * prices[t]
+        value = positions.sum()
+        if np.abs(positions / value - target_weights).max() > threshold:
+            traded = np.abs(target_weights * value - positions).sum()
+            value -= cost_rate * traded
+            holdings = target_weights * value / prices[t]
+            turnover += traded
+            rebalances += 1
+        values[t] = value
+    return values, turnover, rebalances
+
+
+def rebalancing_backtest(prices, target_weights, threshold=0.05, cost_rate=0.001, initial_value=1.0,
+                         backend=None):
+    """Valeur d'un portefeuille rééquilibré vers des poids cibles dès que la dérive dépasse le seuil"""
+    prices = np.ascontiguousarray(prices, dtype=float)
+    target_weights = np.ascontiguousarray(target_weights, dtype=float)
+    kernel = _rebalancing_backtest_loop if _resolve(backend) == 'jit' else _rebalancing_backtest_numpy
+    values, turnover, rebalances = kernel(prices, target_weights, float(threshold), float(cost_rate),
+                                          float(initial_value))
+    return {'values': values, 'turnover': float(turnover), 'rebalances': int(rebalances)}
+
+
+# === RÉÉVALUATION NON LINÉAIRE PAR SCÉNARIO ===
+@_jit
+def _revalue_scenarios_loop(log_returns, spots, underlying_index, quantity, strike, maturity, volatility,
+                            is_call, is_option, rate, dividend, time_shift, current_value):
+    n_scenarios = log_returns.shape[0]
+    pnl = np.empty(n_scenarios)
+    inv_sqrt2 = 1.0 / math.sqrt(2.0)
+    for s in range(n_scenarios):
+        total = 0.0
+        # Chaque position est réévaluée sans matrice intermédiaire scénarios × positions
+        for p in range(quantity.size):
+            spot = spots[underlying_index[p]] * math.exp(log_returns[s, underlying_index[p]])
+            if not is_option[p]:
+                total += quantity[p] * spot
+                continue
+            tau = max(maturity[p] - time_shift, 1e-10)
+            vol_sqrt_t = max(volatility[p] * math.sqrt(tau), 1e-12)
+            d1 = (math.log(spot / strike[p]) + (rate[p] - dividend + 0.5 * volatility[p] ** 2) * tau) / vol_sqrt_t
+            d2 = d1 - vol_sqrt_t
+            discounted_spot = spot * math.exp(-dividend * tau)
+            discounted_strike = strike[p] * math.exp(-rate[p] * tau)
+            call = (discounted_spot * 0.5 * math.erfc(-d1 * inv_sqrt2)
+                    - discounted_strike * 0.5 * math.erfc(-d2 * inv_sqrt2))
+            price = call if is_call[p] else call - discounted_spot + discounted_strike
+            total += quantity[p] * price
+        pnl[s] = total - current_value
+    return pnl
+
+
+def _revalue_scenarios_numpy(book, spots, log_returns, time_shift, current_value, chunk_size):
+    pnl = np.empty(log_returns.shape[0])
+    for start in range(0, log_returns.shape[0], chunk_size):
+        block = log_returns[start:start + chunk_size]
+        pnl[start:start + chunk_size] = book.values(spots * np.exp(block), time_shift) @ book.quantity - current_value
+    return pnl
+
+
+def revalue_scenarios(book, spots, log_returns, time_shift=0.0, chunk_size=2048, backend=None):
+    """P&L par scénario d'un OptionBook réévalué aux spots choqués (Black-Scholes complet)"""
+    spots = np.ascontiguousarray(spots, dtype=float)
+    log_returns = np.ascontiguousarray(log_returns, dtype=float)
+    current_value = float(book.values(spots) @ book.quantity)
+    if _resolve(backend) == 'jit':
+        return _revalue_scenarios_loop(
+            log_returns, spots, book.underlying_index, book.quantity, book.strike, book.maturity,
+            book.volatility, book.is_call, book.is_option, book.rate, float(book.dividend),
+            float(time_shift), current_value
+        )
+    return _revalue_scenarios_numpy(book, spots, log_returns, time_shift, current_value, chunk_size)
+
+
+def warmup():
+    """Charge (ou compile une fois) tous les noyaux sur de petites entrées"""
+    if not JIT_ENABLED:
+        return
+    values = np.linspace(1.0, 2.0, 8)
+    drawdowns(values)
+    rolling_tail_quantile(np.diff(values), 4)
+    rebalancing_backtest(np.column_stack([values, values[::-1]]), np.array([0.5, 0.5]))
+    _revalue_scenarios_loop(np.zeros((1, 1)), np.ones(1), np.zeros(1, dtype=np.intp), np.ones(1), np.ones(1),
+                            np.ones(1), np.full(1, 0.2), np.ones(1, dtype=bool), np.ones(1, dtype=bool),
+                            np.full(1, 0.02), 0.0, 0.0, 0.0)
@@ -0,0 +1,295 @@
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+
+class SimulationArchive:
+    """Archive des simulations anciennes en fichiers colonnes compressés, partitionnés par mois"""
+
+    COLUMNS = ('id', 'name', 'type', 'parameters', 'results', 'portfolio_id', 'user_id', 'created_at',
+               'var', 'cvar', 'total_loss')
+    TEXT_COLUMNS = ('id', 'name', 'type', 'parameters', 'results', 'portfolio_id', 'user_id')
+    # Indicateurs extraits du JSON des résultats: les analyses ne relisent jamais la colonne results
+    METRIC_COLUMNS = ('var', 'cvar', 'total_loss')
+
+    def __init__(self, root, compression='zstd', row_group_size=10_000):
+        self.root = root
+        self.compression = compression
+        self.row_group_size = row_group_size
+        # Parquet si pyarrow est installé, sinon colonnes NumPy compressées (.npz)
+        self.format = 'parquet' if pq is not None else 'npz'
+        self.manifest_path = os.path.join(root, 'manifest.json')
+        self._manifest = None
+        self._manifest_mtime = None
+        self._lock = threading.Lock()
+
+    # === MANIFESTE ===
+    def manifest(self):
+        """Index des partitions (rechargé si un autre processus l'a réécrit)"""
+        try:
+            mtime = os.path.getmtime(self.manifest_path)
+        except OSError:
+            return {'watermark': None, 'files': [], 'ids': {}}
+        if self._manifest is None or mtime != self._manifest_mtime:
+            with open(self.manifest_path, encoding='utf-8') as f:
+                self._manifest = json.load(f)
+            self._manifest_mtime = mtime
+        return self._manifest
+
+    @property
+    def watermark(self):
+        """Date avant laquelle toutes les simulations sont dans l'archive"""
+        value = self.manifest()['watermark']
+        return datetime.fromisoformat(value) if value else None
+
+    def _write_manifest(self, manifest):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f'{self.manifest_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(tmp_path, self.manifest_path)
+
+    # === ÉCRITURE ===
+    def archive(self, session, model, cutoff, batch_size=50_000):
+        """Déplace les simulations antérieures à cutoff: fichiers, puis manifeste, puis suppression en base"""
+        with self._lock:
+            manifest = self.manifest()
+            watermark = self.watermark
+            if watermark is not None:
+                # Lignes déjà archivées mais restées en base (interruption avant la suppression)
+                session.query(model).filter(model.created_at < watermark).delete(synchronize_session=False)
+                session.commit()
+                if cutoff <= watermark:
+                    return {'archived': 0, 'files': 0, 'watermark': watermark.isoformat()}
+
+            # Index identifiant -> partition; reconstruit une fois pour un manifeste antérieur à l'index
+            ids = dict(manifest['ids']) if 'ids' in manifest else self._index_ids(manifest['files'])
+            entries, batch = [], []
+            query = session.query(model).filter(model.created_at < cutoff).order_by(model.created_at)
+            for sim in query.yield_per(batch_size):
+                batch.append(self._record(sim))
+                if len(batch) >= batch_size:
+                    entries.extend(self._write_batch(pd.DataFrame.from_records(batch, columns=self.COLUMNS), ids))
+                    batch = []
+            if batch:
+                entries.extend(self._write_batch(pd.DataFrame.from_records(batch, columns=self.COLUMNS), ids))
+
+            manifest = {'watermark': cutoff.isoformat(), 'files': manifest['files'] + entries, 'ids': ids}
+            self._write_manifest(manifest)
+
+            session.query(model).filter(model.created_at < cutoff).delete(synchronize_session=False)
+            session.commit()
+            return {
+                'archived': sum(e['rows'] for e in entries),
+                'files': len(entries),
+                'watermark': cutoff.isoformat()
+            }
+
+    def _record(self, sim):
+        results = json.loads(sim.results) if sim.results else {}
+        return (sim.id, sim.name, sim.type, sim.parameters or '', sim.results or '', sim.portfolio_id,
+                sim.user_id, sim.created_at,
+                *(self.metric(results, key) for key in self.METRIC_COLUMNS))
+
+    @staticmethod
+    def metric(results, key):
+        value = results.get(key) if isinstance(results, dict) else None
+        return float(value) if isinstance(value, (int, float)) else np.nan
+
+    def _index_ids(self, entries):
+        """Identifiant -> chemin de partition, en ne lisant que la colonne id des fichiers existants"""
+        ids = {}
+        for entry in entries:
+            for sim_id in self._read_file(entry, ['id'], {})['id']:
+                ids[str(sim_id)] = entry['path']
+        return ids
+
+    def _write_batch(self, frame, ids):
+        """Un fichier par mois; lignes triées par utilisateur puis date pour des statistiques serrées"""
+        frame['created_at'] = pd.to_datetime(frame['created_at']).astype('datetime64[us]')
+        entries = []
+        for month, part in frame.groupby(frame['created_at'].dt.strftime('%Y-%m'), sort=True):
+            part = part.sort_values(['user_id', 'created_at'], ascending=[True, False], ignore_index=True)
+            directory = os.path.join(self.root, f'month={month}')
+            os.makedirs(directory, exist_ok=True)
+            relative = os.path.join(f'month={month}', f'part-{uuid.uuid4().hex}.{self.format}')
+            path = os.path.join(self.root, relative)
+
+            if self.format == 'parquet':
+                table = pa.Table.from_pandas(part, preserve_index=False)
+                pq.write_table(table, path, compression=self.compression, row_group_size=self.row_group_size)
+            else:
+                columns = {c: part[c].to_numpy(dtype=str) for c in self.TEXT_COLUMNS}
+                columns['created_at'] = part['created_at'].to_numpy(dtype='datetime64[us]')
+                columns.update({c: part[c].to_numpy(dtype=float) for c in self.METRIC_COLUMNS})
+                with open(path, 'wb') as f:
+                    np.savez_compressed(f, **columns)
+            ids.update(dict.fromkeys(part['id'].tolist(), relative))
+
+            entries.append({
+                'path': relative,
+                'format': self.format,
+                'month': month,
+                'rows': len(part),
+                'min_created_at': part['created_at'].min().isoformat(),
+                'max_created_at': part['created_at'].max().isoformat(),
+                'users': {k: int(v) for k, v in part['user_id'].value_counts().items()},
+                'types': {k: int(v) for k, v in part['type'].value_counts().items()},
+                'portfolios': sorted(part['portfolio_id'].unique().tolist())
+            })
+        return entries
+
+    # === LECTURE ===
+    def count(self, user_id):
+        return sum(e['users'].get(user_id, 0) for e in self.manifest()['files'])
+
+    def page(self, user_id, offset, limit):
+        """Simulations archivées d'un utilisateur, de la plus récente à la plus ancienne"""
+        entries = sorted((e for e in self.manifest()['files'] if user_id in e['users']),
+                         key=lambda e: e['max_created_at'], reverse=True)
+        skipped, selected, floor = 0, [], None
+        for i, entry in enumerate(entries):
+            n = entry['users'][user_id]
+            following = entries[i + 1] if i + 1 < len(entries) else None
+            # Partition entièrement avant la page et sans chevauchement avec la suivante: non lue
+            if not selected and skipped + n <= offset and (
+                    following is None or following['max_created_at'] < entry['min_created_at']):
+                skipped += n
+                continue
+            if selected and skipped + sum(e['users'][user_id] for e in selected) >= offset + limit \
+                    and entry['max_created_at'] < floor:
+                break
+            selected.append(entry)
+            floor = entry['min_created_at'] if floor is None else min(floor, entry['min_created_at'])
+
+        if not selected:
+            return []
+        frame = self._read(selected, columns=None, filters={'user_id': user_id})
+        frame = frame.sort_values('created_at', ascending=False, ignore_index=True)
+        start = offset - skipped
+        return [self._to_dict(row) for row in frame.iloc[start:start + limit].itertuples(index=False)]
+
+    def record(self, sim_id, user_id):
+        """Simulation archivée par identifiant: une seule partition lue, trouvée par l'index du manifeste"""
+        manifest = self.manifest()
+        if 'ids' in manifest:
+            path = manifest['ids'].get(sim_id)
+            entries = [e for e in manifest['files'] if e['path'] == path and user_id in e['users']]
+        else:
+            # Manifeste antérieur à l'index: partitions élaguées par utilisateur
+            entries = [e for e in manifest['files'] if user_id in e['users']]
+        if not entries:
+            return None
+        frame = self._read(entries, ['name', 'type', 'parameters', 'results', 'portfolio_id'],
+                           {'user_id': user_id, 'ids': [sim_id]})
+        if frame.empty:
+            return None
+        row = frame.iloc[0]
+        return {'name': row['name'], 'type': row['type'], 'parameters': json.loads(row['parameters'] or '{}'),
+                'results': json.loads(row['results'] or '{}'), 'portfolio_id': row['portfolio_id']}
+
+    def query(self, columns=None, user_id=None, sim_type=None, portfolio_id=None, start=None, end=None):
+        """Lecture analytique: élagage par le manifeste, puis filtres poussés dans les fichiers"""
+        filters = self._filters(user_id, sim_type, portfolio_id, start, end)
+        entries = [e for e in self.manifest()['files'] if self._may_match(e, filters)]
+        return self._read(entries, columns, filters)
+
+    def iter_query(self, columns=None, user_id=None, sim_type=None, portfolio_id=None, start=None, end=None):
+        """Comme query(), mais une partition à la fois et par ordre chronologique (mémoire bornée)"""
+        filters = self._filters(user_id, sim_type, portfolio_id, start, end)
+        entries = sorted((e for e in self.manifest()['files'] if self._may_match(e, filters)),
+                         key=lambda e: e['min_created_at'])
+        columns = list(columns or self.COLUMNS)
+        for entry in entries:
+            frame = self._read_file(entry, columns, filters)
+            if not frame.empty:
+                yield frame.sort_values('created_at', ignore_index=True) if 'created_at' in frame else frame
+
+    @staticmethod
+    def _filters(user_id, sim_type, portfolio_id, start, end):
+        filters = {'user_id': user_id, 'type': sim_type, 'portfolio_id': portfolio_id, 'start': start, 'end': end}
+        return {k: v for k, v in filters.items() if v is not None}
+
+    @staticmethod
+    def _may_match(entry, filters):
+        if 'user_id' in filters and filters['user_id'] not in entry['users']:
+            return False
+        if 'type' in filters and filters['type'] not in entry['types']:
+            return False
+        if 'portfolio_id' in filters and filters['portfolio_id'] not in entry['portfolios']:
+            return False
+        if 'start' in filters and entry['max_created_at'] < filters['start'].isoformat():
+            return False
+        if 'end' in filters and entry['min_created_at'] >= filters['end'].isoformat():
+            return False
+        return True
+
+    def _read(self, entries, columns, filters):
+        columns = list(columns or self.COLUMNS)
+        frames = [self._read_file(entry, columns, filters) for entry in entries]
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(frames, ignore_index=True)
+
+    def _read_file(self, entry, columns, filters):
+        path = os.path.join(self.root, entry['path'])
+        if entry['format'] == 'parquet':
+            if pq is None:
+                raise RuntimeError("pyarrow est requis pour relire les partitions Parquet")
+            table = pq.read_table(path, columns=columns, filters=self._parquet_filters(filters) or None)
+            return table.to_pandas()
+
+        with np.load(path) as data:
+            mask = np.ones(data['id'].size, dtype=bool)
+            if 'user_id' in filters:
+                mask &= data['user_id'] == filters['user_id']
+            if 'type' in filters:
+                mask &= data['type'] == filters['type']
+            if 'portfolio_id' in filters:
+                mask &= data['portfolio_id'] == filters['portfolio_id']
+            if 'ids' in filters:
+                mask &= np.isin(data['id'], filters['ids'])
+            if 'start' in filters or 'end' in filters:
+                created = data['created_at']
+                if 'start' in filters:
+                    mask &= created >= np.datetime64(filters['start'], 'us')
+                if 'end' in filters:
+                    mask &= created < np.datetime64(filters['end'], 'us')
+            # Seules les colonnes demandées sont décompressées
+            return pd.DataFrame({c: data[c][mask] for c in columns})
+
+    @staticmethod
+    def _parquet_filters(filters):
+        # Expressions DNF de pyarrow: élagage des row groups par statistiques min/max
+        clauses = []
+        for key in ('user_id', 'type', 'portfolio_id'):
+            if key in filters:
+                clauses.append((key, '=', filters[key]))
+        if 'ids' in filters:
+            clauses.append(('id', 'in', list(filters['ids'])))
+        if 'start' in filters:
+            clauses.append(('created_at', '>=', pd.Timestamp(filters['start'])))
+        if 'end' in filters:
+            clauses.append(('created_at', '<', pd.Timestamp(filters['end'])))
+        return clauses
+
+    @staticmethod
+    def _to_dict(row):
+        return {
+            'id': row.id, 'name': row.name, 'type': row.type,
+            'created_at': pd.Timestamp(row.created_at).isoformat(),
+            'results': json.loads(row.results) if row.results else {},
+            'archived': True
+        }
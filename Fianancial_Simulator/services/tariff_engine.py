@@ -0,0 +1,194 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+
+class RatingFactor:
+    """Facteur de tarification compilé en tableau de relativités indexable par NumPy"""
+
+    def __init__(self, name, levels=None, bands=None, relativities=None, column=None, default=1.0):
+        self.name = name
+        self.column = column or name
+        self.default = default
+        if bands is not None:
+            # Facteur numérique par tranches: bands = bornes inférieures croissantes
+            self.kind = 'banded'
+            self.bands = np.asarray(bands, dtype=float)
+            self.levels = None
+            values = list(relativities)
+        else:
+            self.kind = 'categorical'
+            self.bands = None
+            self.levels = [str(level) for level in levels.keys()]
+            values = list(levels.values())
+        # Le dernier élément porte la relativité par défaut: le code -1 d'une modalité inconnue y pointe
+        self.table = np.append(np.asarray(values, dtype=float), default)
+
+    def codes(self, values):
+        """Codes entiers des modalités (−1 si inconnue ou hors tranches)"""
+        if self.kind == 'banded':
+            values = np.asarray(values, dtype=float)
+            codes = np.searchsorted(self.bands, values, side='right') - 1
+            # searchsorted range NaN après toutes les bornes: une valeur manquante prend le défaut
+            return np.where(np.isfinite(values), codes, -1)
+        # get_indexer rend −1 pour une modalité absente (pd.Categorical le déconseille depuis pandas 3)
+        return pd.Index(self.levels).get_indexer(self._labels(values))
+
+    @staticmethod
+    def _labels(values):
+        """Modalités en texte, comme les clés JSON: une colonne lue en entiers (zone 1, 2, 3) correspond à '1', '2', '3'"""
+        series = values if isinstance(values, pd.Series) else pd.Series(np.asarray(values))
+        labels = series.astype(str).to_numpy(dtype=object)
+        if pd.api.types.is_float_dtype(series):
+            numbers = series.to_numpy(dtype=float)
+            finite = np.isfinite(numbers)
+            # Entiers lus en flottants à cause de valeurs manquantes: 1.0 -> '1'. Les valeurs non finies
+            # (NaN, ±inf) gardent leur texte et tombent dans la modalité par défaut
+            if (numbers[finite] == np.round(numbers[finite])).all():
+                labels[finite] = numbers[finite].astype(np.int64).astype(str)
+        return labels
+
+    def relativities(self, values):
+        return self.table[self.codes(values)]
+
+    def to_dict(self):
+        spec = {'column': self.column, 'default': self.default}
+        if self.kind == 'banded':
+            spec.update(bands=self.bands.tolist(), relativities=self.table[:-1].tolist())
+        else:
+            spec['levels'] = dict(zip(self.levels, self.table[:-1].tolist()))
+        return spec
+
+
+class Tariff:
+    """Tarif multiplicatif: prime = prime de base × Π relativités"""
+
+    def __init__(self, name, version, base_premium, factors):
+        self.name = name
+        self.version = version
+        self.base_premium = float(base_premium)
+        self.factors = [
+            factor if isinstance(factor, RatingFactor) else RatingFactor(factor_name, **factor)
+            for factor_name, factor in (factors.items() if isinstance(factors, dict) else
+                                        ((f.name, f) for f in factors))
+        ]
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['name'], data['version'], data['base_premium'], data['factors'])
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'version': self.version,
+            'base_premium': self.base_premium,
+            'factors': {factor.name: factor.to_dict() for factor in self.factors}
+        }
+
+    def rate(self, policies):
+        """Primes d'un bloc de contrats (DataFrame ou dict de colonnes), entièrement vectorisé"""
+        n = len(policies[self.factors[0].column]) if self.factors else len(policies)
+        premium = np.full(n, self.base_premium)
+        for factor in self.factors:
+            premium *= factor.relativities(np.asarray(policies[factor.column]))
+        return premium
+
+
+class TariffEngine:
+    """Re-tarification d'un portefeuille en flux, par blocs, et impact d'un changement de version"""
+
+    def __init__(self, chunksize=500_000):
+        self.chunksize = chunksize
+
+    def read_chunks(self, path, **read_csv_kwargs):
+        """Lit un fichier de contrats par blocs pour garder une mémoire constante"""
+        return pd.read_csv(path, chunksize=self.chunksize, **read_csv_kwargs)
+
+    def rate_chunks(self, tariff, chunks, premium_column='premium'):
+        """Générateur de blocs tarifés (une colonne de prime ajoutée à chaque bloc)"""
+        for chunk in chunks:
+            chunk = chunk.copy()
+            chunk[premium_column] = tariff.rate(chunk)
+            yield chunk
+
+    def rate_file(self, tariff, input_path, output_path, premium_column='premium', **read_csv_kwargs):
+        """Tarifie un fichier CSV vers un autre, bloc par bloc; retourne nombre de contrats et prime totale"""
+        count, total = 0, 0.0
+        header = True
+        for chunk in self.rate_chunks(tariff, self.read_chunks(input_path, **read_csv_kwargs), premium_column):
+            chunk.to_csv(output_path, mode='w' if header else 'a', header=header, index=False)
+            header = False
+            count += len(chunk)
+            total += float(chunk[premium_column].sum())
+        return {'policies': count, 'total_premium': round(total, 2)}
+
+    def diff(self, old_tariff, new_tariff, chunks,
+             change_buckets=(-np.inf, -0.10, -0.05, -0.001, 0.001, 0.05, 0.10, np.inf)):
+        """Impact d'une nouvelle version du tarif sur tout le portefeuille (un seul passage)"""
+        buckets = np.asarray(change_buckets, dtype=float)
+        bucket_counts = np.zeros(buckets.size - 1, dtype=np.int64)
+        count, old_total, new_total = 0, 0.0, 0.0
+
+        # Impact par modalité des facteurs ajoutés, retirés ou dont les relativités ont changé (union des
+        # deux versions; un facteur retiré est ventilé selon ses modalités de l'ancienne version)
+        old_factors = {f.name: f for f in old_tariff.factors}
+        new_factors = {f.name: f for f in new_tariff.factors}
+        added = [name for name in new_factors if name not in old_factors]
+        removed = [name for name in old_factors if name not in new_factors]
+        changed = [new_factors.get(name, old_factors.get(name)) for name in {**old_factors, **new_factors}
+                   if name not in old_factors or name not in new_factors
+                   or new_factors[name].to_dict() != old_factors[name].to_dict()]
+        by_level = {f.name: {} for f in changed}
+
+        for chunk in chunks:
+            old = old_tariff.rate(chunk)
+            new = new_tariff.rate(chunk)
+            count += old.size
+            old_total += float(old.sum())
+            new_total += float(new.sum())
+            change = np.divide(new - old, old, out=np.zeros_like(new), where=old != 0)
+            bucket_counts += np.histogram(change, bins=buckets)[0]
+
+            for factor in changed:
+                labels = factor.levels if factor.kind == 'categorical' else [f'>={b:g}' for b in factor.bands]
+                size = len(labels) + 1
+                codes = factor.codes(np.asarray(chunk[factor.column]))
+                codes = np.where(codes < 0, size - 1, codes)
+                old_sums = np.bincount(codes, old, minlength=size)
+                new_sums = np.bincount(codes, new, minlength=size)
+                policies = np.bincount(codes, minlength=size)
+                for i, label in enumerate(list(labels) + ['(autre)']):
+                    if policies[i] == 0:
+                        continue
+                    entry = by_level[factor.name].setdefault(label, [0, 0.0, 0.0])
+                    entry[0] += int(policies[i])
+                    entry[1] += float(old_sums[i])
+                    entry[2] += float(new_sums[i])
+
+        return {
+            'old_version': old_tariff.version,
+            'new_version': new_tariff.version,
+            'policies': count,
+            'old_total_premium': round(old_total, 2),
+            'new_total_premium': round(new_total, 2),
+            'premium_change_pct': round((new_total / old_total - 1) * 100, 4) if old_total else 0,
+            'added_factors': added,
+            'removed_factors': removed,
+            'change_distribution': {
+                f'[{buckets[i]:+.1%}, {buckets[i + 1]:+.1%})': int(bucket_counts[i]) for i in range(bucket_counts.size)
+            },
+            'impact_by_level': {
+                name: {
+                    label: {
+                        'policies': n, 'old_premium': round(old, 2), 'new_premium': round(new, 2),
+                        'change_pct': round((new / old - 1) * 100, 4) if old else 0
+                    } for label, (n, old, new) in levels.items()
+                } for name, levels in by_level.items()
+            }
+        }
@@ -82,6 +82,7 @@ class FinRiskApp {
 
             // Initialisation du tableau de bord
             await this.loadDashboardData();
+            this.subscribeDashboardStream();
 
             this.uiManager.showSuccess('Données chargées avec succès');
 
@@ -98,6 +99,7 @@ class FinRiskApp {
             if (!response.ok) throw new Error('Erreur API');
 
             const metrics = await response.json();
+            this.dashboardMetrics = metrics;
             this.updateDashboard(metrics);
             this.setupCharts(metrics);
 
@@ -106,6 +108,39 @@ class FinRiskApp {
         }
     }
 
+    subscribeDashboardStream() {
+        // Mises à jour poussées par le serveur (SSE): seules les métriques modifiées sont reçues
+        if (this.dashboardStream || !window.EventSource) return;
+
+        const apply = (event) => {
+            const changes = JSON.parse(event.data);
+            const metrics = this.dashboardMetrics || {};
+            if (changes.value !== undefined) metrics.portfolio_value = changes.value;
+            if (changes.var !== undefined) metrics.current_var = changes.var;
+            if (changes.stress_loss !== undefined) metrics.stress_loss = changes.stress_loss;
+            if (changes.allocation) {
+                metrics.asset_allocation = { ...(metrics.asset_allocation || {}), ...changes.allocation };
+            }
+            this.dashboardMetrics = metrics;
+            this.updateDashboard(metrics);
+        };
+
+        this.dashboardStream = new EventSource('/api/dashboard/stream');
+        this.dashboardStream.addEventListener('update', apply);
+        this.dashboardStream.addEventListener('snapshot', (event) => {
+            // L'instantané initial remplace l'allocation au lieu de la fusionner
+            if (this.dashboardMetrics) this.dashboardMetrics.asset_allocation = {};
+            apply(event);
+        });
+    }
+
+    closeDashboardStream() {
+        if (this.dashboardStream) {
+            this.dashboardStream.close();
+            this.dashboardStream = null;
+        }
+    }
+
     async loadPortfolios() {
         try {
             const response = await fetch('/api/portfolios');
@@ -542,6 +577,7 @@ class FinRiskApp {
     async handleLogout() {
         try {
             console.log('🚪 Déconnexion...');
+            this.closeDashboardStream();
             await fetch('/logout', { method: 'POST' });
             this.currentUser = null;
             this.showLogin();
@@ -0,0 +1,45 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+import pytest
+
+# Base, archive et rapports temporaires: app lit sa configuration à l'import, avant toute fixture
+_WORKDIR = tempfile.mkdtemp(prefix='finrisk-tests-')
+atexit.register(shutil.rmtree, _WORKDIR, ignore_errors=True)
+os.environ['FINRISK_DATABASE_URI'] = f"sqlite:///{os.path.join(_WORKDIR, 'tests.db')}"
+os.environ['FINRISK_ARCHIVE_DIR'] = os.path.join(_WORKDIR, 'archive')
+os.environ['FINRISK_REPORTS_DIR'] = os.path.join(_WORKDIR, 'reports')
+
+
+@pytest.fixture(scope='session')
+def finrisk():
+    """Module app sur la base temporaire, avec des historiques locaux à la place de yfinance"""
+    import app as finrisk
+    from benchmarks.load_test import StubMarketData
+
+    finrisk.yf = StubMarketData()
+    finrisk.init_db()
+    return finrisk
+
+
+@pytest.fixture
+def client(finrisk):
+    """Client de test connecté avec le compte de démonstration"""
+    client = finrisk.app.test_client()
+    assert client.post('/login', json={'username': 'demo', 'password': 'demo123'}).status_code == 200
+    return client
+
+
+@pytest.fixture
+def make_portfolio(client):
+    """Crée un portefeuille du compte de démonstration: [(symbole, type, quantité, prix)] -> id"""
+    def make(assets, name='Portefeuille de test'):
+        response = client.post('/api/portfolios', json={'name': name, 'assets': [
+            {'name': symbol, 'symbol': symbol, 'type': asset_type, 'quantity': quantity, 'purchase_price': price}
+            for symbol, asset_type, quantity, price in assets
+        ]})
+        assert response.status_code == 200
+        return response.get_json()['id']
+    return make
@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+
+from services.actuarial_service import ActuarialService, CommutationTable, MortalityTable
+
+
+@pytest.fixture
+def service(tmp_path):
+    # Répertoire vide: tables Gompertz-Makeham, indépendantes des fichiers installés
+    return ActuarialService(table_dir=str(tmp_path))
+
+
+@pytest.fixture
+def lx(service):
+    return service.get_table('TH00-02').lx
+
+
+def test_commutation_columns_match_explicit_sums(lx):
+    rate = 0.025
+    v = 1 / (1 + rate)
+    c = CommutationTable(MortalityTable('test', lx), rate)
+    dx = lx - np.append(lx[1:], 0.0)
+    for age in (0, 40, 65, lx.size - 1):
+        later = np.arange(age, lx.size)
+        assert c.Dx[age] == pytest.approx(v ** age * lx[age])
+        assert c.Cx[age] == pytest.approx(v ** (age + 1) * dx[age])
+        assert c.Nx[age] == pytest.approx(np.sum(v ** later * lx[later]))
+        assert c.Mx[age] == pytest.approx(np.sum(v ** (later + 1) * dx[later]))
+    # Colonne nulle au-delà de l'âge limite
+    assert c.Dx[-1] == c.Nx[-1] == c.Mx[-1] == 0.0
+
+
+def test_premiums_match_first_principles(service, lx):
+    rate, age, duration, capital = 0.02, 45, 20, 100_000
+    v = 1 / (1 + rate)
+    k = np.arange(duration)
+    survival = lx[age + k] / lx[age]
+    deaths = (lx[age + k] - lx[age + k + 1]) / lx[age]
+
+    death = service.single_premium('temporary_death', age, duration, capital, rate=rate)
+    assert death == pytest.approx(capital * np.sum(v ** (k + 1) * deaths))
+    endowment = service.single_premium('pure_endowment', age, duration, capital, rate=rate)
+    assert endowment == pytest.approx(capital * v ** duration * lx[age + duration] / lx[age])
+    # Rente différée de 5 ans, servie 10 ans
+    annuity = service.single_premium('life_annuity', age, 10, capital, rate=rate, deferment=5)
+    j = np.arange(5, 15)
+    assert annuity == pytest.approx(capital * np.sum(v ** j * lx[age + j] / lx[age]))
+    # Prime nivelée: prime unique / ä_{x:n}
+    periodic = service.periodic_premium('temporary_death', age, duration, capital, rate=rate)
+    assert periodic == pytest.approx(death / np.sum(v ** k * survival))
+
+
+@pytest.mark.parametrize('product', ActuarialService.PRODUCTS)
+def test_batch_matches_contract_by_contract_pricing(service, product):
+    rng = np.random.default_rng(0)
+    ages = rng.integers(20, 80, 50)
+    durations = rng.integers(1, 30, 50)
+    capitals = rng.uniform(1_000, 500_000, 50)
+    deferments = rng.integers(0, 10, 50)
+    batch = service.price_batch(product, ages, durations, capitals, deferments=deferments)
+    for i in range(0, 50, 7):
+        expected = service.single_premium(product, ages[i], durations[i], capitals[i], deferment=deferments[i])
+        assert batch['single_premium'][i] == pytest.approx(expected)
+    assert service.get_commutations('TH00-02', 0.02) is service.get_commutations('TH00-02', 0.02 + 1e-12)
+
+
+def test_premiums_are_not_paid_beyond_the_contract_term(service):
+    capped = service.periodic_premium('temporary_death', 40, 10, 1000, payment_years=30)
+    assert capped == pytest.approx(service.periodic_premium('temporary_death', 40, 10, 1000, payment_years=10))
+    # Rente: au plus différé + service
+    annuity = service.periodic_premium('life_annuity', 40, 10, 1000, payment_years=40, deferment=5)
+    assert annuity == pytest.approx(service.periodic_premium('life_annuity', 40, 10, 1000, payment_years=15,
+                                                             deferment=5))
+    assert annuity < service.periodic_premium('life_annuity', 40, 10, 1000, payment_years=14, deferment=5)
+
+
+def test_invalid_contracts_are_rejected(service):
+    with pytest.raises(ValueError):
+        service.price_batch('temporary_death', [-1], [10], [1.0])
+    with pytest.raises(ValueError):
+        service.price_batch('life_annuity', [60], [10], [1.0], deferments=[-2])
+    with pytest.raises(ValueError):
+        service.single_premium('pure_endowment', 40, 0)
+    with pytest.raises(ValueError):
+        service.single_premium('unknown', 40, 10)
+    with pytest.raises(ValueError):
+        service.get_table('XX-99')
+
+
+def test_beyond_the_table_limit_premiums_are_zero(service, lx):
+    result = service.price_batch('whole_life', [lx.size + 5], [0], [1000.0])
+    assert result['single_premium'][0] == 0.0 and result['periodic_premium'][0] == 0.0
+
+
+def test_csv_tables_are_loaded_and_gaps_rejected(tmp_path):
+    path = tmp_path / 'T.csv'
+    path.write_text('age;lx\n0;100 000\n1;99 000,5\n2;0\n', encoding='utf-8')
+    table = MortalityTable.from_csv('T', str(path))
+    np.testing.assert_array_equal(table.lx, [100_000, 99_000.5, 0])
+    assert table.source == 'T.csv'
+
+    path.write_text('age,lx\n0,1000\n1,900\n3,0\n', encoding='utf-8')
+    with pytest.raises(ValueError, match='contigus'):
+        MortalityTable.from_csv('T', str(path))
+
+
+def test_premium_endpoint(client):
+    response = client.post('/api/actuarial/premium', json={
+        'product': 'temporary_death', 'age': 40, 'duration': 10, 'capital': 100_000, 'payment_years': 30})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert 0 < body['periodic_premium'] < body['single_premium']
+    assert client.post('/api/actuarial/premium', json={'product': 'pure_endowment', 'age': 40}).status_code == 400
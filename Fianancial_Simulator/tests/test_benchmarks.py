@@ -0,0 +1,37 @@
+import json
+
+from benchmarks import run_benchmarks as bench
+
+
+def _result(wall_time, memory=10.0, status='ok'):
+    return {'status': status, 'wall_time_s': wall_time, 'peak_memory_mb': memory}
+
+
+def test_compare_flags_time_and_memory_regressions():
+    baseline = {'a@10': _result(0.100), 'b@10': _result(0.100, memory=10.0), 'c@10': _result(0.0001)}
+    results = {'a@10': _result(0.150), 'b@10': _result(0.100, memory=20.0), 'c@10': _result(0.0005)}
+    regressions = bench.compare(results, baseline, tolerance=0.2)
+    assert {(r['benchmark'], r['metric']) for r in regressions} == {('a@10', 'wall_time_s'),
+                                                                   ('b@10', 'peak_memory_mb')}
+
+
+def test_missing_references_lists_unmeasured_keys():
+    baseline = {'a@10': _result(0.1), 'b@10': {'status': 'skipped', 'reason': 'pyarrow'}}
+    results = {'a@10': _result(0.1), 'b@10': _result(0.1), 'c@10': _result(0.1),
+               'd@10': {'status': 'skipped', 'reason': 'pyarrow'}}
+    assert bench.missing_references(results, baseline) == ['b@10', 'c@10']
+
+
+def test_main_exit_codes(tmp_path):
+    baseline = tmp_path / 'baseline.json'
+    args = ['--sizes', '10', '--cases', 'factor_model.calculate_var', '--repeat', '1', '--baseline', str(baseline)]
+
+    # Sans référence: échec explicite, pas un succès muet
+    assert bench.main(args) == 2
+    assert bench.main(args + ['--update-baseline']) == 0
+    assert 'factor_model.calculate_var@10' in json.loads(baseline.read_text())['results']
+    assert bench.main(args) == 0
+
+    # Un cas exécuté absent de la référence fait aussi échouer la comparaison
+    other = ['--sizes', '10', '--cases', 'calculator.stress_test', '--repeat', '1', '--baseline', str(baseline)]
+    assert bench.main(other) == 2
@@ -0,0 +1,95 @@
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from services.covariance_service import CovarianceService
+
+
+@pytest.fixture
+def returns():
+    rng = np.random.default_rng(0)
+    mixing = np.array([[1.0, 0.0, 0.0], [0.6, 0.8, 0.0], [0.3, 0.2, 0.9]])
+    return rng.standard_normal((250, 3)) @ mixing.T * 0.01
+
+
+def test_ledoit_wolf_shrinks_towards_scaled_identity(returns):
+    matrix, shrinkage = CovarianceService.ledoit_wolf_covariance(returns)
+    centered = returns - returns.mean(axis=0)
+    sample = centered.T @ centered / len(returns)
+    target = np.trace(sample) / 3 * np.eye(3)
+    assert 0 <= shrinkage <= 1
+    np.testing.assert_allclose(matrix, shrinkage * target + (1 - shrinkage) * sample)
+    np.testing.assert_allclose(np.trace(matrix), np.trace(sample))
+
+
+def test_ewma_covariance_weights_recent_days_most(returns):
+    lam = 0.94
+    weights = lam ** np.arange(len(returns) - 1, -1, -1)
+    expected = sum(w * np.outer(r, r) for w, r in zip(weights, returns)) / weights.sum()
+    np.testing.assert_allclose(CovarianceService.ewma_covariance(returns, lam), expected, rtol=1e-10)
+
+
+def test_cholesky_rank_one_update_matches_refactorisation(returns):
+    matrix = CovarianceService.sample_covariance(returns)
+    cholesky = np.linalg.cholesky(matrix)
+    x = np.array([0.02, -0.01, 0.005])
+    updated = CovarianceService.cholesky_rank_one_update(cholesky, x)
+    np.testing.assert_allclose(updated, np.linalg.cholesky(matrix + np.outer(x, x)), rtol=1e-10, atol=1e-14)
+    assert np.allclose(np.triu(updated, 1), 0)
+
+
+def test_update_ewma_keeps_matrix_and_factor_consistent(returns):
+    service = CovarianceService()
+    symbols = ('A', 'B', 'C')
+    yesterday = date.today() - timedelta(days=1)
+    previous = service.get_covariance(symbols, returns, 'ewma', as_of=yesterday)
+    new_returns = np.array([-0.03, 0.01, 0.02])
+    estimate = service.update_ewma(symbols, new_returns)
+
+    lam = service.ewma_lambda
+    np.testing.assert_allclose(estimate.matrix, lam * previous.matrix + (1 - lam) * np.outer(new_returns, new_returns))
+    np.testing.assert_allclose(estimate.cholesky @ estimate.cholesky.T, estimate.matrix, rtol=1e-10)
+    assert service.latest(symbols, 'ewma') is estimate
+    assert estimate.n_observations == previous.n_observations + 1
+
+
+def test_update_ewma_requires_a_cached_estimate():
+    with pytest.raises(KeyError):
+        CovarianceService().update_ewma(('A',), [0.01])
+
+
+def test_cache_is_bounded_and_reused(returns):
+    service = CovarianceService(max_entries=2)
+    first = service.get_covariance(('A', 'B', 'C'), returns, 'sample')
+    assert service.get_covariance(('A', 'B', 'C'), returns, 'sample') is first
+    service.get_covariance(('A', 'B', 'C'), returns, 'ledoit_wolf')
+    service.get_covariance(('A', 'B', 'C'), returns, 'ewma')
+    assert len(service) == 2
+    assert service.latest(('A', 'B', 'C'), 'sample') is None
+
+
+def test_concurrent_access_to_the_cache(returns):
+    service = CovarianceService(max_entries=8)
+    errors = []
+
+    def worker(seed):
+        rng = np.random.default_rng(seed)
+        try:
+            for i in range(200):
+                symbols = (f'S{rng.integers(16)}', 'B', 'C')
+                service.get_covariance(symbols, returns, 'sample')
+                service.latest(symbols, 'sample')
+                if i % 50 == 0:
+                    service.invalidate(symbols)
+        except Exception as e:  # RuntimeError: OrderedDict mutated during iteration sans verrou
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(service) <= 8
@@ -0,0 +1,100 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from scipy.stats import norm
+
+from services.credit_risk import CreditPortfolio, CreditRiskEngine
+from services.risk_calculator import AdvancedRiskCalculator
+
+
+@pytest.fixture
+def homogeneous():
+    """2 000 débiteurs identiques: PD 2 %, LGD 45 %, corrélation 20 %"""
+    n = 2_000
+    return CreditPortfolio.one_factor(np.full(n, 1_000.0), np.full(n, 0.02), np.full(n, 0.45), 0.20)
+
+
+def test_asymptotic_var_is_the_vasicek_formula(homogeneous):
+    engine = CreditRiskEngine(homogeneous)
+    stressed_pd = norm.cdf((norm.ppf(0.02) + np.sqrt(0.2) * norm.ppf(0.999)) / np.sqrt(0.8))
+    assert engine.asymptotic_var(0.999) == pytest.approx(2_000 * 1_000 * 0.45 * stressed_pd)
+    assert homogeneous.expected_loss == pytest.approx(2_000 * 1_000 * 0.45 * 0.02)
+
+
+def test_importance_sampling_agrees_with_plain_monte_carlo(homogeneous):
+    plain = CreditRiskEngine(homogeneous, seed=1).calculate((0.99,), 50_000, importance_sampling=False)
+    shifted = CreditRiskEngine(homogeneous, seed=2).calculate((0.99,), 20_000, importance_sampling=True)
+    assert shifted['method'] == 'importance_sampling'
+    assert shifted['levels'][0.99]['var'] == pytest.approx(plain['levels'][0.99]['var'], rel=0.05)
+    # Portefeuille granulaire: proche de la limite asymptotique
+    asymptotic = CreditRiskEngine(homogeneous).asymptotic_var(0.99)
+    assert shifted['levels'][0.99]['var'] == pytest.approx(asymptotic, rel=0.05)
+    level = shifted['levels'][0.99]
+    assert level['es'] >= level['var'] > shifted['expected_loss']
+    assert level['unexpected_loss'] == pytest.approx(level['var'] - shifted['expected_loss'])
+
+
+def test_importance_sampling_reduces_the_variance_of_tail_estimates(homogeneous):
+    threshold = CreditRiskEngine(homogeneous).asymptotic_var(0.999)
+    p_plain, se_plain = CreditRiskEngine(homogeneous, seed=3).tail_probability(threshold, 20_000, False)
+    p_shifted, se_shifted = CreditRiskEngine(homogeneous, seed=4).tail_probability(threshold, 20_000, True)
+    assert p_shifted == pytest.approx(1e-3, rel=0.3)
+    assert abs(p_plain - p_shifted) < 3 * se_plain
+    assert se_shifted < se_plain / 3
+
+
+def test_invalid_confidence_levels_are_rejected(homogeneous):
+    engine = CreditRiskEngine(homogeneous, seed=0)
+    for levels in ((1.0,), (0.99, 0.0)):
+        with pytest.raises(ValueError):
+            engine.calculate(levels, 100)
+    with pytest.raises(ValueError):
+        engine.asymptotic_var(1.0)
+
+
+def test_from_arrays_builds_one_factor_per_credit_type():
+    portfolio = CreditPortfolio.from_arrays(['equity', 'credit', 'bond', 'credit', 'loan', 'bond'],
+                                            [100, 200, 300, 0, 50, 400],
+                                            {'loan': {'pd': 0.05}, 'credit': {'lgd': 0.6}})
+    # Actions et exposition nulle exclues; un type inconnu surchargé devient porteur de risque
+    np.testing.assert_array_equal(portfolio.ead, [200, 300, 50, 400])
+    np.testing.assert_allclose(portfolio.pd, [0.02, 0.003, 0.05, 0.003])
+    np.testing.assert_allclose(portfolio.lgd, [0.6, 0.40, 0.45, 0.40])
+    assert portfolio.n_factors == 3
+    # Facteurs corrélés: la variance systématique reste la corrélation d'actifs du type
+    np.testing.assert_allclose((portfolio.loadings ** 2).sum(axis=1), [0.20, 0.12, 0.15, 0.12])
+
+    assert CreditPortfolio.from_arrays(['equity'], [100]) is None
+    assert CreditPortfolio.from_arrays(['credit'], [0]) is None
+    for overrides in ({'credit': {'pd': 1.0}}, {'credit': {'correlation': 1.0}}, {'credit': 0.5}):
+        with pytest.raises(ValueError):
+            CreditPortfolio.from_arrays(['credit'], [100], overrides)
+    with pytest.raises(ValueError):
+        CreditPortfolio(ead=[1.0], pd=[0.01], lgd=[0.5], loadings=[[0.8, 0.7]])
+
+
+def test_counterparty_risk_is_the_unexpected_asymptotic_loss():
+    assets = [SimpleNamespace(asset_type=t, current_value=v, quantity=1, purchase_price=v)
+              for t, v in (('equity', 1e6), ('credit', 5e5), ('bond', 2e6))]
+    portfolio = SimpleNamespace(assets=assets, total_value=3.5e6)
+    credit = CreditPortfolio.from_assets(assets)
+    expected = CreditRiskEngine(credit).asymptotic_var(0.995) - credit.expected_loss
+    calculator = AdvancedRiskCalculator(data_service=None)
+    assert calculator._calculate_counterparty_risk(portfolio) == pytest.approx(expected)
+    assert calculator.calculate_solvency_ii(portfolio)['counterparty_risk'] == round(expected, 2)
+
+
+def test_credit_var_endpoint(client, make_portfolio):
+    portfolio_id = make_portfolio([('CORP', 'credit', 100, 1000.0), ('GOV', 'bond', 100, 2000.0),
+                                   ('AAPL', 'equity', 10, 100.0)], name='Crédit')
+
+    def post(**parameters):
+        return client.post('/api/simulations', json={'name': 'Crédit', 'type': 'credit_var',
+                                                     'portfolio_id': portfolio_id, 'parameters': parameters})
+
+    response = post(n_scenarios=5_000, seed=0, confidence_levels=[0.99])
+    assert response.status_code == 200
+    for invalid in ({'confidence_level': 1.0}, {'confidence_levels': [1.0]}, {'confidence_level': 0},
+                    {'n_scenarios': 0}, {'credit_parameters': [0.02]}):
+        assert post(**{'n_scenarios': 1_000, **invalid}).status_code == 400, invalid
@@ -0,0 +1,159 @@
+import json
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.covariance_service import CovarianceService
+from services.dashboard_stream import DashboardHub, PortfolioChannel
+
+SYMBOLS = ('AAA', 'BBB', 'CCC')
+
+
+def _history(symbol, days=300):
+    seed = SYMBOLS.index(symbol) if symbol in SYMBOLS else 9
+    return np.random.default_rng(seed).normal(0, 0.01 * (1 + seed), days)
+
+
+@pytest.fixture
+def positions():
+    return [
+        {'id': 'a', 'symbol': 'AAA', 'asset_type': 'equity', 'quantity': 10, 'value': 1000.0},
+        {'id': 'b', 'symbol': 'BBB', 'asset_type': 'equity', 'quantity': 5, 'value': 2000.0},
+        {'id': 'c', 'symbol': 'CCC', 'asset_type': 'bond', 'quantity': 20, 'value': 3000.0},
+    ]
+
+
+@pytest.fixture
+def builds():
+    return []
+
+
+@pytest.fixture
+def hub(positions, builds):
+    def loader(portfolio_id):
+        builds.append(portfolio_id)
+        return [dict(p) for p in positions]
+    return DashboardHub(loader, _history, CovarianceService(), queue_size=5, heartbeat=0.01)
+
+
+def _events(subscriber):
+    events = []
+    while not subscriber.empty():
+        event, data = subscriber.get_nowait().strip().split('\n')
+        events.append((event[len('event: '):], json.loads(data[len('data: '):])))
+    return events
+
+
+def test_incremental_updates_match_a_full_recompute(hub, positions):
+    subscriber = hub.subscribe('p1')
+    channel = hub.channels['p1']
+    hub.update_position('p1', 'a', value=1500.0, quantity=15)
+    hub.update_position('p1', 'c', price=120.0)
+    hub.update_position('p1', 'b', quantity=0)
+
+    expected = {'a': 1500.0, 'b': 0.0, 'c': 2400.0}
+    for p in positions:
+        p['value'] = expected[p['id']]
+    fresh = PortfolioChannel('p1', positions, hub.covariance_service.latest(list(SYMBOLS), 'ledoit_wolf'))
+    assert channel.value == pytest.approx(fresh.value)
+    assert channel.var == pytest.approx(fresh.var, rel=1e-10)
+    assert channel.stress_loss == pytest.approx(fresh.stress_loss)
+    assert channel.allocation() == fresh.allocation()
+
+    events = _events(subscriber)
+    assert [event for event, _ in events] == ['snapshot', 'update', 'update', 'update']
+    assert events[-1][1]['version'] == 3 and events[-1][1]['value_delta'] == -2000.0
+    # Une mise à jour sans effet n'est pas diffusée
+    assert hub.update_position('p1', 'a', value=1500.0) is None
+    assert hub.update_position('unknown', 'a', value=1.0) is None
+
+
+def test_concurrent_first_subscribers_share_one_build(hub, builds):
+    loader = hub.snapshot_loader
+    hub.snapshot_loader = lambda portfolio_id: time.sleep(0.05) or loader(portfolio_id)
+    subscribers = []
+    threads = [threading.Thread(target=lambda: subscribers.append(hub.subscribe('p1'))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert builds == ['p1']
+    assert len(hub.channels['p1'].subscribers) == 8
+
+    for subscriber in subscribers:
+        hub.unsubscribe('p1', subscriber)
+    assert 'p1' not in hub.channels and 'p1' not in hub._build_locks
+
+
+def test_dated_histories_are_aligned_on_common_dates():
+    dates = pd.bdate_range('2024-01-01', periods=300)
+    base = pd.Series(np.random.default_rng(0).normal(0, 0.01, 300), index=dates)
+    # Même série, avec cinq jours de cotation manquants peu avant la fin
+    histories = {'AAA': base, 'BBB': base.drop(dates[280:285])}
+    loader = lambda portfolio_id: [
+        {'id': s, 'symbol': s, 'asset_type': 'equity', 'quantity': 1, 'value': 100.0} for s in histories]
+
+    def correlation(aligner):
+        hub = DashboardHub(loader, histories.get, CovarianceService(), aligner=aligner)
+        hub.subscribe('p1')
+        matrix = hub.channels['p1'].covariance
+        return matrix[0, 1] / np.sqrt(matrix[0, 0] * matrix[1, 1])
+
+    joined = lambda returns: pd.concat(returns, axis=1, join='inner').to_numpy().T
+    assert correlation(joined) > 0.95
+    # Sans dates, le raccourcissement par la fin décale une partie de l'historique
+    assert correlation(None) < 0.5
+
+
+def test_refresh_rebuilds_the_channel_and_keeps_subscribers(hub, positions, builds):
+    subscriber = hub.subscribe('p1')
+    positions.append({'id': 'd', 'symbol': 'AAA', 'asset_type': 'cash', 'quantity': 1, 'value': 4000.0})
+    # Position inconnue du canal: recalcul complet plutôt qu'un delta
+    assert hub.update_position('p1', 'd', value=4000.0) is None
+    assert builds == ['p1', 'p1']
+    channel = hub.channels['p1']
+    assert channel.subscribers == [subscriber]
+    assert channel.value == 10_000.0 and channel.version == 1
+    events = _events(subscriber)
+    assert [event for event, _ in events] == ['snapshot', 'snapshot']
+    assert events[-1][1]['allocation']['cash'] == 40.0
+    # Portefeuille non suivi: rien à recalculer
+    assert hub.refresh('p2') is None and builds == ['p1', 'p1']
+
+
+def test_slow_subscriber_is_resynchronised_with_a_snapshot(hub):
+    subscriber = hub.subscribe('p1')
+    for i in range(10):
+        hub.update_position('p1', 'a', value=1000.0 + i + 1)
+    events = _events(subscriber)
+    assert events[0][0] == 'snapshot'
+    assert events[0][1]['version'] >= 5 and len(events) <= 5
+    assert events[-1][1]['version'] == 10
+
+
+def test_stream_sends_heartbeats_and_unsubscribes(hub):
+    subscriber = hub.subscribe('p1')
+    stream = hub.stream('p1', subscriber)
+    assert next(stream).startswith('event: snapshot')
+    assert next(stream) == ': keep-alive\n\n'
+    stream.close()
+    assert 'p1' not in hub.channels
+
+
+def test_deleting_an_asset_refreshes_the_followed_channel(finrisk, client, make_portfolio):
+    portfolio_id = make_portfolio([('AAPL', 'equity', 10, 100.0), ('MSFT', 'equity', 10, 300.0)])
+    subscriber = finrisk.dashboard_hub.subscribe(portfolio_id)
+    try:
+        with finrisk.app.app_context():
+            asset = finrisk.Asset.query.filter_by(portfolio_id=portfolio_id, symbol='MSFT').first()
+            asset_id = asset.id
+        assert client.delete(f'/api/assets/{asset_id}').status_code == 200
+        assert client.delete(f'/api/assets/{asset_id}').status_code == 404
+        event, snapshot = _events(subscriber)[-1]
+        assert event == 'snapshot' and snapshot['value'] == 1000.0
+        assert asset_id not in finrisk.dashboard_hub.channels[portfolio_id].positions
+    finally:
+        finrisk.dashboard_hub.unsubscribe(portfolio_id, subscriber)
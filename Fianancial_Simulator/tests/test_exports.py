@@ -0,0 +1,115 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from services import export_service
+from services.export_service import StreamingExporter
+
+COLUMNS = [('id', 'string'), ('created_at', 'timestamp'), ('value', 'float'), ('count', 'int')]
+ROWS = [('a', datetime(2024, 1, 2, 3, 4), 1.5, np.int64(2)), ('b', datetime(2024, 1, 3), np.nan, 3),
+        ('c', datetime(2024, 1, 4), 2.0, 4)]
+
+
+def test_csv_is_streamed_in_chunks():
+    chunks = list(StreamingExporter('csv', COLUMNS, chunk_rows=2).stream(iter(ROWS)))
+    assert len(chunks) == 2
+    rows = list(csv.reader(io.StringIO(''.join(chunks))))
+    assert rows[0] == ['id', 'created_at', 'value', 'count']
+    assert rows[1] == ['a', '2024-01-02T03:04:00', '1.5', '2']
+    assert rows[2][2] == ''  # NaN -> cellule vide
+
+
+def test_ndjson_rows_are_json_native():
+    lines = ''.join(StreamingExporter('ndjson', COLUMNS, chunk_rows=2).stream(ROWS)).splitlines()
+    records = [json.loads(line) for line in lines]
+    assert records[0] == {'id': 'a', 'created_at': '2024-01-02T03:04:00', 'value': 1.5, 'count': 2}
+    assert records[1]['value'] is None
+
+
+def test_unknown_or_unavailable_formats_are_rejected():
+    with pytest.raises(ValueError):
+        StreamingExporter('xlsx', COLUMNS)
+    if export_service.pq is None:
+        with pytest.raises(ValueError, match='pyarrow'):
+            StreamingExporter('parquet', COLUMNS)
+
+
+@pytest.fixture
+def portfolio_id(make_portfolio):
+    return make_portfolio([('AAPL', 'equity', 10, 100.0), ('^TNX', 'bond', 20, 50.0)], name='Exports')
+
+
+def _simulate(client, portfolio_id, sim_type, **parameters):
+    response = client.post('/api/simulations', json={'name': sim_type, 'type': sim_type,
+                                                     'portfolio_id': portfolio_id, 'parameters': parameters})
+    assert response.status_code == 200
+    return response.get_json()['id']
+
+
+def test_simulation_export_filters_and_formats(client, portfolio_id):
+    sim_id = _simulate(client, portfolio_id, 'stress_test')
+    _simulate(client, portfolio_id, 'var', confidence_level=0.95)
+    response = client.get(f'/api/exports/simulations?format=ndjson&type=stress_test&portfolio_id={portfolio_id}')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert 'simulations.ndjson' in response.headers['Content-Disposition']
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [r['id'] for r in records] == [sim_id]
+    assert records[0]['total_loss'] == 1000 * 0.3 + 1000 * 0.1 and records[0]['var'] is None
+
+    assert client.get('/api/exports/simulations?format=xml').status_code == 400
+    assert client.get('/api/exports/simulations?start=demain').status_code == 400
+
+
+def test_stress_breakdown_uses_the_stored_detail(finrisk, client, portfolio_id):
+    sim_id = _simulate(client, portfolio_id, 'stress_test')
+    total_loss = 1000 * 0.3 + 1000 * 0.1
+    # Positions modifiées après la simulation: l'export reste celui de la simulation
+    with finrisk.app.app_context():
+        asset_id = finrisk.Asset.query.filter_by(portfolio_id=portfolio_id, symbol='AAPL').first().id
+    assert client.patch(f'/api/assets/{asset_id}', json={'quantity': 50}).status_code == 200
+
+    response = client.get(f'/api/exports/stress-breakdown?portfolio_id={portfolio_id}')
+    rows = [r for r in csv.DictReader(io.StringIO(response.get_data(as_text=True))) if r['simulation_id'] == sim_id]
+    assert {r['symbol']: float(r['current_value']) for r in rows} == {'AAPL': 1000.0, '^TNX': 1000.0}
+    assert sum(float(r['loss']) for r in rows) == pytest.approx(total_loss)
+
+
+def test_loss_vector_is_labelled_as_recomputed(client, portfolio_id):
+    sim_id = _simulate(client, portfolio_id, 'var', confidence_level=0.95)
+    response = client.get(f'/api/exports/simulations/{sim_id}/losses')
+    assert response.status_code == 200
+    assert response.headers['X-Data-Source'] == 'recomputed'
+    assert float(response.headers['X-Stored-VaR']) > 0
+    assert f'losses_{sim_id}_recomputed.csv' in response.headers['Content-Disposition']
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert len(rows) > 100
+    assert all(float(r['loss']) == -float(r['pnl']) for r in rows[:10])
+
+
+def test_loss_vector_rejects_non_reproducible_or_parametric_simulations(client, portfolio_id):
+    factor_id = _simulate(client, portfolio_id, 'var', method='factor')
+    assert client.get(f'/api/exports/simulations/{factor_id}/losses').status_code == 400
+    stress_id = _simulate(client, portfolio_id, 'stress_test')
+    assert client.get(f'/api/exports/simulations/{stress_id}/losses').status_code == 400
+    assert client.get('/api/exports/simulations/unknown/losses').status_code == 404
+
+    option = {'option_type': 'put', 'underlying_symbol': 'UND', 'underlying_price': 100, 'strike': 95,
+              'maturity': 0.25, 'volatility': 0.3}
+    response = client.post('/api/portfolios', json={'name': 'Options', 'assets': [
+        {'name': 'Put', 'symbol': 'PUT1', 'type': 'equity', 'quantity': 10, 'purchase_price': 2, 'option': option}]})
+    options_id = response.get_json()['id']
+    unseeded = _simulate(client, options_id, 'option_var', n_scenarios=500)
+    assert client.get(f'/api/exports/simulations/{unseeded}/losses').status_code == 409
+    seeded = _simulate(client, options_id, 'option_var', n_scenarios=500, seed=7)
+    response = client.get(f'/api/exports/simulations/{seeded}/losses?format=ndjson')
+    assert response.status_code == 200
+    first = response.get_data(as_text=True).splitlines()
+    assert len(first) == 500
+    # Même graine: même vecteur
+    again = client.get(f'/api/exports/simulations/{seeded}/losses?format=ndjson').get_data(as_text=True)
+    assert again.splitlines() == first
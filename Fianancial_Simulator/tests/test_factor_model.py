@@ -0,0 +1,75 @@
+import json
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from scipy import stats
+
+from services.factor_model import FactorRiskModel
+from services.risk_calculator import AdvancedRiskCalculator
+
+
+@pytest.mark.parametrize('asset_type', FactorRiskModel.ASSET_TYPES)
+def test_single_asset_volatility_matches_the_type_volatility(asset_type):
+    # Taux, facteur de type et risque spécifique ne s'additionnent pas au-delà de la volatilité du type
+    model = FactorRiskModel()
+    exposures, specific = model.exposures_from_arrays([asset_type])
+    volatility = model.decompose([1.0], exposures, specific)['volatility']
+    assert volatility == pytest.approx(FactorRiskModel.TYPE_VOLATILITIES[asset_type])
+
+
+def test_bond_risk_is_carried_by_the_rates_factor():
+    model = FactorRiskModel()
+    exposures, specific = model.exposures_from_arrays(['bond'])
+    risk = model.decompose([1.0], exposures, specific)
+    assert set(risk['factor_contributions']) == {'rates:duration'}
+    assert risk['factor_exposures']['rates:duration'] == pytest.approx(-7.0)
+
+
+def test_decomposition_matches_the_dense_covariance():
+    model = FactorRiskModel()
+    rng = np.random.default_rng(0)
+    types = rng.choice(FactorRiskModel.ASSET_TYPES, 50)
+    sectors = rng.choice(FactorRiskModel.SECTORS + ('unknown',), 50)
+    exposures, specific = model.exposures_from_arrays(types, sectors)
+    weights = rng.random(50)
+    weights /= weights.sum()
+
+    dense = exposures @ model.factor_covariance @ exposures.T + np.diag(specific)
+    risk = model.decompose(weights, exposures, specific)
+    assert risk['volatility'] == pytest.approx(np.sqrt(weights @ dense @ weights))
+    # Contributions d'Euler: leur somme redonne la volatilité
+    total = sum(risk['factor_contributions'].values()) + risk['specific_contribution']
+    assert total == pytest.approx(risk['volatility'])
+
+
+def test_calibrate_rejects_the_wrong_number_of_factors():
+    with pytest.raises(ValueError):
+        FactorRiskModel().calibrate(np.zeros((100, 3)))
+
+
+def test_risk_calculator_var_uses_the_factor_model():
+    assets = [SimpleNamespace(asset_type='bond', current_value=600.0, quantity=1, purchase_price=600.0),
+              SimpleNamespace(asset_type='equity', current_value=400.0, quantity=1, purchase_price=400.0)]
+    portfolio = SimpleNamespace(assets=assets, total_value=1000.0)
+    calculator = AdvancedRiskCalculator(data_service=None)
+    volatility = FactorRiskModel().portfolio_volatility(portfolio)
+    expected = round(1000.0 * stats.norm.ppf(0.99) * volatility, 2)
+    assert calculator.calculate_var(portfolio, confidence=0.99) == pytest.approx(expected)
+
+
+def test_factor_var_simulation(client, finrisk, make_portfolio):
+    portfolio_id = make_portfolio([('BND', 'bond', 100, 100.0)])
+    response = client.post('/api/simulations', json={
+        'name': 'VaR factorielle', 'type': 'var', 'portfolio_id': portfolio_id,
+        'parameters': {'method': 'factor', 'confidence_level': 0.99, 'time_horizon': 10}
+    })
+    assert response.status_code == 200
+    with finrisk.app.app_context():
+        results = json.loads(finrisk.db.session.get(finrisk.Simulation, response.get_json()['id']).results)
+
+    assert results['method'] == 'factor'
+    assert results['volatility'] == pytest.approx(0.08)
+    assert results['var'] == pytest.approx(10_000 * stats.norm.ppf(0.99) * 0.08 * np.sqrt(10 / 252), abs=0.01)
+    assert results['cvar'] > results['var']
+    assert 'rates:duration' in results['factor_contributions']
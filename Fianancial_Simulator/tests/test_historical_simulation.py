@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.historical_simulation import HistoricalSimulationEngine
+
+
+def test_tail_metrics_select_the_ordered_loss():
+    returns = -np.arange(1, 101) / 1000  # pertes de 0,1 % à 10 %
+    var, es = HistoricalSimulationEngine().compute(returns, (0.95,))[0.95]
+    # 5 % de 100 scénarios: la 5e pire perte, l'ES est la moyenne des 5 pires
+    assert var == pytest.approx(0.096)
+    assert es == pytest.approx(np.mean([0.100, 0.099, 0.098, 0.097, 0.096]))
+
+
+def test_aggregate_horizon_compounds_overlapping_windows():
+    returns = np.random.default_rng(0).normal(0, 0.01, 50)
+    aggregated = HistoricalSimulationEngine.aggregate_horizon(returns, 10)
+    expected = [np.prod(1 + returns[i:i + 10]) - 1 for i in range(41)]
+    np.testing.assert_allclose(aggregated, expected, rtol=1e-10, atol=1e-15)
+
+
+def test_aggregate_horizon_rejects_history_shorter_than_horizon():
+    with pytest.raises(ValueError):
+        HistoricalSimulationEngine.aggregate_horizon(np.zeros(10), 10)
+
+
+def test_filtered_returns_match_the_ewma_recursion():
+    returns = np.random.default_rng(1).standard_t(4, 300) * 0.01
+    engine = HistoricalSimulationEngine('filtered', ewma_lambda=0.94)
+
+    lam = 0.94
+    variance = np.empty(returns.size)
+    variance[0] = np.mean(returns[:30] ** 2)
+    for t in range(1, returns.size):
+        variance[t] = lam * variance[t - 1] + (1 - lam) * returns[t - 1] ** 2
+    current = lam * variance[-1] + (1 - lam) * returns[-1] ** 2
+    expected = returns / np.sqrt(variance) * np.sqrt(current)
+
+    np.testing.assert_allclose(engine.filter_returns(returns), expected, rtol=1e-10)
+
+
+def test_age_weights_favour_recent_observations():
+    weights = HistoricalSimulationEngine('age_weighted', decay=0.98).age_weights(250)
+    assert weights.sum() == pytest.approx(1.0)
+    assert np.all(np.diff(weights) > 0)
+    np.testing.assert_allclose(HistoricalSimulationEngine(decay=1.0).age_weights(4), 0.25)
+
+
+def test_weighted_tail_metrics_with_equal_weights_match_unweighted():
+    # 1/1024 exact en binaire: les poids cumulés tombent sur les mêmes rangs que la sélection
+    scenarios = np.random.default_rng(2).normal(0, 0.01, 1024)
+    weights = np.full(scenarios.size, 1 / scenarios.size)
+    levels = (0.95, 0.99)
+    weighted = HistoricalSimulationEngine.weighted_tail_metrics(scenarios, weights, levels)
+    plain = HistoricalSimulationEngine.tail_metrics(scenarios, levels)
+    for level in levels:
+        assert weighted[level] == pytest.approx(plain[level])
+
+
+def test_align_returns_keeps_only_common_dates(finrisk):
+    dates = pd.bdate_range('2024-01-01', periods=6)
+    first = pd.Series([1.0, 2.0, 3.0, 4.0, 5.0, 6.0], index=dates)
+    # Jour manquant au milieu et historique plus court: la troncature décalerait les séries
+    second = pd.Series([20.0, 40.0, 50.0], index=dates[[1, 3, 4]])
+    aligned = finrisk.align_returns([first, second])
+    np.testing.assert_array_equal(aligned, [[2.0, 4.0, 5.0], [20.0, 40.0, 50.0]])
+
+
+def test_var_horizon_longer_than_history_is_rejected(client, make_portfolio):
+    portfolio_id = make_portfolio([('AAA', 'equity', 10, 100.0)])
+    response = client.post('/api/simulations', json={
+        'name': 'VaR', 'type': 'var', 'portfolio_id': portfolio_id,
+        'parameters': {'confidence_level': 0.99, 'time_horizon': 5000}
+    })
+    assert response.status_code == 400
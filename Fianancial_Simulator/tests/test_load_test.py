@@ -0,0 +1,77 @@
+import json
+import threading
+
+import pytest
+
+from benchmarks import load_test
+
+
+def test_summarize_groups_latencies_by_endpoint():
+    samples = [('var', 0.1, 200), ('var', 0.3, 500), ('dashboard', 0.02, 200)]
+    report = load_test.summarize(samples, elapsed=2.0)
+    assert set(report) == {'var', 'dashboard', 'total'}
+    assert report['var']['requests'] == 2 and report['var']['errors'] == 1
+    assert report['var']['p50_ms'] == pytest.approx(200.0)
+    assert report['var']['max_ms'] == pytest.approx(300.0)
+    assert report['total']['requests'] == 3 and report['total']['throughput_rps'] == 1.5
+
+
+def test_compare_reports_relative_changes():
+    baseline = {'version': 'abc', 'timestamp': 't0', 'endpoints': {
+        'var': {'p95_ms': 100.0, 'throughput_rps': 10.0},
+        'pdf': {'p95_ms': 0.0, 'throughput_rps': 0.0}}}
+    report = {'endpoints': {'var': {'p95_ms': 120.0, 'throughput_rps': 8.0},
+                            'pdf': {'p95_ms': 5.0, 'throughput_rps': 1.0},
+                            'login': {'p95_ms': 5.0, 'throughput_rps': 1.0}}}
+    comparison = load_test.compare(report, baseline)
+    assert comparison['baseline_version'] == 'abc'
+    assert comparison['endpoints']['var'] == {'p95_change_pct': 20.0, 'throughput_change_pct': -20.0}
+    assert comparison['endpoints']['pdf'] == {'p95_change_pct': None, 'throughput_change_pct': None}
+    assert 'login' not in comparison['endpoints']
+    assert load_test._format_change(None) == 'n/a'
+    assert load_test._format_change(-20.0) == '-20.0%'
+
+
+def test_parse_mix():
+    assert load_test.parse_mix('') == load_test.DEFAULT_MIX
+    assert load_test.parse_mix('dashboard=50,var') == {'dashboard': 50.0, 'var': 1.0}
+    with pytest.raises(ValueError):
+        load_test.parse_mix('checkout=10')
+
+
+def test_stub_market_data_is_reproducible():
+    market_data = load_test.StubMarketData(days=100)
+    first = market_data.download('AAA')
+    assert len(first) == 101 and market_data.calls == 1
+    assert first.equals(market_data.download('AAA'))
+    assert not first['Adj Close'].equals(market_data.download('BBB')['Adj Close'])
+
+
+def test_virtual_users_against_a_live_server(finrisk):
+    from werkzeug.serving import make_server
+
+    # Plus d'actifs que de symboles dans l'univers: l'univers est agrandi
+    accounts = load_test.seed_database(finrisk, 2, assets_per_portfolio=12, universe=5)
+    with finrisk.app.app_context():
+        portfolio = finrisk.db.session.get(finrisk.Portfolio, accounts[0][1])
+        assert len({asset.symbol for asset in portfolio.assets}) == 12
+
+    server = make_server('127.0.0.1', 0, finrisk.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        base_url = f'http://127.0.0.1:{server.server_port}'
+        mix = load_test.parse_mix('dashboard=1,portfolios=1,var=1,stress_test=1,pdf=1')
+        users = [load_test.VirtualUser(base_url, username, portfolio_id, mix, seed)
+                 for seed, (username, portfolio_id) in enumerate(accounts)]
+        for user in users:
+            user.run(deadline=float('inf'), max_requests=8, think_time=0)
+    finally:
+        server.shutdown()
+
+    samples = [sample for user in users for sample in user.samples]
+    assert len(samples) == 16
+    assert all(status == 200 for _, _, status in samples), samples
+    report = load_test.summarize(samples, 1.0)
+    assert report['total']['errors'] == 0 and report['login']['requests'] == 2
+    json.dumps(report)
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from services.historical_simulation import HistoricalSimulationEngine
+from services.loss_aggregator import StreamingLossAggregator, TDigest
+
+
+@pytest.fixture
+def pnl():
+    return np.random.default_rng(0).standard_t(4, 200_000) * 1000
+
+
+def test_tdigest_tail_quantiles(pnl):
+    digest = TDigest(compression=500)
+    for chunk in np.array_split(pnl, 20):
+        digest.update(chunk)
+    assert digest.count == pnl.size
+    for q in (0.001, 0.01, 0.05, 0.5, 0.99):
+        exact = np.quantile(pnl, q)
+        # Erreur en rang: le t-digest est précis en rang, surtout dans les queues
+        rank = np.searchsorted(np.sort(pnl), digest.quantile(q)) / pnl.size
+        assert rank == pytest.approx(q, abs=max(q * 0.02, 5e-5)), (q, exact)
+    tail = np.sort(pnl)[:int(0.01 * pnl.size)]
+    assert digest.lower_tail_mean(0.01) == pytest.approx(tail.mean(), rel=0.01)
+
+
+def test_tdigest_merge_matches_a_single_digest(pnl):
+    parts = [TDigest(500).update(chunk) for chunk in np.array_split(pnl, 4)]
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+    single = TDigest(500).update(pnl)
+    assert merged.count == single.count
+    assert (merged.min, merged.max) == (pnl.min(), pnl.max())
+    assert merged.quantile(0.01) == pytest.approx(single.quantile(0.01), rel=0.01)
+
+
+def test_exact_tail_matches_historical_simulation(pnl):
+    aggregator = StreamingLossAggregator((0.99, 0.999), tail_capacity=5_000)
+    aggregator.consume(np.array_split(pnl, 50))
+    expected = HistoricalSimulationEngine.tail_metrics(pnl, (0.99, 0.999))
+    for level in (0.99, 0.999):
+        assert aggregator.is_exact(level)
+        assert aggregator.tail_metrics(level) == pytest.approx(expected[level])
+
+
+def test_only_tail_capacity_losses_are_trusted_after_a_trim():
+    rng = np.random.default_rng(1)
+    first, second = rng.normal(size=250), rng.normal(size=50)
+    aggregator = StreamingLossAggregator(tail_capacity=100)
+    aggregator.update(first)  # 250 > 2 × 100: élagué aux 100 pires pertes
+    aggregator.update(second)  # tampon de 150, dont 50 valeurs récentes non triées
+    assert aggregator.count == 300
+
+    everything = np.concatenate((first, second))
+    within = 1 - 60 / 300  # rang 60 ≤ tail_capacity: exact
+    beyond = 1 - 120 / 300  # rang 120: le tampon ne contient plus les bonnes pertes
+    assert aggregator.is_exact(within)
+    assert aggregator.tail_metrics(within) == pytest.approx(
+        HistoricalSimulationEngine.tail_metrics(everything, (within,))[within])
+    assert not aggregator.is_exact(beyond)
+
+
+def test_merge_keeps_exact_tails_and_the_trim_flag(pnl):
+    parts = [StreamingLossAggregator(tail_capacity=1_000).update(chunk) for chunk in np.array_split(pnl, 4)]
+    merged = StreamingLossAggregator.merge_all(parts)
+    assert merged.count == pnl.size
+    assert merged.total == pytest.approx(pnl.sum())
+    assert merged._trimmed
+    var, es = merged.tail_metrics(0.999)
+    assert (var, es) == pytest.approx(HistoricalSimulationEngine.tail_metrics(pnl, (0.999,))[0.999])
+
+
+def test_result_format_and_non_finite_values():
+    aggregator = StreamingLossAggregator((0.95,))
+    aggregator.update([np.nan, np.inf, -1.0, 1.0])
+    result = aggregator.result(0.95)
+    assert result['n_scenarios'] == 2
+    assert result['var'] == 1.0
+    assert set(result['levels']) == {'0.95'}
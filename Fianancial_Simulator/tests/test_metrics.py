@@ -0,0 +1,99 @@
+import time
+
+import pytest
+
+from utils.metrics import MetricsRegistry
+from utils.profiler import ProfileStore, SamplingProfiler
+from utils.security import SecurityUtils
+
+
+def test_prometheus_rendering():
+    registry = MetricsRegistry(prefix='test')
+    registry.describe('requests_total', 'Requêtes')
+    registry.increment('requests_total', endpoint='var', status=200)
+    registry.increment('requests_total', 2, endpoint='var', status=200)
+    registry.register_gauge('cache_entries', lambda: 7, cache='users')
+    registry.register_gauge('broken', lambda: 1 / 0)
+    registry.observe('duration_seconds', 0.003, path='a"b')
+    registry.observe('duration_seconds', 0.2, path='a"b')
+
+    text = registry.render_prometheus()
+    assert '# HELP test_requests_total Requêtes' in text
+    assert 'test_requests_total{endpoint="var",status="200"} 3' in text
+    assert 'test_cache_entries{cache="users"} 7' in text
+    assert 'test_broken' not in text  # une jauge en erreur n'empêche pas l'exposition
+    # Buckets cumulatifs et étiquettes échappées
+    assert 'test_duration_seconds_bucket{path="a\\"b",le="0.005"} 1' in text
+    assert 'test_duration_seconds_bucket{path="a\\"b",le="0.25"} 2' in text
+    assert 'test_duration_seconds_bucket{path="a\\"b",le="+Inf"} 2' in text
+    assert 'test_duration_seconds_count{path="a\\"b"} 2' in text
+
+
+def test_span_and_timed_record_durations():
+    registry = MetricsRegistry()
+
+    @registry.timed('kernel', kernel='demo')
+    def work():
+        return 42
+
+    with registry.span('block'):
+        pass
+    assert work() == 42
+    text = registry.render_prometheus()
+    assert 'finrisk_span_duration_seconds_count{kernel="demo",span="kernel"} 1' in text
+    assert 'finrisk_span_duration_seconds_count{span="block"} 1' in text
+
+
+def test_sampling_profiler_and_store():
+    profiler = SamplingProfiler(interval=0.001).start()
+    deadline = time.perf_counter() + 0.1
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+    profiler.stop()
+    assert profiler.sample_count > 0
+    assert 'test_sampling_profiler_and_store' in profiler.collapsed()
+
+    store = ProfileStore(max_profiles=2)
+    for profile_id in ('a', 'b', 'c'):
+        store.add(profile_id, profiler)
+    assert len(store) == 2 and store.get('a') is None and store.get('c') is not None
+
+
+def test_bearer_token_check():
+    assert SecurityUtils.check_bearer_token('Bearer s3cret', 's3cret')
+    assert SecurityUtils.check_bearer_token('bearer s3cret ', 's3cret')
+    assert not SecurityUtils.check_bearer_token('Bearer other', 's3cret')
+    assert not SecurityUtils.check_bearer_token('Basic s3cret', 's3cret')
+    assert not SecurityUtils.check_bearer_token('Bearer ', None)
+
+
+@pytest.fixture
+def admin_token(finrisk, monkeypatch):
+    monkeypatch.setitem(finrisk.app.config, 'ADMIN_TOKEN', 'admin-test')
+    return {'Authorization': 'Bearer admin-test'}
+
+
+def test_metrics_endpoint_requires_the_admin_token(finrisk, admin_token):
+    client = finrisk.app.test_client()
+    client.get('/')
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    response = client.get('/metrics', headers=admin_token)
+    assert response.status_code == 200
+    assert 'finrisk_requests_total' in response.get_data(as_text=True)
+
+
+def test_admin_endpoints_are_disabled_without_a_token(finrisk, monkeypatch):
+    monkeypatch.setitem(finrisk.app.config, 'ADMIN_TOKEN', None)
+    client = finrisk.app.test_client()
+    assert client.get('/metrics').status_code == 404
+    assert client.get('/debug/profile/x').status_code == 404
+
+
+def test_request_profile_is_served_to_admins_only(finrisk, client, admin_token, monkeypatch):
+    monkeypatch.setitem(finrisk.app.config, 'PROFILING_ENABLED', True)
+    response = client.get('/api/portfolios?profile=1')
+    profile_id = response.headers['X-Profile-Id']
+    assert client.get(f'/debug/profile/{profile_id}').status_code == 401
+    assert client.get(f'/debug/profile/{profile_id}', headers=admin_token).status_code == 200
+    assert client.get('/debug/profile/unknown', headers=admin_token).status_code == 404
@@ -0,0 +1,107 @@
+import json
+
+import numpy as np
+import pytest
+
+from services import risk_kernels
+from services.option_pricing import OptionBook, OptionRiskEngine, black_scholes_greeks, black_scholes_price
+
+
+def test_black_scholes_reference_prices():
+    assert black_scholes_price(100.0, 100.0, 1.0, 0.05, 0.2, True) == pytest.approx(10.4506, abs=1e-4)
+    assert black_scholes_price(100.0, 100.0, 1.0, 0.05, 0.2, False) == pytest.approx(5.5735, abs=1e-4)
+
+
+@pytest.mark.parametrize('is_call', [True, False])
+def test_greeks_match_finite_differences(is_call):
+    spot, strike, maturity, rate, vol = 105.0, 100.0, 0.5, 0.03, 0.25
+    greeks = black_scholes_greeks(spot, strike, maturity, rate, vol, is_call)
+    price = lambda s=spot, t=maturity, v=vol: black_scholes_price(s, strike, t, rate, v, is_call)
+    h = 1e-3
+    assert greeks['delta'] == pytest.approx((price(s=spot + h) - price(s=spot - h)) / (2 * h), rel=1e-6)
+    assert greeks['gamma'] == pytest.approx((price(s=spot + h) - 2 * price() + price(s=spot - h)) / h ** 2, rel=1e-4)
+    assert greeks['vega'] == pytest.approx((price(v=vol + h) - price(v=vol - h)) / (2 * h), rel=1e-5)
+    # Theta: dérivée par rapport au temps calendaire (maturité décroissante)
+    assert greeks['theta'] == pytest.approx(-(price(t=maturity + h) - price(t=maturity - h)) / (2 * h), rel=1e-5)
+
+
+def _book(rate=0.02):
+    return OptionBook(quantity=[10, -5, 100], underlying_index=[0, 0, 1], strike=[100, 110, 0],
+                      maturity=[0.5, 1.0, 0], volatility=[0.2, 0.25, 0], is_call=[True, False, False],
+                      is_option=[True, True, False], rate=rate)
+
+
+def test_linear_positions_are_valued_at_spot():
+    values = _book().values(np.array([100.0, 50.0]))
+    assert values[2] == 50.0
+    assert values[0] == pytest.approx(black_scholes_price(100.0, 100.0, 0.5, 0.02, 0.2, True))
+
+
+def test_each_position_is_priced_at_its_own_rate():
+    book = _book(rate=[0.01, 0.08, 0.0])
+    values = book.values(np.array([100.0, 50.0]))
+    assert values[0] == pytest.approx(black_scholes_price(100.0, 100.0, 0.5, 0.01, 0.2, True))
+    assert values[1] == pytest.approx(black_scholes_price(100.0, 110.0, 1.0, 0.08, 0.25, False))
+
+
+def test_delta_gamma_tracks_full_revaluation_over_short_horizons():
+    engine = OptionRiskEngine(_book(rate=[0.01, 0.05, 0.0]), [100.0, 50.0], [0.2, 0.3], [[1, 0.5], [0.5, 1]], seed=0)
+    log_returns = engine.simulate_log_returns(20_000, horizon_days=1)
+    approx = engine.delta_gamma_pnl(log_returns, 1)
+    full = engine.full_revaluation_pnl(log_returns, 1)
+    assert np.corrcoef(approx, full)[0, 1] > 0.999
+    var_approx = engine.calculate_var('delta_gamma', (0.99,), log_returns=log_returns)[0.99][0]
+    var_full = engine.calculate_var('full_revaluation', (0.99,), log_returns=log_returns)[0.99][0]
+    assert var_approx == pytest.approx(var_full, rel=0.05)
+
+
+def test_revaluation_backends_agree_with_per_position_rates():
+    book = _book(rate=[0.01, 0.08, 0.0])
+    engine = OptionRiskEngine(book, [100.0, 50.0], [0.2, 0.3], seed=1)
+    log_returns = engine.simulate_log_returns(500, horizon_days=5)
+    numpy_pnl = risk_kernels.revalue_scenarios(book, engine.spots, log_returns, 5 / 252, backend='numpy')
+    jit_pnl = risk_kernels.revalue_scenarios(book, engine.spots, log_returns, 5 / 252, backend='jit')
+    np.testing.assert_allclose(jit_pnl, numpy_pnl, rtol=1e-10, atol=1e-9)
+
+
+def test_unknown_method_is_rejected():
+    engine = OptionRiskEngine(_book(), [100.0, 50.0], [0.2, 0.3], seed=0)
+    with pytest.raises(ValueError):
+        engine.calculate_var('monte_carlo')
+
+
+@pytest.fixture
+def option_portfolio(client):
+    option = lambda rate: {'option_type': 'call', 'underlying_price': 100, 'strike': 100, 'maturity': 0.5,
+                           'volatility': 0.2, 'rate': rate}
+    response = client.post('/api/portfolios', json={'name': 'Options', 'assets': [
+        {'name': 'Call 1 %', 'symbol': 'OPT1', 'type': 'equity', 'quantity': 10, 'purchase_price': 5,
+         'option': {**option(0.01), 'underlying_symbol': 'UND'}},
+        {'name': 'Call 6 %', 'symbol': 'OPT2', 'type': 'equity', 'quantity': 10, 'purchase_price': 5,
+         'option': {**option(0.06), 'underlying_symbol': 'UND'}},
+    ]})
+    return response.get_json()['id']
+
+
+def test_option_engine_uses_each_contract_rate(finrisk, option_portfolio):
+    with finrisk.app.app_context():
+        portfolio = finrisk.db.session.get(finrisk.Portfolio, option_portfolio)
+        engine = finrisk.build_option_engine(portfolio, seed=0)
+        assert sorted(engine.book.rate) == [0.01, 0.06]
+        assert {round(a.current_value, 6) for a in portfolio.assets} == {
+            round(10 * float(black_scholes_price(100.0, 100.0, 0.5, r, 0.2, True)), 6) for r in (0.01, 0.06)}
+
+
+@pytest.mark.parametrize('compare, status, has_comparison', [
+    ('false', 200, False), (0, 200, False), ('true', 200, True), ('maybe', 400, False)])
+def test_option_var_compare_flag(finrisk, client, option_portfolio, compare, status, has_comparison):
+    response = client.post('/api/simulations', json={
+        'name': 'Options', 'type': 'option_var', 'portfolio_id': option_portfolio,
+        'parameters': {'n_scenarios': 2000, 'seed': 3, 'compare': compare}
+    })
+    assert response.status_code == status
+    if status == 200:
+        with finrisk.app.app_context():
+            results = json.loads(finrisk.db.session.get(finrisk.Simulation, response.get_json()['id']).results)
+        assert ('comparison' in results) == has_comparison
+        assert results['var'] > 0
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from benchmarks import kernel_parity
+from services import risk_kernels
+from services.historical_simulation import HistoricalSimulationEngine
+
+BACKENDS = ('jit', 'numpy')
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_drawdowns(backend):
+    series, worst = risk_kernels.drawdowns([100, 120, 90, 130, 65], backend=backend)
+    np.testing.assert_allclose(series, [0, 0, -0.25, 0, -0.5])
+    assert worst == pytest.approx(-0.5)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('decimals', [None, 2])
+def test_rolling_tail_quantile_matches_the_var_order_statistic(backend, decimals):
+    returns = np.random.default_rng(0).standard_t(4, 400) * 0.01
+    if decimals is not None:
+        returns = np.round(returns, decimals)  # nombreux ex-æquo
+    window, confidence = 100, 0.975
+    k = HistoricalSimulationEngine._tail_index(window, confidence)
+    expected = [np.sort(returns[t:t + window])[k] for t in range(returns.size - window + 1)]
+    np.testing.assert_array_equal(risk_kernels.rolling_tail_quantile(returns, window, confidence, backend), expected)
+    with pytest.raises(ValueError):
+        risk_kernels.rolling_tail_quantile(returns, 500, confidence, backend)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_rebalancing_backtest(backend):
+    prices = np.array([[1.0, 1.0], [2.0, 1.0], [4.0, 2.0]])
+    weights = np.array([0.5, 0.5])
+    # Seuil jamais atteint: achat-conservation
+    held = risk_kernels.rebalancing_backtest(prices, weights, threshold=1.0, initial_value=100, backend=backend)
+    np.testing.assert_allclose(held['values'], [100, 150, 300])
+    assert held['rebalances'] == 0 and held['turnover'] == 0
+    # Rééquilibrage à chaque dérive, coûts de transaction déduits
+    traded = risk_kernels.rebalancing_backtest(prices, weights, threshold=0.01, cost_rate=0.01, initial_value=100,
+                                               backend=backend)
+    assert traded['rebalances'] == 1  # le jour 2 ne déforme pas les poids
+    assert traded['turnover'] == pytest.approx(50.0)  # |75 - 100| + |75 - 50|
+    np.testing.assert_allclose(traded['values'], [100, 149.5, 299])
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        risk_kernels.drawdowns([1.0, 2.0], backend='cuda')
+
+
+def test_parity_report_passes_on_small_inputs():
+    report = kernel_parity.run_parity(small=True)
+    assert set(report['kernels']) == {'drawdowns', 'rolling_tail_quantile', 'rolling_tail_quantile_ties',
+                                      'rebalancing_backtest', 'revalue_scenarios'}
+    kernel_parity.assert_parity(report, require_numba=risk_kernels.njit is not None)
+    assert report['kernels']['drawdowns']['identical']
+    assert report['kernels']['rolling_tail_quantile_ties']['identical']
+
+
+def test_assert_parity_reports_failures():
+    report = {'numba': False, 'kernels': {'drawdowns': {'ok': False, 'relative_error': 1e-3}}}
+    with pytest.raises(AssertionError, match='drawdowns'):
+        kernel_parity.assert_parity(report)
+    with pytest.raises(AssertionError, match='Numba'):
+        kernel_parity.assert_parity({'numba': False, 'kernels': {}}, require_numba=True)
+
+
+@pytest.mark.skipif(not risk_kernels.JIT_ENABLED, reason='Numba absent ou désactivé')
+def test_kernels_are_compiled_when_numba_is_enabled():
+    risk_kernels.warmup()
+    assert risk_kernels.BACKEND == 'jit'
+    for kernel in (risk_kernels._drawdowns_loop, risk_kernels._rolling_order_statistic_loop,
+                   risk_kernels._rebalancing_backtest_loop, risk_kernels._revalue_scenarios_loop):
+        assert kernel.signatures
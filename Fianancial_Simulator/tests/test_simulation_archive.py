@@ -0,0 +1,149 @@
+import json
+import uuid
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from services.simulation_archive import SimulationArchive
+
+CUTOFF = datetime(2023, 4, 1)
+
+
+@pytest.fixture
+def archive(finrisk, tmp_path, monkeypatch):
+    """Archive vide propre au test, utilisée par les routes de l'application"""
+    archive = SimulationArchive(str(tmp_path / 'archive'))
+    monkeypatch.setattr(finrisk, 'simulation_archive', archive)
+    return archive
+
+
+@pytest.fixture
+def old_simulations(finrisk, make_portfolio):
+    """30 simulations du compte de démonstration (janvier à mars 2023) et 3 d'un autre utilisateur"""
+    portfolio_id = make_portfolio([('AAPL', 'equity', 10, 100.0)], name='Archive')
+    with finrisk.app.app_context():
+        demo = finrisk.User.query.filter_by(username='demo').first()
+        other = finrisk.User(username=f'other-{uuid.uuid4().hex[:8]}', email=f'{uuid.uuid4().hex[:8]}@finrisk.test',
+                             password_hash='-')
+        finrisk.db.session.add(other)
+        finrisk.db.session.flush()
+        ids = []
+        for i in range(33):
+            user = demo if i < 30 else other
+            sim = finrisk.Simulation(
+                name=f'sim {i}', type='var' if i % 2 else 'stress_test', portfolio_id=portfolio_id,
+                user_id=user.id, parameters=json.dumps({'i': i}),
+                results=json.dumps({'var': float(i)} if i % 2 else {'total_loss': float(i)}),
+                created_at=datetime(2023, 1, 1) + timedelta(days=2 * i, hours=i))
+            finrisk.db.session.add(sim)
+            finrisk.db.session.flush()
+            ids.append(sim.id)
+        finrisk.db.session.commit()
+        return {'portfolio_id': portfolio_id, 'ids': ids, 'demo': demo.id, 'other': other.id}
+
+
+def _archive(finrisk, archive, cutoff=CUTOFF):
+    with finrisk.app.app_context():
+        return archive.archive(finrisk.db.session, finrisk.Simulation, cutoff)
+
+
+def _listing(client, per_page):
+    items, page = [], 1
+    while True:
+        response = client.get(f'/api/simulations?page={page}&per_page={per_page}')
+        batch = response.get_json()
+        items += batch
+        if len(batch) < per_page:
+            return items, int(response.headers['X-Total-Count'])
+        page += 1
+
+
+def test_archive_moves_old_simulations_out_of_the_database(finrisk, archive, old_simulations):
+    summary = _archive(finrisk, archive)
+    assert summary['archived'] == 33
+    assert summary['files'] == 3  # une partition par mois
+    with finrisk.app.app_context():
+        assert finrisk.Simulation.query.filter(finrisk.Simulation.id.in_(old_simulations['ids'])).count() == 0
+    manifest = archive.manifest()
+    assert set(manifest['ids']) == set(old_simulations['ids'])
+    assert archive.watermark == CUTOFF
+    assert archive.count(old_simulations['demo']) == 30
+    # Même date limite: rien à refaire
+    assert _archive(finrisk, archive)['archived'] == 0
+
+
+def test_pages_span_the_database_and_the_archive(finrisk, client, archive, old_simulations):
+    before, total_before = _listing(client, 500)
+    _archive(finrisk, archive)
+    after, total_after = _listing(client, 7)
+    assert total_after == total_before == len(before)
+    assert [item['id'] for item in after] == [item['id'] for item in before]
+    archived = [item for item in after if item.get('archived')]
+    assert len(archived) == 30
+    assert archived[0]['results'] == {'var': 29.0}
+
+
+def test_record_reads_a_single_partition(finrisk, archive, old_simulations, monkeypatch):
+    _archive(finrisk, archive)
+    reads = []
+    read_file = archive._read_file
+    monkeypatch.setattr(archive, '_read_file',
+                        lambda entry, *args: reads.append(entry['path']) or read_file(entry, *args))
+
+    sim_id, demo = old_simulations['ids'][5], old_simulations['demo']
+    record = archive.record(sim_id, demo)
+    assert record['name'] == 'sim 5' and record['parameters'] == {'i': 5}
+    assert record['results'] == {'var': 5.0}
+    assert len(reads) == 1
+    # Simulation d'un autre utilisateur: seule sa partition est lue, filtrée par utilisateur
+    assert archive.record(old_simulations['ids'][31], demo) is None
+    assert len(reads) == 2 and reads[1].startswith('month=2023-03')
+    # Identifiant absent de l'index: aucune lecture
+    assert archive.record('unknown', demo) is None
+    assert len(reads) == 2
+
+
+def test_manifests_without_an_index_are_migrated(finrisk, archive, old_simulations):
+    _archive(finrisk, archive, cutoff=datetime(2023, 2, 1))
+    manifest = archive.manifest()
+    del manifest['ids']
+    archive._write_manifest(manifest)
+    archive._manifest = None
+
+    sim_id, demo = old_simulations['ids'][3], old_simulations['demo']
+    assert archive.record(sim_id, demo)['name'] == 'sim 3'  # repli sur les partitions de l'utilisateur
+
+    _archive(finrisk, archive)
+    ids = archive.manifest()['ids']
+    assert set(ids) == set(old_simulations['ids'])
+    assert ids[sim_id].startswith('month=2023-01')
+
+
+def test_query_filters_are_pushed_into_partitions(finrisk, archive, old_simulations):
+    _archive(finrisk, archive)
+    demo = old_simulations['demo']
+    frame = archive.query(['id', 'type', 'created_at', 'var'], user_id=demo, sim_type='var',
+                          start=datetime(2023, 2, 1), end=datetime(2023, 3, 1))
+    created = datetime(2023, 1, 1) + pd.Series([timedelta(days=2 * i, hours=i) for i in range(30)])
+    expected = [old_simulations['ids'][i] for i in range(30)
+                if i % 2 and datetime(2023, 2, 1) <= created[i] < datetime(2023, 3, 1)]
+    assert sorted(frame['id']) == sorted(expected)
+    assert (frame['type'] == 'var').all()
+    assert archive.query(user_id=demo, portfolio_id='other-portfolio').empty
+
+    frames = list(archive.iter_query(['id', 'created_at'], user_id=demo))
+    assert len(frames) == 3
+    chronological = pd.concat(frames)['created_at']
+    assert chronological.is_monotonic_increasing and len(chronological) == 30
+
+
+def test_analytics_combine_archived_and_recent_simulations(finrisk, client, archive, old_simulations):
+    _archive(finrisk, archive)
+    response = client.get('/api/simulations/analytics?type=var&end=2023-04-01')
+    rows = {row['month']: row for row in response.get_json()}
+    assert set(rows) == {'2023-01', '2023-02', '2023-03'}
+    assert sum(row['count'] for row in rows.values()) == 15
+    assert rows['2023-01']['avg_var'] == pytest.approx(sum(range(1, 16, 2)) / 8)
+    assert rows['2023-01']['avg_stress_loss'] is None
+    assert client.get('/api/simulations/analytics?start=hier').status_code == 400
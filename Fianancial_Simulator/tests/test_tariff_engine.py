@@ -0,0 +1,91 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.tariff_engine import RatingFactor, Tariff, TariffEngine
+
+
+def _tariff(version='2025', zone_2=1.2, factors=None):
+    return Tariff.from_dict({
+        'name': 'auto', 'version': version, 'base_premium': 500,
+        'factors': factors or {
+            'zone': {'levels': {'1': 1.0, '2': zone_2, '3': 1.5}, 'default': 2.0},
+            'age': {'bands': [18, 25, 65], 'relativities': [1.8, 1.0, 1.3], 'default': 1.1,
+                    'column': 'driver_age'},
+        }
+    })
+
+
+@pytest.fixture
+def policies():
+    return pd.DataFrame({'zone': [1, 2, 3, 9, 2], 'driver_age': [20, 30, 70, 10, np.nan]})
+
+
+def test_rate_multiplies_base_premium_by_relativities(policies):
+    premium = _tariff().rate(policies)
+    np.testing.assert_allclose(premium, 500 * np.array([1.0 * 1.8, 1.2 * 1.0, 1.5 * 1.3, 2.0 * 1.1, 1.2 * 1.1]))
+
+
+def test_categorical_levels_match_integers_strings_and_float_columns():
+    factor = RatingFactor('zone', levels={'1': 1.0, '2': 1.2}, default=2.0)
+    np.testing.assert_array_equal(factor.relativities(np.array([1, 2])), [1.0, 1.2])
+    np.testing.assert_array_equal(factor.relativities(np.array(['1', '2', 'x'])), [1.0, 1.2, 2.0])
+    # Colonne entière lue en flottants à cause d'une valeur manquante: 2.0 reste la zone « 2 »
+    np.testing.assert_array_equal(factor.relativities(np.array([2.0, np.nan, np.inf, -np.inf])),
+                                  [1.2, 2.0, 2.0, 2.0])
+    # Une vraie valeur décimale n'est pas arrondie sur une modalité
+    np.testing.assert_array_equal(factor.relativities(np.array([1.5, 2.0])), [2.0, 2.0])
+
+
+def test_banded_factor_boundaries():
+    factor = RatingFactor('age', bands=[18, 25, 65], relativities=[1.8, 1.0, 1.3], default=1.1)
+    np.testing.assert_array_equal(factor.codes([17.9, 18, 24.9, 25, 65, 99, np.nan]), [-1, 0, 0, 1, 2, 2, -1])
+
+
+def test_round_trip_through_dict(tmp_path):
+    tariff = _tariff()
+    path = tmp_path / 'tariff.json'
+    path.write_text(json.dumps(tariff.to_dict()), encoding='utf-8')
+    assert Tariff.load(str(path)).to_dict() == tariff.to_dict()
+
+
+def test_rate_file_streams_chunks(tmp_path, policies):
+    source, target = tmp_path / 'policies.csv', tmp_path / 'rated.csv'
+    policies.to_csv(source, index=False)
+    summary = TariffEngine(chunksize=2).rate_file(_tariff(), str(source), str(target))
+    rated = pd.read_csv(target)
+    assert summary['policies'] == len(rated) == len(policies)
+    np.testing.assert_allclose(rated['premium'], _tariff().rate(policies))
+    assert summary['total_premium'] == pytest.approx(rated['premium'].sum(), abs=0.01)
+
+
+def test_diff_reports_changed_levels_only(policies):
+    engine = TariffEngine()
+    report = engine.diff(_tariff(), _tariff('2026', zone_2=1.32), [policies.iloc[:3], policies.iloc[3:]])
+    assert report['policies'] == 5
+    assert report['added_factors'] == [] and report['removed_factors'] == []
+    assert set(report['impact_by_level']) == {'zone'}
+    zone = report['impact_by_level']['zone']
+    assert zone['2']['policies'] == 2 and zone['2']['change_pct'] == pytest.approx(10.0)
+    assert zone['(autre)']['policies'] == 1 and zone['(autre)']['change_pct'] == 0
+    assert sum(report['change_distribution'].values()) == 5
+    assert report['change_distribution']['[+5.0%, +10.0%)'] == 0
+    assert report['change_distribution']['[+10.0%, +inf%)'] == 2
+
+
+def test_diff_covers_added_and_removed_factors(policies):
+    policies = policies.assign(usage=['pro', 'perso', 'pro', 'perso', 'pro'])
+    old = _tariff()
+    new_factors = {'zone': old.to_dict()['factors']['zone'],
+                   'usage': {'levels': {'pro': 1.25, 'perso': 1.0}}}
+    report = TariffEngine().diff(old, _tariff('2026', factors=new_factors), [policies])
+    assert report['added_factors'] == ['usage']
+    assert report['removed_factors'] == ['age']
+    impact = report['impact_by_level']
+    assert set(impact) == {'usage', 'age'}
+    # Le facteur retiré est ventilé selon les tranches de l'ancienne version
+    assert impact['age']['>=18']['policies'] == 1
+    assert impact['age']['>=18']['change_pct'] == pytest.approx((1.25 / 1.8 - 1) * 100, abs=1e-4)
+    assert impact['usage']['perso']['policies'] == 2
@@ -0,0 +1,82 @@
+from types import SimpleNamespace
+
+import pytest
+
+from auth.user_cache import SessionUser, UserCache
+
+
+def _user(user_id, username=None):
+    return SimpleNamespace(id=user_id, username=username or f'user{user_id}', email=f'{user_id}@finrisk.test')
+
+
+@pytest.fixture
+def loads():
+    return []
+
+
+@pytest.fixture
+def cache(loads):
+    users = {'1': _user('1'), '2': _user('2'), '3': _user('3')}
+
+    def loader(user_id):
+        loads.append(user_id)
+        return users.get(user_id)
+    return UserCache(loader, max_entries=2, ttl=300, name='test_users')
+
+
+def test_identity_is_loaded_once(cache, loads):
+    first = cache.get('1')
+    assert isinstance(first, SessionUser) and first.username == 'user1'
+    assert cache.get('1') is first
+    assert loads == ['1']
+    assert cache.get('unknown') is None
+
+
+def test_capacity_and_invalidation(cache, loads):
+    cache.get('1')
+    cache.get('2')
+    cache.get('1')  # 1 redevient le plus récent
+    cache.get('3')  # évince 2
+    assert len(cache) == 2
+    cache.get('2')
+    assert loads == ['1', '2', '3', '2']
+    cache.invalidate('2')
+    cache.get('2')
+    assert loads[-1] == '2' and len(loads) == 5
+
+
+def test_expired_entries_are_reloaded(loads):
+    cache = UserCache(lambda user_id: loads.append(user_id) or _user(user_id), ttl=-1, name='test_expired')
+    cache.get('1')
+    cache.get('1')
+    assert loads == ['1', '1']
+
+
+def test_put_refreshes_the_identity(cache, loads):
+    cache.get('1')
+    cache.put(_user('1', username='renamed'))
+    assert cache.get('1').username == 'renamed'
+    assert loads == ['1']
+
+
+def test_updating_a_user_invalidates_the_cached_identity(finrisk):
+    with finrisk.app.app_context():
+        user = finrisk.User.query.filter_by(username='demo').first()
+        finrisk.user_cache.put(user)
+        assert user.id in finrisk.user_cache._entries
+        user.email = 'demo-updated@finrisk.com'
+        finrisk.db.session.commit()
+        assert user.id not in finrisk.user_cache._entries
+        user.email = 'demo@finrisk.com'
+        finrisk.db.session.commit()
+
+
+def test_authenticated_requests_do_not_reload_the_user(finrisk, client, monkeypatch):
+    loads = []
+    loader = finrisk.user_cache.loader
+    monkeypatch.setattr(finrisk.user_cache, 'loader', lambda user_id: loads.append(user_id) or loader(user_id))
+    for _ in range(3):
+        response = client.get('/api/current_user')
+        assert response.status_code == 200
+        assert response.get_json()['username'] == 'demo'
+    assert loads == []  # identité mise en cache à la connexion
@@ -0,0 +1,170 @@
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(key):
+    if not key:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in key) + '}'
+
+
+class Histogram:
+    """Histogramme cumulatif au format Prometheus"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class MetricsRegistry:
+    """Registre en mémoire des compteurs, jauges et histogrammes (thread-safe)"""
+
+    def __init__(self, prefix='finrisk'):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._gauge_callbacks = {}
+        self._histograms = {}
+        self._help = {}
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def increment(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = value
+
+    def adjust_gauge(self, name, delta, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + delta
+
+    def register_gauge(self, name, callback, **labels):
+        """Jauge évaluée à la lecture (taille de cache, file d'attente...)"""
+        with self._lock:
+            self._gauge_callbacks[(name, _label_key(labels))] = callback
+
+    def observe(self, name, value, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def span(self, name, **labels):
+        """Chronomètre un bloc de code nommé (récupération de données, noyau de risque, PDF...)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('span_duration_seconds', time.perf_counter() - start, span=name, **labels)
+
+    def timed(self, name, **labels):
+        """Décorateur équivalent à span(name, **labels)"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def fallback(self, path):
+        """Compte le déclenchement d'un chemin de repli (valeurs par défaut après une erreur)"""
+        self.increment('fallback_total', path=path)
+
+    def get_counter(self, name, **labels):
+        return self._counters.get((name, _label_key(labels)), 0)
+
+    def render_prometheus(self):
+        """Exposition au format texte Prometheus (version 0.0.4)"""
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            callbacks = dict(self._gauge_callbacks)
+            histograms = {k: (h.buckets, list(h.counts), h.count, h.sum) for k, h in self._histograms.items()}
+
+        for key, callback in callbacks.items():
+            try:
+                gauges[key] = callback()
+            except Exception:
+                continue
+
+        lines = []
+        lines.extend(self._render_simple(counters, 'counter'))
+        lines.extend(self._render_simple(gauges, 'gauge'))
+
+        for name in sorted({name for name, _ in histograms}):
+            full_name = f'{self.prefix}_{name}'
+            lines.extend(self._header(name, full_name, 'histogram'))
+            for (metric, key), (buckets, counts, count, total) in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                for bound, bucket_count in zip(buckets, counts):
+                    bucket_key = key + (('le', repr(float(bound))),)
+                    lines.append(f'{full_name}_bucket{_format_labels(bucket_key)} {bucket_count}')
+                lines.append(f'{full_name}_bucket{_format_labels(key + (("le", "+Inf"),))} {count}')
+                lines.append(f'{full_name}_sum{_format_labels(key)} {total}')
+                lines.append(f'{full_name}_count{_format_labels(key)} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def _render_simple(self, values, metric_type):
+        lines = []
+        for name in sorted({name for name, _ in values}):
+            full_name = f'{self.prefix}_{name}'
+            lines.extend(self._header(name, full_name, metric_type))
+            for (metric, key), value in sorted(values.items()):
+                if metric == name:
+                    lines.append(f'{full_name}{_format_labels(key)} {value}')
+        return lines
+
+    def _header(self, name, full_name, metric_type):
+        lines = []
+        if name in self._help:
+            lines.append(f'# HELP {full_name} {self._help[name]}')
+        lines.append(f'# TYPE {full_name} {metric_type}')
+        return lines
+
+
+metrics = MetricsRegistry()
+metrics.describe('requests_total', 'Nombre de requêtes HTTP traitées')
+metrics.describe('request_duration_seconds', 'Durée des requêtes HTTP')
+metrics.describe('span_duration_seconds', 'Durée des étapes nommées (données, noyaux de risque, base, PDF)')
+metrics.describe('fallback_total', 'Nombre de déclenchements des chemins de repli')
+metrics.describe('cache_entries', 'Nombre d\'entrées par cache')
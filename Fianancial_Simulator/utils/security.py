@@ -1,5 +1,6 @@
 import re
 import hashlib
+import hmac
 
 
 class SecurityUtils:
@@ -30,6 +31,16 @@ class SecurityUtils:
         import secrets
         return secrets.token_hex(32)
 
+    @staticmethod
+    def check_bearer_token(authorization, expected):
+        """En-tête "Authorization: Bearer <jeton>" comparé en temps constant (refusé sans jeton attendu)"""
+        if not expected or not authorization:
+            return False
+        scheme, _, token = authorization.partition(' ')
+        if scheme.lower() != 'bearer':
+            return False
+        return hmac.compare_digest(token.strip().encode(), expected.encode())
+
     @staticmethod
     def sanitize_input(input_str):
         if not input_str: